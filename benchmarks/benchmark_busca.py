@@ -0,0 +1,96 @@
+"""Compara a busca por LIKE '%termo%' com o índice FTS5 em um catálogo sintético.
+
+Uso: python -m benchmarks.benchmark_busca [quantidade_produtos]
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from repositories.produto_repo import ProdutoRepo
+from util import database
+
+SQL_BUSCA_LIKE = """
+    SELECT id, nome, preco, descricao, estoque, categoria_id
+    FROM produto
+    WHERE nome LIKE ? OR descricao LIKE ?
+    ORDER BY nome
+    LIMIT 6 OFFSET 0;
+"""
+
+SQL_QUANTIDADE_LIKE = """
+    SELECT COUNT(*) FROM produto
+    WHERE nome LIKE ? OR descricao LIKE ?;
+"""
+
+PALAVRAS = (
+    "fone ouvido bluetooth cancelamento ruído bateria tela smartphone "
+    "câmera notebook teclado mouse monitor áudio relógio carregador cabo "
+    "caixa som microfone console controle óculos realidade virtual"
+).split()
+
+TERMOS = ["fone", "bluetooth", "câmera", "teclado mecânico", "óculos virtual"]
+
+
+def popular(quantidade: int):
+    ProdutoRepo.criar_tabela()
+    aleatorio = random.Random(42)
+    # vocabulário grande para que cada termo real apareça em poucos produtos,
+    # como em um catálogo de verdade
+    vocabulario = PALAVRAS + [f"termo{i}" for i in range(20_000)]
+    with database.obter_conexao() as conexao:
+        conexao.executemany(
+            "INSERT INTO produto(nome, preco, descricao, estoque, categoria_id) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    " ".join(aleatorio.choices(vocabulario, k=3)).title(),
+                    round(aleatorio.uniform(10, 5000), 2),
+                    " ".join(aleatorio.choices(vocabulario, k=40)),
+                    aleatorio.randint(0, 100),
+                    aleatorio.randint(1, 10),
+                )
+                for _ in range(quantidade)
+            ),
+        )
+    ProdutoRepo.reconstruir_indice_busca()
+
+
+def medir(funcao, repeticoes: int = 20) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for termo in TERMOS:
+            funcao(termo)
+    return (time.perf_counter() - inicio) / (repeticoes * len(TERMOS)) * 1000
+
+
+def buscar_like(termo: str):
+    termo = f"%{termo}%"
+    with database.obter_conexao() as conexao:
+        conexao.execute(SQL_BUSCA_LIKE, (termo, termo)).fetchall()
+        conexao.execute(SQL_QUANTIDADE_LIKE, (termo, termo)).fetchone()
+
+
+def buscar_fts(termo: str):
+    ProdutoRepo.obter_busca(termo, 1, 6, 4)
+    ProdutoRepo.obter_quantidade_busca(termo)
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    pasta = tempfile.mkdtemp()
+    os.environ["BANCO_ARQUIVO"] = os.path.join(pasta, "busca.db")
+    try:
+        popular(quantidade)
+        print(f"Produtos: {quantidade}")
+        print(f"LIKE: {medir(buscar_like, 3):.3f} ms/busca (página + contagem)")
+        print(f"FTS5: {medir(buscar_fts):.3f} ms/busca (página + contagem)")
+    finally:
+        database.fechar_pool()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Mede /img/produto/{id}/{tamanho}.{formato} com o cache frio e quente.
+
+Com o cache vazio, dispara vários pedidos simultâneos da mesma variante e
+confere quantas gerações o pool de imagens executou (deveria ser uma). Em
+seguida mede a latência dos acertos, servidos direto do disco.
+
+Uso: python -m benchmarks.benchmark_cache_imagens [pedidos_simultaneos]
+"""
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# banco e cache temporários, para não alterar os do projeto
+PASTA_TEMPORARIA = tempfile.mkdtemp()
+os.environ["IMAGENS_CACHE_PASTA"] = os.path.join(PASTA_TEMPORARIA, "cache")
+os.environ["BANCO_ARQUIVO"] = os.path.join(PASTA_TEMPORARIA, "dados.db")
+shutil.copy("dados.db", os.environ["BANCO_ARQUIVO"])
+
+
+async def medir(simultaneos: int):
+    import httpx
+
+    import main
+    from util.cache_imagens import obter_cache_imagens
+    from util.processamento_imagens import obter_estatisticas_imagens
+
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://loja") as cliente:
+        url = "/img/produto/1/320.avif"
+        inicio = time.perf_counter()
+        respostas = await asyncio.gather(*[cliente.get(url) for _ in range(simultaneos)])
+        frio = time.perf_counter() - inicio
+        assert all(r.status_code == 200 for r in respostas)
+        print(
+            f"Cache frio: {simultaneos} pedidos simultâneos em {frio * 1000:.0f} ms, "
+            f"{obter_estatisticas_imagens()['execucoes']} geração(ões) no pool"
+        )
+        tempos = []
+        for _ in range(200):
+            inicio = time.perf_counter()
+            await cliente.get(url)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        print(
+            f"Cache quente: mediana {statistics.median(tempos):.2f} ms, "
+            f"p99 {statistics.quantiles(tempos, n=100)[98]:.2f} ms"
+        )
+        print(obter_cache_imagens().obter_estatisticas())
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(medir(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
+    finally:
+        shutil.rmtree(PASTA_TEMPORARIA, ignore_errors=True)
@@ -0,0 +1,84 @@
+"""Mede bytes transferidos e CPU por requisição com e sem compressão.
+
+Para algumas rotas (páginas do catálogo, listas JSON e a exportação em
+streaming), faz as mesmas requisições pedindo identity, gzip e br e mostra
+o tamanho no fio e o tempo de CPU do processo por requisição. A diferença
+para identity é o custo do CompressaoRespostas. Os níveis vêm de
+COMPRESSAO_NIVEL_GZIP e COMPRESSAO_NIVEL_BROTLI, como no servidor.
+
+Uso: python -m benchmarks.benchmark_compressao [produtos_extras] [repeticoes]
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import httpx
+
+# banco temporário, para não alterar o do projeto
+PASTA_TEMPORARIA = tempfile.mkdtemp()
+os.environ["BANCO_ARQUIVO"] = os.path.join(PASTA_TEMPORARIA, "dados.db")
+shutil.copy("dados.db", os.environ["BANCO_ARQUIVO"])
+
+ROTAS = [
+    "/",
+    "/buscar?q=fone&tp=24",
+    "/produto/1",
+    "/admin/obter_produtos_paginados?tamanho=100",
+    "/admin/exportar_produtos?formato=ndjson",
+]
+CODIFICACOES = ("identity", "gzip", "br")
+
+
+async def medir(cliente: httpx.AsyncClient, url: str, codificacao: str, repeticoes: int):
+    cabecalhos = {"Accept-Encoding": codificacao}
+    resposta = await cliente.get(url, headers=cabecalhos)
+    assert resposta.status_code == 200, (url, resposta.status_code)
+    recebida = resposta.headers.get("content-encoding", "identity")
+    inicio = time.process_time()
+    for _ in range(repeticoes):
+        await cliente.get(url, headers=cabecalhos)
+    cpu = (time.process_time() - inicio) / repeticoes * 1000
+    return resposta.num_bytes_downloaded, cpu, recebida
+
+
+async def executar(repeticoes: int):
+    import main
+
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://loja") as cliente:
+        print(f"{'Rota':46}" + "".join(f"{c:>22}" for c in CODIFICACOES))
+        for url in ROTAS:
+            colunas = []
+            tamanho_original = None
+            for codificacao in CODIFICACOES:
+                tamanho, cpu, recebida = await medir(cliente, url, codificacao, repeticoes)
+                tamanho_original = tamanho_original or tamanho
+                marca = "" if recebida == codificacao else "*"
+                colunas.append(
+                    f"{tamanho / 1024:7.1f} KB{marca:1} {tamanho / tamanho_original:4.0%} "
+                    f"{cpu:5.2f} ms"
+                )
+            print(f"{url:46}" + "".join(f"{c:>22}" for c in colunas))
+    print("KB no fio, fração do original e CPU por requisição (* = enviada sem compressão)")
+
+
+def main():
+    from benchmarks.benchmark_busca import popular
+    from util import database
+
+    extras = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    try:
+        # produtos extras com descrições longas, para a exportação e as listas
+        popular(extras)
+        asyncio.run(executar(repeticoes))
+    finally:
+        database.fechar_pool()
+        shutil.rmtree(PASTA_TEMPORARIA, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compara requisições por segundo com o banco no event loop e no executor.
+
+Uso: python -m benchmarks.benchmark_concorrencia [quantidade_produtos] [requisicoes]
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.benchmark_busca import popular
+from util import database
+
+CONCORRENCIAS = (1, 10, 100)
+URL = "/admin/obter_produtos_paginados?q=fone&o=2&tamanho=20"
+
+
+class RepositorioBloqueante:
+    """Mesma interface do RepositorioAssincrono, mas consulta no event loop."""
+
+    def __init__(self, repositorio):
+        self._repositorio = repositorio
+
+    def __getattr__(self, nome: str):
+        metodo = getattr(self._repositorio, nome)
+
+        async def envolvido(*args, **kwargs):
+            return metodo(*args, **kwargs)
+
+        return envolvido
+
+
+async def medir(app, concorrencia: int, requisicoes: int) -> float:
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+        fila = asyncio.Queue()
+        for _ in range(requisicoes):
+            fila.put_nowait(None)
+
+        async def cliente_virtual():
+            while not fila.empty():
+                fila.get_nowait()
+                resposta = await cliente.get(URL)
+                assert resposta.status_code == 200, resposta.text
+
+        await cliente.get(URL)
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente_virtual() for _ in range(concorrencia)))
+        return requisicoes / (time.perf_counter() - inicio)
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    requisicoes = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    pasta = tempfile.mkdtemp()
+    os.environ["BANCO_ARQUIVO"] = os.path.join(pasta, "dados.db")
+    # sem cache, para que toda requisição chegue ao banco
+    os.environ["CACHE_HABILITADO"] = "0"
+    try:
+        popular(quantidade)
+        from main import app
+        from repositories.produto_repo import ProdutoRepo
+        from routes import admin_routes
+
+        assincrono = admin_routes.ProdutoRepoAsync
+        resultados = {}
+        for titulo, repositorio in (
+            ("No event loop", RepositorioBloqueante(ProdutoRepo)),
+            ("Executor", assincrono),
+        ):
+            admin_routes.ProdutoRepoAsync = repositorio
+            resultados[titulo] = [
+                asyncio.run(medir(app, concorrencia, requisicoes))
+                for concorrencia in CONCORRENCIAS
+            ]
+        admin_routes.ProdutoRepoAsync = assincrono
+        print(f"Produtos: {quantidade}, {requisicoes} requisições GET {URL}")
+        print(f"{'Clientes':14}" + "".join(f"{c:>10}" for c in CONCORRENCIAS))
+        for titulo, valores in resultados.items():
+            print(f"{titulo:14}" + "".join(f"{v:10.1f}" for v in valores) + "  req/s")
+    finally:
+        database.fechar_pool()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
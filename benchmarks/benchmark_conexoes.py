@@ -0,0 +1,63 @@
+"""Compara o custo de abrir uma conexão por consulta com o pool de conexões.
+
+Uso: python -m benchmarks.benchmark_conexoes [repeticoes]
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from repositories.categoria_repo import CategoriaRepo
+from repositories.produto_repo import ProdutoRepo
+from util import database
+
+
+@contextmanager
+def conexao_sem_pool():
+    # comportamento anterior: uma conexão nova por consulta
+    with sqlite3.connect(os.environ["BANCO_ARQUIVO"]) as conexao:
+        yield conexao
+
+
+def simular_requisicao():
+    # aproximadamente as consultas feitas por um clique em "adicionar ao carrinho"
+    for id in range(1, 7):
+        ProdutoRepo.obter_um(id)
+    CategoriaRepo.obter_todos()
+
+
+def medir(repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        simular_requisicao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    pasta = tempfile.mkdtemp()
+    os.environ["BANCO_ARQUIVO"] = os.path.join(pasta, "dados.db")
+    shutil.copy("dados.db", os.environ["BANCO_ARQUIVO"])
+    try:
+        obter_conexao_original = database.obter_conexao
+        for modulo in ("categoria_repo", "produto_repo"):
+            setattr(sys.modules[f"repositories.{modulo}"], "obter_conexao", conexao_sem_pool)
+        sem_pool = medir(repeticoes)
+        for modulo in ("categoria_repo", "produto_repo"):
+            setattr(sys.modules[f"repositories.{modulo}"], "obter_conexao", obter_conexao_original)
+        com_pool = medir(repeticoes)
+        print(f"Requisições simuladas: {repeticoes} (7 consultas cada)")
+        print(f"Sem pool: {sem_pool:.3f} ms/requisição")
+        print(f"Com pool: {com_pool:.3f} ms/requisição")
+        print(f"Ganho:    {sem_pool / com_pool:.1f}x")
+        print(f"Pool:     {database.obter_estatisticas_pool()}")
+    finally:
+        database.fechar_pool()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
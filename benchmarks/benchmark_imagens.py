@@ -0,0 +1,61 @@
+"""Estima o peso das imagens da grade de produtos com e sem as derivadas.
+
+Para alguns tamanhos de tela, calcula a largura exibida de cada card pelo
+atributo sizes de includes/grid_produtos.html e escolhe a menor derivada
+que a cobre (como o navegador faz com srcset), no formato mais leve que o
+navegador aceita. Compara com o JPEG principal de 480px, usado antes.
+
+Rode depois de "python gerenciar.py gerar_derivadas".
+
+Uso: python -m benchmarks.benchmark_imagens
+"""
+import os
+import re
+
+from util.images import (
+    LARGURAS_DERIVADAS,
+    PASTA_PRODUTOS,
+    caminho_derivada,
+    caminho_imagem_produto,
+    tem_derivadas,
+)
+
+# (descrição, largura da tela em px CSS, densidade de pixels, formato aceito)
+CENARIOS = [
+    ("celular, 1 coluna", 390, 3, "avif"),
+    ("tablet, 2 colunas", 820, 2, "webp"),
+    ("notebook, 4 colunas", 1280, 1, "avif"),
+    ("desktop, 6 colunas", 1920, 1, "webp"),
+    ("desktop antigo, 6 colunas", 1920, 1, "jpg"),
+]
+
+# o mesmo que o sizes da grade: (largura mínima da tela, fração da tela)
+COLUNAS = [(1400, 1 / 6), (1200, 1 / 4), (992, 1 / 3), (768, 1 / 2), (0, 1)]
+
+
+def largura_exibida(largura_tela: int) -> float:
+    return next(fracao for minimo, fracao in COLUNAS if largura_tela >= minimo) * largura_tela
+
+
+def main():
+    ids = sorted(
+        int(nome[:4]) for nome in os.listdir(PASTA_PRODUTOS) if re.fullmatch(r"\d{4}\.jpg", nome)
+    )
+    ids = [id for id in ids if tem_derivadas(id)][:12]
+    if not ids:
+        print('Nenhuma derivada encontrada. Rode "python gerenciar.py gerar_derivadas".')
+        return
+    antes = sum(os.path.getsize(caminho_imagem_produto(id)) for id in ids)
+    print(f"{len(ids)} cards | antes: {antes / 1024:.0f} KB (JPEG de 480px em qualquer tela)")
+    for descricao, largura_tela, densidade, formato in CENARIOS:
+        necessaria = largura_exibida(largura_tela) * densidade
+        largura = next((l for l in LARGURAS_DERIVADAS if l >= necessaria), LARGURAS_DERIVADAS[-1])
+        depois = sum(os.path.getsize(caminho_derivada(id, largura, formato)) for id in ids)
+        print(
+            f"{descricao:26} {largura:3}px {formato:4} | {depois / 1024:5.0f} KB "
+            f"({(1 - depois / antes) * 100:4.0f}% menor)"
+        )
+
+
+if __name__ == "__main__":
+    main()
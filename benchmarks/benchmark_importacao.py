@@ -0,0 +1,79 @@
+"""Compara a importação de produtos linha a linha com a importação em lotes.
+
+Gera um arquivo NDJSON sintético e importa-o num banco temporário: primeiro
+com um ProdutoRepo.inserir por produto (uma transação cada, como fazia a
+carga inicial), depois com ProdutoRepo.importar (executemany em lotes numa
+única transação). A importação linha a linha usa só os primeiros registros,
+para não levar minutos; a taxa em produtos por segundo é comparável.
+
+Uso: python -m benchmarks.benchmark_importacao [quantidade] [tamanho_lote]
+"""
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+LIMITE_LINHA_A_LINHA = 5_000
+
+
+def gerar_arquivo(caminho: str, quantidade: int):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        for i in range(1, quantidade + 1):
+            registro = {
+                "nome": f"Produto de teste {i}",
+                "preco": round(10 + (i % 1000) * 0.37, 2),
+                "descricao": f"Descrição do produto de teste número {i}",
+                "estoque": i % 50,
+                "categoria_id": i % 5 + 1,
+            }
+            arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tamanho_lote = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    pasta = tempfile.mkdtemp()
+    os.environ["BANCO_ARQUIVO"] = os.path.join(pasta, "dados.db")
+    try:
+        from models.produto_model import Produto
+        from repositories.produto_repo import ProdutoRepo
+        from util.importacao import ler_registros
+        from util.migracoes import aplicar_migracoes
+
+        aplicar_migracoes()
+        caminho = os.path.join(pasta, "produtos.ndjson")
+        gerar_arquivo(caminho, quantidade)
+        tamanho_mb = os.path.getsize(caminho) / 1024 / 1024
+        print(f"{quantidade} produtos, {tamanho_mb:.1f} MB em NDJSON")
+
+        amostra = min(quantidade, LIMITE_LINHA_A_LINHA)
+        with open(caminho, "rb") as arquivo:
+            inicio = time.perf_counter()
+            for i, registro in enumerate(ler_registros(arquivo, "ndjson")):
+                if i == amostra:
+                    break
+                ProdutoRepo.inserir(Produto(**registro))
+            duracao = time.perf_counter() - inicio
+        print(f"Linha a linha: {amostra / duracao:10.0f} produtos/s ({amostra} produtos)")
+
+        memoria_antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        with open(caminho, "rb") as arquivo:
+            inicio = time.perf_counter()
+            importados = ProdutoRepo.importar(ler_registros(arquivo, "ndjson"), tamanho_lote)
+            duracao = time.perf_counter() - inicio
+        # ru_maxrss é o pico do processo (em KB no Linux); o aumento em
+        # relação ao início mostra que o arquivo não é carregado inteiro
+        pico_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - memoria_antes
+        print(
+            f"Em lotes:      {importados / duracao:10.0f} produtos/s "
+            f"({importados} produtos em {duracao:.1f}s, memória +{pico_mb:.1f} MB)"
+        )
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
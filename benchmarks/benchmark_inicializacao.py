@@ -0,0 +1,76 @@
+"""Mede quanto tempo um worker leva para subir (importar main e criar o app).
+
+Compara a inicialização atual, que só confere a versão do esquema, com a
+anterior, que recriava as tabelas, conferia a carga inicial, copiava as
+imagens dos produtos e montava o esquema OpenAPI a cada worker.
+
+Uso: python -m benchmarks.benchmark_inicializacao [repeticoes]
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# os imports de bibliotecas e rotas custam o mesmo nas duas versões e são
+# medidos à parte; o restante é o trabalho feito pelo worker ao subir
+IMPORTAR = """
+import time
+inicio_imports = time.perf_counter()
+import fastapi, routes.main_routes, routes.admin_routes, routes.cliente_routes, routes.auth_routes
+import util.migracoes
+inicio = time.perf_counter()
+"""
+
+MEDIR_ATUAL = IMPORTAR + """
+import main
+print(inicio - inicio_imports, time.perf_counter() - inicio)
+"""
+
+MEDIR_ANTERIOR = IMPORTAR + """
+import main
+from repositories.produto_repo import ProdutoRepo
+from repositories.usuario_repo import UsuarioRepo
+from util.migracoes import MIGRACOES
+MIGRACOES[0][2](None)
+ProdutoRepo.inserir_produtos_json("sql/produtos.json")
+UsuarioRepo.inserir_usuarios_json("sql/usuarios.json")
+ProdutoRepo.transferir_imagens("static/img/produtos/inserir", "static/img/produtos")
+main.app.openapi()
+print(inicio - inicio_imports, time.perf_counter() - inicio)
+"""
+
+
+def medir(codigo: str, repeticoes: int) -> tuple:
+    imports, inicializacoes = [], []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", codigo], capture_output=True, text=True, check=True
+        ).stdout
+        tempo_imports, tempo_inicializacao = saida.strip().splitlines()[-1].split()
+        imports.append(float(tempo_imports) * 1000)
+        inicializacoes.append(float(tempo_inicializacao) * 1000)
+    return statistics.median(imports), statistics.median(inicializacoes)
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    pasta = tempfile.mkdtemp()
+    os.environ["BANCO_ARQUIVO"] = os.path.join(pasta, "dados.db")
+    shutil.copy("dados.db", os.environ["BANCO_ARQUIVO"])
+    try:
+        subprocess.run(
+            [sys.executable, "gerenciar.py", "inicializar"], capture_output=True, check=True
+        )
+        anterior = medir(MEDIR_ANTERIOR, repeticoes)
+        atual = medir(MEDIR_ATUAL, repeticoes)
+        print(f"Mediana de {repeticoes} inicializações, cada uma em um processo novo")
+        for titulo, (imports, inicializacao) in (("Anterior", anterior), ("Atual", atual)):
+            print(f"{titulo:9} imports {imports:7.1f} ms | inicialização {inicializacao:7.1f} ms")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
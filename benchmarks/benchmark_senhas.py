@@ -0,0 +1,95 @@
+"""Mede logins por segundo e o p99 do catálogo durante uma rajada de logins.
+
+Compara o bcrypt rodando direto no event loop com o pool de util/senhas.py.
+
+Uso: python -m benchmarks.benchmark_senhas [logins] [consultas]
+"""
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+from util import database
+
+EMAIL = "benchmark@lojavirtual.com"
+SENHA = "Senha@123"
+
+
+async def conferir_no_event_loop(senha: str, hash_senha: str) -> bool:
+    # comportamento anterior: bcrypt síncrono dentro do handler async
+    from util.auth_jwt import conferir_senha
+    return conferir_senha(senha, hash_senha)
+
+
+async def medir(app, logins: int, consultas: int) -> dict:
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+
+        async def entrar():
+            resposta = await cliente.post("/auth/entrar", json={"email": EMAIL, "senha": SENHA})
+            assert resposta.status_code in (200, 503), resposta.text
+
+        async def consultar(latencias: list):
+            # a latência conta a partir do instante agendado, para que o tempo
+            # em que o event loop ficou travado também seja medido
+            inicio = time.perf_counter()
+            for i in range(consultas):
+                agendado = inicio + i * 0.01
+                await asyncio.sleep(max(agendado - time.perf_counter(), 0))
+                await cliente.get("/produto/1")
+                latencias.append((time.perf_counter() - agendado) * 1000)
+
+        await cliente.get("/produto/1")
+        latencias = []
+        inicio = time.perf_counter()
+        await asyncio.gather(consultar(latencias), *(entrar() for _ in range(logins)))
+        duracao = time.perf_counter() - inicio
+    return {
+        "logins_por_segundo": logins / duracao,
+        "p50": statistics.median(latencias),
+        "p99": statistics.quantiles(latencias, n=100)[98],
+    }
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    consultas = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    pasta = tempfile.mkdtemp()
+    os.environ["BANCO_ARQUIVO"] = os.path.join(pasta, "dados.db")
+    shutil.copy("dados.db", os.environ["BANCO_ARQUIVO"])
+    try:
+        from main import app
+        from models.usuario_model import Usuario
+        from repositories.usuario_repo import UsuarioRepo
+        from routes import auth_routes
+        from util import auth_jwt, senhas
+
+        UsuarioRepo.inserir(Usuario(
+            nome="Benchmark", cpf="999.999.999-00", data_nascimento="2000-01-01",
+            endereco="Rua do Benchmark, 1", telefone="(99) 99999-0000",
+            email=EMAIL, perfil=1, senha=auth_jwt.obter_hash_senha(SENHA),
+        ))
+        conferir_com_pool = auth_routes.conferir_senha
+        auth_routes.conferir_senha = conferir_no_event_loop
+        sem_pool = asyncio.run(medir(app, logins, consultas))
+        auth_routes.conferir_senha = conferir_com_pool
+        com_pool = asyncio.run(medir(app, logins, consultas))
+        print(f"Rajada: {logins} logins simultâneos, {consultas} GET /produto/1 em paralelo")
+        for titulo, resultado in (("No event loop", sem_pool), ("Com pool", com_pool)):
+            print(
+                f"{titulo:14} {resultado['logins_por_segundo']:6.1f} logins/s | "
+                f"catálogo p50 {resultado['p50']:7.1f} ms, p99 {resultado['p99']:7.1f} ms"
+            )
+        print(f"Pool:          {senhas.obter_estatisticas_senhas()}")
+    finally:
+        database.fechar_pool()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
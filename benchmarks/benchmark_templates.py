@@ -0,0 +1,146 @@
+"""Mede o custo dos templates na primeira requisição e em regime.
+
+Cada cenário roda em um processo novo, como um worker recém-iniciado:
+
+- Anterior: um ambiente Jinja por área (main, cliente e o das páginas de
+  erro), sem cache de bytecode e com recarga automática.
+- Único, bytecode frio: o ambiente compartilhado com o cache vazio.
+- Único, bytecode quente: o cache gravado por "gerenciar.py compilar_templates".
+- Produção: bytecode quente, TEMPLATES_AUTO_RELOAD=0 e
+  TEMPLATES_PRECOMPILAR=1, como no Dockerfile.
+
+Para cada um, mostra a subida do app, a primeira requisição de cada página
+do catálogo, a renderização em regime (mediana, sem banco nem HTTP) e o
+tempo para carregar os templates de todas as áreas.
+
+Uso: python -m benchmarks.benchmark_templates [processos] [renderizacoes]
+"""
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PAGINAS = ["/", "/produto/1", "/buscar?q=fone", "/entrar", "/cadastro", "/contato"]
+
+# o obter_jinja_templates de antes, com um ambiente por chamada
+ANTERIOR = """
+import util.templates
+from fastapi.templating import Jinja2Templates
+from jinja2 import ChoiceLoader, FileSystemLoader
+
+def obter_jinja_templates(diretorio):
+    loader = ChoiceLoader([FileSystemLoader(diretorio), FileSystemLoader("templates/shared")])
+    templates = Jinja2Templates(directory="templates", loader=loader)
+    templates.env.globals["obter_derivadas"] = util.templates.obter_derivadas
+    templates.env.globals["estatico"] = util.templates.estatico
+    return templates
+
+util.templates.obter_jinja_templates = obter_jinja_templates
+"""
+
+MEDIR = """
+import json, os, statistics, sys, time, warnings
+warnings.simplefilter("ignore")
+# importado antes nos dois modos, para que a subida compare só o app
+import util.templates
+if sys.argv[1] == "anterior":
+    exec(sys.argv[2])
+inicio = time.perf_counter()
+import main
+subida = time.perf_counter() - inicio
+from starlette.testclient import TestClient
+cliente = TestClient(main.app)
+paginas = json.loads(sys.argv[3])
+primeiras, regime = [], []
+from routes import cliente_routes, main_routes
+from util import exceptions
+for pagina in paginas:
+    inicio = time.perf_counter()
+    assert cliente.get(pagina).status_code == 200, pagina
+    primeiras.append(time.perf_counter() - inicio)
+# em regime, só a renderização: get_template (com a verificação de
+# atualização, se houver recarga) e render, sem banco nem HTTP
+from starlette.requests import Request
+contexto = {"request": Request({"type": "http", "path": "/entrar", "headers": [], "query_string": b""})}
+for nome in ("pages/entrar.html", "pages/contato.html", "pages/cadastro.html"):
+    tempos = []
+    for _ in range(int(sys.argv[4])):
+        inicio = time.perf_counter()
+        main_routes.templates.get_template(nome).render(contexto)
+        tempos.append(time.perf_counter() - inicio)
+    regime.append(statistics.median(tempos))
+# templates de todas as áreas, pelos objetos que as rotas usam
+inicio = time.perf_counter()
+for modulo, pasta in ((main_routes, "main"), (cliente_routes, "cliente"), (exceptions, "shared")):
+    for nome in os.listdir(f"templates/{pasta}/pages"):
+        modulo.templates.get_template(f"pages/{nome}")
+todos = time.perf_counter() - inicio
+print(json.dumps([subida, sum(primeiras), sum(regime) / len(regime), todos]))
+"""
+
+
+def medir(modo: str, ambiente: dict, requisicoes: int, repeticoes: int) -> list:
+    execucoes = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", MEDIR, modo, ANTERIOR, json.dumps(PAGINAS), str(requisicoes)],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={**os.environ, **ambiente},
+        ).stdout
+        execucoes.append(json.loads(saida.strip().splitlines()[-1]))
+    return [statistics.median(valores) * 1000 for valores in zip(*execucoes)]
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    requisicoes = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    pasta = tempfile.mkdtemp()
+    pasta_cache = os.path.join(pasta, "templates")
+    os.environ["BANCO_ARQUIVO"] = os.path.join(pasta, "dados.db")
+    # sem o cache de páginas, para que toda requisição renderize o template
+    os.environ["CACHE_HABILITADO"] = "0"
+    os.environ["TEMPLATES_CACHE_PASTA"] = pasta_cache
+    shutil.copy("dados.db", os.environ["BANCO_ARQUIVO"])
+    desenvolvimento = {"TEMPLATES_AUTO_RELOAD": "1", "TEMPLATES_PRECOMPILAR": "0"}
+    try:
+        resultados = {"Anterior": medir("anterior", desenvolvimento, requisicoes, repeticoes)}
+        frio = []
+        for _ in range(repeticoes):
+            shutil.rmtree(pasta_cache, ignore_errors=True)
+            frio.append(medir("atual", desenvolvimento, requisicoes, 1))
+        resultados["Único, bytecode frio"] = [statistics.median(valores) for valores in zip(*frio)]
+        shutil.rmtree(pasta_cache)
+        subprocess.run(
+            [sys.executable, "gerenciar.py", "compilar_templates"], capture_output=True, check=True
+        )
+        resultados["Único, bytecode quente"] = medir(
+            "atual", desenvolvimento, requisicoes, repeticoes
+        )
+        resultados["Produção"] = medir(
+            "atual",
+            {"TEMPLATES_AUTO_RELOAD": "0", "TEMPLATES_PRECOMPILAR": "1"},
+            requisicoes,
+            repeticoes,
+        )
+        print(
+            f"Mediana de {repeticoes} processos; {len(PAGINAS)} páginas, "
+            f"{requisicoes} renderizações por template em regime"
+        )
+        print(f"{'':24}{'subida':>10}{'1ª requisição':>16}{'regime':>10}{'todas as áreas':>16}")
+        for titulo, (subida, primeiras, regime, todos) in resultados.items():
+            print(
+                f"{titulo:24}{subida:8.0f} ms{primeiras:13.1f} ms"
+                f"{regime * 1000:7.0f} µs{todos:13.1f} ms"
+            )
+        print("1ª requisição: soma das páginas; regime: mediana por renderização")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+from typing import List
+from pydantic import BaseModel, field_validator
+
+from util.validators import *
+
+
+class DefinirDestaquesDto(BaseModel):
+    ids_produtos: List[int]
+
+    @field_validator("ids_produtos")
+    def validar_ids_produtos(cls, v):
+        for id in v:
+            msg = is_greater_than(id, "Id do Produto", 0)
+            if msg: raise ValueError(msg)
+        if len(set(v)) != len(v):
+            raise ValueError("A lista de destaques não pode ter produtos repetidos.")
+        return v
@@ -0,0 +1,202 @@
+"""Comandos de manutenção da loja.
+
+Uso: python gerenciar.py <comando>
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+
+from repositories.pedido_repo import PedidoRepo
+from repositories.produto_repo import ProdutoRepo
+from repositories.usuario_repo import UsuarioRepo
+from util.estaticos import PASTA_DIST, construir_estaticos
+from util.images import (
+    PASTA_PRODUTOS,
+    gerar_derivadas_existentes,
+    tem_derivadas,
+)
+from util.importacao import FORMATOS, detectar_formato, ler_registros
+from util.migracoes import aplicar_migracoes, verificar_planos
+from util.templates import compilar_templates
+
+
+def reconstruir_busca(_):
+    ProdutoRepo.criar_tabela()
+    quantidade = ProdutoRepo.reconstruir_indice_busca()
+    if quantidade is None:
+        print("Não foi possível reconstruir o índice de busca.")
+        return 1
+    print(f"Índice de busca reconstruído com {quantidade} produtos.")
+
+
+def verificar_totais(args):
+    inconsistentes = PedidoRepo.obter_totais_inconsistentes()
+    if inconsistentes is None:
+        print("Não foi possível verificar os totais dos pedidos.")
+        return 1
+    for id, valor_total, soma_itens in inconsistentes:
+        print(f"Pedido {id:06d}: total {valor_total:.2f}, soma dos itens {soma_itens:.2f}")
+    if not inconsistentes:
+        print("Todos os pedidos têm o total igual à soma dos itens.")
+        return
+    if not args.corrigir:
+        print(f"{len(inconsistentes)} pedidos com total divergente (use --corrigir).")
+        return 1
+    corrigidos = PedidoRepo.corrigir_totais()
+    if corrigidos is None:
+        print("Não foi possível corrigir os totais dos pedidos.")
+        return 1
+    print(f"{corrigidos} pedidos corrigidos.")
+
+
+def migrar(_):
+    novas = aplicar_migracoes()
+    if novas:
+        print(f"Migrações aplicadas: {', '.join(map(str, novas))}.")
+    else:
+        print("O banco já está na versão mais recente.")
+
+
+def inicializar(_):
+    migrar(None)
+    # só insere (e copia as imagens dos produtos) se as tabelas estiverem vazias
+    ProdutoRepo.inserir_produtos_json("sql/produtos.json")
+    UsuarioRepo.inserir_usuarios_json("sql/usuarios.json")
+    gerar_derivadas(argparse.Namespace(refazer=False))
+    print("Carga inicial concluída.")
+
+
+def importar(args):
+    repositorio = {"produtos": ProdutoRepo, "usuarios": UsuarioRepo}[args.tipo]
+    aplicar_migracoes()
+    inicio = time.perf_counter()
+
+    def progresso(quantidade):
+        print(f"\r{quantidade} registros importados...", end="", file=sys.stderr)
+
+    try:
+        formato = args.formato or detectar_formato(args.arquivo)
+        with open(args.arquivo, "rb") as arquivo:
+            quantidade = repositorio.importar(
+                ler_registros(arquivo, formato), args.tamanho_lote, progresso
+            )
+    except ValueError as ex:
+        print(file=sys.stderr)
+        print(f"Importação cancelada: {ex}")
+        return 1
+    print(file=sys.stderr)
+    if quantidade is None:
+        print("Não foi possível importar o arquivo.")
+        return 1
+    print(f"{quantidade} {args.tipo} importados em {time.perf_counter() - inicio:.1f}s.")
+
+
+def gerar_derivadas(args):
+    ids = sorted(
+        int(nome[:4]) for nome in os.listdir(PASTA_PRODUTOS) if re.fullmatch(r"\d{4}\.jpg", nome)
+    )
+    if not args.refazer:
+        ids = [id for id in ids if not tem_derivadas(id)]
+    if not ids:
+        print("Todas as imagens de produtos já têm derivadas.")
+        return
+    falhas = 0
+    with ProcessPoolExecutor() as executor:
+        for id, futuro in [(id, executor.submit(gerar_derivadas_existentes, id)) for id in ids]:
+            try:
+                futuro.result()
+            except Exception as ex:
+                print(f"Produto {id:04d}: {ex}")
+                falhas += 1
+    print(f"Derivadas geradas para {len(ids) - falhas} imagens.")
+    if falhas:
+        return 1
+
+
+def construir_estaticos_comando(_):
+    manifesto = construir_estaticos()
+    print(f"{len(manifesto)} arquivos estáticos gerados em {PASTA_DIST}.")
+
+
+def compilar_templates_comando(_):
+    inicio = time.perf_counter()
+    quantidade = compilar_templates()
+    print(f"{quantidade} templates compilados em {time.perf_counter() - inicio:.2f}s.")
+
+
+def verificar_indices(_):
+    aplicar_migracoes()
+    falhas = 0
+    for nome, passos, ok in verificar_planos():
+        print(f"[{'ok' if ok else 'FALHA'}] {nome}: {'; '.join(passos)}")
+        falhas += not ok
+    if falhas:
+        print(f"{falhas} consultas percorrem a tabela inteira.")
+        return 1
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Comandos de manutenção da loja.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser(
+        "inicializar",
+        help="aplica as migrações e faz a carga inicial de produtos, usuários e imagens",
+    ).set_defaults(executar=inicializar)
+    comandos.add_parser(
+        "migrar", help="aplica as migrações pendentes do banco"
+    ).set_defaults(executar=migrar)
+    comandos.add_parser(
+        "verificar_indices",
+        help="confere com EXPLAIN QUERY PLAN se as consultas frequentes usam índices",
+    ).set_defaults(executar=verificar_indices)
+    comandos.add_parser(
+        "reconstruir_busca", help="recria o índice de busca textual de produtos"
+    ).set_defaults(executar=reconstruir_busca)
+    comandos.add_parser(
+        "construir_estaticos",
+        help="copia os arquivos de static/ com hash no nome e gera as versões .gz e .br",
+    ).set_defaults(executar=construir_estaticos_comando)
+    comandos.add_parser(
+        "compilar_templates",
+        help="compila os templates e grava o bytecode em TEMPLATES_CACHE_PASTA",
+    ).set_defaults(executar=compilar_templates_comando)
+    derivadas = comandos.add_parser(
+        "gerar_derivadas",
+        help="gera as imagens responsivas (AVIF, WebP e JPEG) dos produtos que ainda não têm",
+    )
+    derivadas.add_argument(
+        "--refazer", action="store_true", help="gera de novo também as que já existem"
+    )
+    derivadas.set_defaults(executar=gerar_derivadas)
+    importacao = comandos.add_parser(
+        "importar", help="importa produtos ou usuários de um arquivo JSON, NDJSON ou CSV"
+    )
+    importacao.add_argument("tipo", choices=["produtos", "usuarios"])
+    importacao.add_argument("arquivo")
+    importacao.add_argument(
+        "--formato", choices=FORMATOS, help="padrão: deduzido da extensão do arquivo"
+    )
+    importacao.add_argument(
+        "--tamanho-lote", type=int, help="registros por executemany (padrão: 5000)"
+    )
+    importacao.set_defaults(executar=importar)
+    verificar = comandos.add_parser(
+        "verificar_totais",
+        help="confere se o total de cada pedido é a soma dos seus itens",
+    )
+    verificar.add_argument(
+        "--corrigir", action="store_true", help="recalcula os totais divergentes"
+    )
+    verificar.set_defaults(executar=verificar_totais)
+    args = parser.parse_args()
+    return args.executar(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,43 +1,79 @@
+import logging
+import os
+
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from repositories.usuario_repo import UsuarioRepo
-from repositories.item_pedido_repo import ItemPedidoRepo
-from repositories.pedido_repo import PedidoRepo
-from repositories.categoria_repo import CategoriaRepo  
-
-from repositories.produto_repo import ProdutoRepo
 from routes import auth_routes, main_routes, cliente_routes, admin_routes
 from util.auth_jwt import (
     checar_autorizacao,
     checar_autenticacao,
     configurar_swagger_auth,
 )
+from util.cache_paginas import cachear_paginas_anonimas
+from util.compressao import CompressaoRespostas
+from util.database import verificar_perfil_banco
+from util.estaticos import PASTA_DIST, EstaticosPreComprimidos
 from util.exceptions import configurar_excecoes
+from util.migracoes import MIGRACOES, aplicar_migracoes, obter_versoes_aplicadas
+from util.templates import compilar_templates
 
-load_dotenv()
-CategoriaRepo.criar_tabela()
-ProdutoRepo.criar_tabela()
-ProdutoRepo.inserir_produtos_json("sql/produtos.json")
-UsuarioRepo.criar_tabela()
-UsuarioRepo.inserir_usuarios_json("sql/usuarios.json")
-PedidoRepo.criar_tabela()
-ItemPedidoRepo.criar_tabela()
-# app = FastAPI(dependencies=[Depends(checar_autorizacao)]) 
-app = FastAPI()
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-app.mount(path="/static", app=StaticFiles(directory="static"), name="static")
-# app.middleware("http")(checar_autenticacao)
-configurar_excecoes(app)
-app.include_router(main_routes.router)
-app.include_router(cliente_routes.router)
-app.include_router(admin_routes.router)
-app.include_router(auth_routes.router)
-configurar_swagger_auth(app)
+logger = logging.getLogger(__name__)
+
+
+def verificar_esquema():
+    # a carga inicial (migrações, produtos, usuários e imagens) é feita uma
+    # vez por "python gerenciar.py inicializar"; o worker só confere a versão
+    pendentes = {versao for versao, _, _ in MIGRACOES} - obter_versoes_aplicadas()
+    if not pendentes:
+        return
+    if os.getenv("BANCO_MIGRAR_AO_INICIAR", "1") in ("0", "false", "False"):
+        logger.warning(
+            "Migrações pendentes: %s. Execute python gerenciar.py inicializar.",
+            sorted(pendentes),
+        )
+        return
+    aplicar_migracoes()
+
+
+def criar_app() -> FastAPI:
+    load_dotenv()
+    verificar_perfil_banco()
+    verificar_esquema()
+    # carrega os templates antes da primeira requisição; com o bytecode já
+    # gravado por "gerenciar.py compilar_templates", leva poucos milissegundos
+    if os.getenv("TEMPLATES_PRECOMPILAR", "0") not in ("0", "false", "False"):
+        compilar_templates()
+    # app = FastAPI(dependencies=[Depends(checar_autorizacao)])
+    app = FastAPI()
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.middleware("http")(cachear_paginas_anonimas)
+    # adicionado depois, envolve o cache de páginas, que guarda o HTML sem
+    # compressão e serve qualquer Accept-Encoding
+    if os.getenv("COMPRESSAO_HABILITADA", "1") not in ("0", "false", "False"):
+        app.add_middleware(CompressaoRespostas)
+    # antes de /static, que também responderia por /static/dist
+    app.mount(
+        path="/static/dist",
+        app=EstaticosPreComprimidos(directory=PASTA_DIST, check_dir=False),
+        name="dist",
+    )
+    app.mount(path="/static", app=StaticFiles(directory="static"), name="static")
+    # app.middleware("http")(checar_autenticacao)
+    configurar_excecoes(app)
+    app.include_router(main_routes.router)
+    app.include_router(cliente_routes.router)
+    app.include_router(admin_routes.router)
+    app.include_router(auth_routes.router)
+    configurar_swagger_auth(app)
+    return app
+
+
+app = criar_app()
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Optional
 
 
@@ -9,4 +10,5 @@ class Produto():
     preco: Optional[float] = None
     descricao: Optional[str] = None
     estoque: Optional[int] = None 
-    categoria_id: Optional[int] = None
\ No newline at end of file
+    categoria_id: Optional[int] = None
+    atualizado_em: Optional[datetime] = None
\ No newline at end of file
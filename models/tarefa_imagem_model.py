@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+
+class EstadoTarefaImagem(Enum):
+    PENDENTE = "pendente"
+    CONCLUIDA = "concluida"
+    ERRO = "erro"
+
+
+@dataclass
+class TarefaImagem:
+    id: Optional[int] = None
+    id_produto: Optional[int] = None
+    estado: Optional[str] = None
+    erro: Optional[str] = None
+    criada_em: Optional[datetime] = None
+    concluida_em: Optional[datetime] = None
@@ -0,0 +1,87 @@
+from datetime import datetime
+import sqlite3
+from typing import Optional
+from models.item_pedido_model import ItemPedido
+from models.pedido_model import EstadoPedido
+from sql.carrinho_sql import *
+from util.database import RepositorioAssincrono, obter_conexao
+
+
+class CarrinhoRepo:
+    """Operações do carrinho, cada uma em uma única transação.
+
+    Cada método localiza (ou cria) o carrinho do cliente e altera o item na
+    mesma conexão, de modo que cliques repetidos não criam carrinhos ou itens
+    duplicados; o valor total do pedido é ajustado pelos gatilhos de
+    item_pedido. Retornam o item como ficou (quantidade 0 quando removido)
+    ou None se não foi encontrado.
+    """
+
+    @classmethod
+    def _obter_id_carrinho(
+        cls, cursor: sqlite3.Cursor, id_cliente: int, criar: bool = False
+    ) -> Optional[int]:
+        # BEGIN IMMEDIATE reserva a escrita já na leitura do carrinho, então
+        # duas requisições simultâneas do mesmo cliente não criam dois carrinhos
+        cursor.execute(SQL_INICIAR_ESCRITA)
+        tupla = cursor.execute(
+            SQL_OBTER_ID_CARRINHO, (id_cliente, EstadoPedido.CARRINHO.value)
+        ).fetchone()
+        if tupla:
+            return tupla[0]
+        if not criar:
+            return None
+        cursor.execute(
+            SQL_CRIAR_CARRINHO,
+            (datetime.now(), EstadoPedido.CARRINHO.value, id_cliente),
+        )
+        return cursor.lastrowid if cursor.rowcount > 0 else None
+
+    @classmethod
+    def _alterar_item(
+        cls, id_cliente: int, id_produto: int, sql: str, parametros: tuple = (),
+        criar: bool = False,
+    ) -> Optional[ItemPedido]:
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                id_pedido = cls._obter_id_carrinho(cursor, id_cliente, criar)
+                if not id_pedido:
+                    return None
+                tupla = cursor.execute(
+                    sql, (*parametros, id_pedido, id_produto)
+                ).fetchone()
+                if not tupla:
+                    return None
+                item = ItemPedido(*tupla)
+                if item.quantidade <= 0:
+                    cursor.execute(SQL_EXCLUIR_ITEM, (id_pedido, id_produto))
+                    item.quantidade = 0
+                    item.valor_item = 0
+                return item
+        except sqlite3.Error as ex:
+            print(ex)
+            return None
+
+    @classmethod
+    def adicionar_produto(cls, id_cliente: int, id_produto: int) -> Optional[ItemPedido]:
+        return cls._alterar_item(id_cliente, id_produto, SQL_ADICIONAR_ITEM, criar=True)
+
+    @classmethod
+    def aumentar_produto(cls, id_cliente: int, id_produto: int) -> Optional[ItemPedido]:
+        return cls._alterar_item(id_cliente, id_produto, SQL_ALTERAR_QUANTIDADE_ITEM, (1,))
+
+    @classmethod
+    def reduzir_produto(cls, id_cliente: int, id_produto: int) -> Optional[ItemPedido]:
+        return cls._alterar_item(id_cliente, id_produto, SQL_ALTERAR_QUANTIDADE_ITEM, (-1,))
+
+    @classmethod
+    def remover_produto(cls, id_cliente: int, id_produto: int) -> Optional[ItemPedido]:
+        item = cls._alterar_item(id_cliente, id_produto, SQL_EXCLUIR_ITEM)
+        if item:
+            item.quantidade = 0
+            item.valor_item = 0
+        return item
+
+
+CarrinhoRepoAsync = RepositorioAssincrono(CarrinhoRepo)
@@ -1,6 +1,7 @@
 from models.categoria_model import Categoria
 from sql.categoria_sql import *
-from util.database import obter_conexao
+from util.cache import em_cache, invalidar_cache
+from util.database import RepositorioAssincrono, obter_conexao
 import sqlite3
 from typing import List, Optional
 
@@ -12,6 +13,12 @@ class CategoriaRepo:
             cursor = conexao.cursor()
             cursor.execute(SQL_CRIAR_TABELA)
 
+    @classmethod
+    def invalidar_caches(cls):
+        """Descarta as leituras de categorias e as páginas do catálogo em cache."""
+        invalidar_cache("categoria")
+        invalidar_cache("paginas")
+
     @classmethod
     def inserir(cls, categoria: Categoria) -> Optional[Categoria]:
         """Insere uma nova categoria no banco de dados."""
@@ -22,16 +29,19 @@ class CategoriaRepo:
                     SQL_INSERIR,
                     (categoria.nome, categoria.descricao)
                 )
-                if cursor.rowcount > 0:
-                    categoria.id = cursor.lastrowid
-                    return categoria
+                if cursor.rowcount == 0:
+                    return None
+                categoria.id = cursor.lastrowid
+            cls.invalidar_caches()
+            return categoria
         except sqlite3.Error as ex:
             print(ex)
             return None
 
     @classmethod
-    def obter_todos(cls) -> List[Categoria]:
-        """Retorna todas as categorias."""
+    @em_cache("categoria")
+    def obter_todos(cls) -> Optional[List[Categoria]]:
+        """Retorna todas as categorias, ou None em caso de erro (não vai para o cache)."""
         try:
             with obter_conexao() as conexao:
                 cursor = conexao.cursor()
@@ -40,7 +50,7 @@ class CategoriaRepo:
                 return categorias
         except sqlite3.Error as ex:
             print(ex)
-            return []
+            return None
 
     @classmethod
     def alterar(cls, categoria: Categoria) -> bool:
@@ -52,7 +62,9 @@ class CategoriaRepo:
                     SQL_ALTERAR,
                     (categoria.nome, categoria.descricao, categoria.id)
                 )
-                return cursor.rowcount > 0
+                alterou = cursor.rowcount > 0
+            cls.invalidar_caches()
+            return alterou
         except sqlite3.Error as ex:
             print(ex)
             return False
@@ -64,12 +76,15 @@ class CategoriaRepo:
             with obter_conexao() as conexao:
                 cursor = conexao.cursor()
                 cursor.execute(SQL_EXCLUIR, (id,))
-                return cursor.rowcount > 0
+                excluiu = cursor.rowcount > 0
+            cls.invalidar_caches()
+            return excluiu
         except sqlite3.Error as ex:
             print(ex)
             return False
 
     @classmethod
+    @em_cache("categoria")
     def obter_um(cls, id: int) -> Optional[Categoria]:
         """Retorna uma única categoria pelo ID."""
         try:
@@ -82,3 +97,6 @@ class CategoriaRepo:
         except sqlite3.Error as ex:
             print(ex)
             return None
+
+
+CategoriaRepoAsync = RepositorioAssincrono(CategoriaRepo)
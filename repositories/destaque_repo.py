@@ -0,0 +1,74 @@
+import os
+import sqlite3
+from typing import List, Optional
+from models.produto_model import Produto
+from sql.destaque_sql import *
+from util.cache import invalidar_cache, obter_cache
+from util.database import RepositorioAssincrono, obter_conexao
+
+
+class DestaqueRepo:
+    @classmethod
+    def criar_tabela(cls):
+        with obter_conexao() as conexao:
+            cursor = conexao.cursor()
+            cursor.execute(SQL_CRIAR_TABELA)
+
+    @classmethod
+    def definir_curados(cls, ids_produtos: List[int]) -> bool:
+        """Substitui a lista curada de destaques, na ordem informada."""
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute(SQL_EXCLUIR_TODOS)
+                cursor.executemany(
+                    SQL_INSERIR,
+                    [(id, posicao) for posicao, id in enumerate(ids_produtos)],
+                )
+            invalidar_cache("destaques")
+            invalidar_cache("paginas")
+            return True
+        except sqlite3.Error as ex:
+            print(ex)
+            return False
+
+    @classmethod
+    def obter_curados(cls) -> List[Produto]:
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                tuplas = cursor.execute(SQL_OBTER_CURADOS, (-1,)).fetchall()
+                return [Produto(*t) for t in tuplas]
+        except sqlite3.Error as ex:
+            print(ex)
+            return []
+
+    @classmethod
+    def calcular_destaques(cls, limite: int) -> Optional[List[Produto]]:
+        """Produtos curados pelo admin, completados pelos mais vendidos.
+
+        Retorna None em caso de erro, para que a falha não fique no cache.
+        """
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                tuplas = cursor.execute(SQL_OBTER_CURADOS, (limite,)).fetchall()
+                if len(tuplas) < limite:
+                    tuplas += cursor.execute(
+                        SQL_OBTER_MAIS_VENDIDOS, (limite - len(tuplas),)
+                    ).fetchall()
+                return [Produto(*t) for t in tuplas]
+        except sqlite3.Error as ex:
+            print(ex)
+            return None
+
+    @classmethod
+    def obter_destaques(cls, limite: Optional[int] = None) -> List[Produto]:
+        """Retorna os destaques da página inicial, recalculados a cada DESTAQUES_TTL segundos."""
+        if limite is None:
+            limite = int(os.getenv("DESTAQUES_LIMITE", "12"))
+        cache = obter_cache("destaques", float(os.getenv("DESTAQUES_TTL", "300")))
+        return cache.obter(limite, lambda: cls.calcular_destaques(limite)) or []
+
+
+DestaqueRepoAsync = RepositorioAssincrono(DestaqueRepo)
@@ -2,7 +2,7 @@ import sqlite3
 from typing import List, Optional
 from models.item_pedido_model import ItemPedido
 from sql.item_pedido_sql import *
-from util.database import obter_conexao
+from util.database import RepositorioAssincrono, obter_conexao
 
 
 class ItemPedidoRepo:
@@ -11,6 +11,9 @@ class ItemPedidoRepo:
         with obter_conexao() as conexao:
             cursor = conexao.cursor()
             cursor.execute(SQL_CRIAR_TABELA)
+            cursor.execute(SQL_CRIAR_GATILHO_INSERIR)
+            cursor.execute(SQL_CRIAR_GATILHO_ALTERAR)
+            cursor.execute(SQL_CRIAR_GATILHO_EXCLUIR)
 
     @classmethod
     def inserir(cls, item_pedido: ItemPedido) -> Optional[ItemPedido]:
@@ -168,3 +171,6 @@ class ItemPedidoRepo:
         except sqlite3.Error as ex:
             print(ex)
             return False
+
+
+ItemPedidoRepoAsync = RepositorioAssincrono(ItemPedidoRepo)
@@ -1,10 +1,9 @@
 from datetime import datetime
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from models.pedido_model import EstadoPedido, Pedido
-from repositories.item_pedido_repo import ItemPedidoRepo
 from sql.pedido_sql import *
-from util.database import obter_conexao
+from util.database import RepositorioAssincrono, obter_conexao
 
 
 class PedidoRepo:
@@ -95,25 +94,43 @@ class PedidoRepo:
     def atualizar_valor_total(
         cls, id: int, valor_total: float = 0
     ) -> bool:
-        if not valor_total:
-            itens = ItemPedidoRepo.obter_por_pedido(id)
-            if itens:
-                valor_total = sum([item.valor_item for item in itens])
+        # os gatilhos de item_pedido já mantêm o total; sem valor informado,
+        # o total é recalculado a partir dos itens no próprio banco
         try:
             with obter_conexao() as conexao:
                 cursor = conexao.cursor()
-                cursor.execute(
-                    SQL_ATUALIZAR_VALOR_TOTAL,
-                    (
-                        valor_total,
-                        id,
-                    ),
-                )
+                if valor_total:
+                    cursor.execute(SQL_ATUALIZAR_VALOR_TOTAL, (valor_total, id))
+                else:
+                    cursor.execute(SQL_RECALCULAR_VALOR_TOTAL, (id,))
                 return cursor.rowcount > 0
         except sqlite3.Error as ex:
             print(ex)
             return False
 
+    @classmethod
+    def obter_totais_inconsistentes(cls) -> Optional[List[Tuple[int, float, float]]]:
+        """Retorna (id, valor_total, soma dos itens) dos pedidos divergentes."""
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                return cursor.execute(SQL_OBTER_TOTAIS_INCONSISTENTES).fetchall()
+        except sqlite3.Error as ex:
+            print(ex)
+            return None
+
+    @classmethod
+    def corrigir_totais(cls) -> Optional[int]:
+        """Recalcula o total dos pedidos divergentes; retorna quantos mudaram."""
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute(SQL_CORRIGIR_TOTAIS)
+                return cursor.rowcount
+        except sqlite3.Error as ex:
+            print(ex)
+            return None
+
     @classmethod
     def excluir(cls, id: int) -> bool:
         try:
@@ -220,4 +237,7 @@ class PedidoRepo:
                 return pedidos
         except sqlite3.Error as ex:
             print(ex)
-            return None
\ No newline at end of file
+            return None
+
+
+PedidoRepoAsync = RepositorioAssincrono(PedidoRepo)
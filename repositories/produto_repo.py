@@ -1,9 +1,13 @@
 import json
 import sqlite3
-from typing import List, Optional
+from typing import Callable, Iterable, List, Optional, Tuple
 from models.produto_model import Produto
+from util.cache import em_cache, invalidar_cache
 from sql.produto_sql import *
-from util.database import obter_conexao
+from util.database import RepositorioAssincrono, obter_conexao
+from util.importacao import em_lotes, ler_registros, obter_tamanho_lote
+from util.paginacao import codificar_cursor, decodificar_cursor
+from util.texto import normalizar_texto
 import shutil
 from pathlib import Path
 
@@ -13,8 +17,79 @@ class ProdutoRepo:
     def criar_tabela(cls):
         """Cria a tabela de produtos no banco de dados."""
         with obter_conexao() as conexao:
-            cursor = conexao.cursor()
-            cursor.execute(SQL_CRIAR_TABELA)
+            cls.criar_esquema(conexao.cursor())
+
+    @classmethod
+    def criar_esquema(cls, cursor: sqlite3.Cursor):
+        """Cria tabela, índices e busca textual usando o cursor de quem chama."""
+        cursor.execute(SQL_CRIAR_TABELA)
+        colunas = [t[1] for t in cursor.execute(SQL_OBTER_COLUNAS).fetchall()]
+        if "atualizado_em" not in colunas:
+            cursor.execute(SQL_ADICIONAR_ATUALIZADO_EM)
+            cursor.execute(SQL_PREENCHER_ATUALIZADO_EM)
+        cursor.execute(SQL_CRIAR_TABELA_BUSCA)
+        cursor.execute(SQL_CONFIGURAR_RANK_BUSCA)
+        cursor.execute(SQL_CRIAR_INDICE_CATEGORIA_NOME)
+        cursor.execute(SQL_CRIAR_INDICE_CATEGORIA_PRECO)
+        cursor.execute(SQL_CRIAR_INDICE_NOME)
+        cursor.execute(SQL_CRIAR_INDICE_PRECO)
+        # bancos criados antes do índice de busca são indexados uma única vez
+        indexados = cursor.execute(SQL_OBTER_QUANTIDADE_INDEXADA).fetchone()[0]
+        if indexados == 0:
+            cls._indexar_todos(cursor)
+
+    @classmethod
+    def reconstruir_indice_busca(cls) -> Optional[int]:
+        """Recria o índice de busca textual a partir da tabela de produtos."""
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute(SQL_LIMPAR_BUSCA)
+                cls._indexar_todos(cursor)
+                quantidade = cursor.execute(SQL_OBTER_QUANTIDADE_INDEXADA).fetchone()[0]
+            cls.invalidar_caches()
+            return quantidade
+        except sqlite3.Error as ex:
+            print(ex)
+            return None
+
+    @classmethod
+    def invalidar_caches(cls):
+        """Descarta as leituras de produtos em cache após uma escrita."""
+        invalidar_cache("produto")
+        invalidar_cache("destaques")
+        invalidar_cache("paginas")
+
+    @classmethod
+    def _indexar(cls, cursor: sqlite3.Cursor, produto: Produto):
+        # o índice guarda o texto normalizado (sem acentos, minúsculo e sem
+        # plurais) e a consulta passa pela mesma normalização
+        cursor.execute(
+            SQL_INDEXAR_BUSCA,
+            (
+                produto.id,
+                normalizar_texto(produto.nome),
+                normalizar_texto(produto.descricao),
+            ),
+        )
+
+    @classmethod
+    def _indexar_todos(cls, cursor: sqlite3.Cursor):
+        tuplas = cursor.execute(SQL_OBTER_TEXTOS_BUSCA).fetchall()
+        cursor.executemany(
+            SQL_INDEXAR_BUSCA,
+            (
+                (id, normalizar_texto(nome), normalizar_texto(descricao))
+                for id, nome, descricao in tuplas
+            ),
+        )
+
+    @classmethod
+    def _montar_consulta_busca(cls, termo: str) -> str:
+        # cada palavra vira um prefixo entre aspas ("fone"*), evitando que
+        # caracteres da sintaxe do FTS5 digitados pelo usuário causem erro
+        palavras = normalizar_texto(termo).split()
+        return " ".join(f'"{palavra}"*' for palavra in palavras)
 
     @classmethod
     def inserir(cls, produto: Produto) -> Optional[Produto]:
@@ -32,9 +107,12 @@ class ProdutoRepo:
                         produto.categoria_id  
                     ),
                 )
-                if cursor.rowcount > 0:
-                    produto.id = cursor.lastrowid
-                    return produto
+                if cursor.rowcount == 0:
+                    return None
+                produto.id = cursor.lastrowid
+                cls._indexar(cursor, produto)
+            cls.invalidar_caches()
+            return produto
         except sqlite3.Error as ex:
             print(ex)
             return None
@@ -56,7 +134,11 @@ class ProdutoRepo:
                         produto.id,
                     ),
                 )
-                return cursor.rowcount > 0
+                if cursor.rowcount == 0:
+                    return False
+                cls._indexar(cursor, produto)
+            cls.invalidar_caches()
+            return True
         except sqlite3.Error as ex:
             print(ex)
             return False
@@ -67,12 +149,17 @@ class ProdutoRepo:
             with obter_conexao() as conexao:
                 cursor = conexao.cursor()
                 cursor.execute(SQL_EXCLUIR, (id,))
-                return cursor.rowcount > 0
+                if cursor.rowcount == 0:
+                    return False
+                cursor.execute(SQL_EXCLUIR_BUSCA, (id,))
+            cls.invalidar_caches()
+            return True
         except sqlite3.Error as ex:
             print(ex)
             return False
 
     @classmethod
+    @em_cache("produto")
     def obter_um(cls, id: int) -> Optional[Produto]:
         try:
             with obter_conexao() as conexao:
@@ -97,26 +184,27 @@ class ProdutoRepo:
             return None
 
     @classmethod
-    def obter_busca(
-        cls, termo: str, pagina: int, tamanho_pagina: int, ordem: int
-    ) -> List[Produto]:
-        termo = "%" + termo + "%"
-        offset = (pagina - 1) * tamanho_pagina
-        match (ordem):
-            case 1:
-                SQL_OBTER_BUSCA_ORDENADA = SQL_OBTER_BUSCA.replace("#1", "nome")
-            case 2:
-                SQL_OBTER_BUSCA_ORDENADA = SQL_OBTER_BUSCA.replace("#1", "preco ASC")
-            case 3:
-                SQL_OBTER_BUSCA_ORDENADA = SQL_OBTER_BUSCA.replace("#1", "preco DESC")
-            case _:
-                SQL_OBTER_BUSCA_ORDENADA = SQL_OBTER_BUSCA.replace("#1", "nome")
+    def _buscar(
+        cls,
+        consulta: str,
+        ordenacao: str,
+        condicoes: list,
+        parametros: list,
+        limite: int,
+        offset: int = 0,
+    ) -> Optional[List[Produto]]:
+        if consulta:
+            sql = SQL_OBTER_BUSCA
+            condicoes = ["produto_busca MATCH ?"] + condicoes
+            parametros = [consulta] + parametros
+        else:
+            sql = SQL_OBTER_PAGINA
+        filtro = "WHERE " + " AND ".join(condicoes) if condicoes else ""
+        sql = sql.replace("#1", ordenacao).replace("#2", filtro)
         try:
             with obter_conexao() as conexao:
                 cursor = conexao.cursor()
-                tuplas = cursor.execute(
-                    SQL_OBTER_BUSCA_ORDENADA, (termo, termo, tamanho_pagina, offset)
-                ).fetchall()
+                tuplas = cursor.execute(sql, parametros + [limite, offset]).fetchall()
                 produtos = [Produto(*t) for t in tuplas]
                 return produtos
         except sqlite3.Error as ex:
@@ -124,14 +212,107 @@ class ProdutoRepo:
             return None
 
     @classmethod
-    def obter_quantidade_busca(cls, termo: str) -> Optional[int]:
-        termo = "%" + termo + "%"
+    @em_cache("produto")
+    def obter_busca(
+        cls,
+        termo: str,
+        pagina: int,
+        tamanho_pagina: int,
+        ordem: int,
+        id_categoria: Optional[int] = None,
+    ) -> List[Produto]:
+        """Retorna uma página de produtos filtrada por termo e/ou categoria."""
+        consulta = cls._montar_consulta_busca(termo)
+        if termo.strip() and not consulta:
+            return []
+        offset = (pagina - 1) * tamanho_pagina
+        if ordem == 4 and consulta:
+            ordenacao = ORDENACAO_RELEVANCIA
+        else:
+            ordenacao = ORDENACOES_BUSCA.get(ordem, ORDENACOES_BUSCA[1])[0]
+        condicoes, parametros = [], []
+        if id_categoria:
+            condicoes.append("p.categoria_id = ?")
+            parametros.append(id_categoria)
+        return cls._buscar(
+            consulta, ordenacao, condicoes, parametros, tamanho_pagina, offset
+        )
+
+    @classmethod
+    def obter_busca_cursor(
+        cls,
+        termo: str,
+        tamanho_pagina: int,
+        ordem: int,
+        id_categoria: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Optional[Tuple[List[Produto], Optional[str]]]:
+        """Retorna a página seguinte ao cursor e o cursor da próxima página.
+
+        Diferente de obter_busca, o custo não cresce com a profundidade da
+        página. Só vale para as ordens por nome e por preço; qualquer outra
+        ordem é tratada como ordem por nome. Lança ValueError se o cursor for
+        inválido ou de outra ordem.
+        """
+        consulta = cls._montar_consulta_busca(termo)
+        if termo.strip() and not consulta:
+            return [], None
+        if ordem not in ORDENACOES_BUSCA:
+            ordem = 1
+        ordenacao, continuacao, campo = ORDENACOES_BUSCA[ordem]
+        condicoes, parametros = [], []
+        if id_categoria:
+            condicoes.append("p.categoria_id = ?")
+            parametros.append(id_categoria)
+        if cursor:
+            valores = decodificar_cursor(cursor)
+            # o valor do campo e o id vão para a comparação de tupla no SQL;
+            # com outro tipo, o SQLite compara por classe e a página sai errada
+            tipo_campo = str if campo == "nome" else (int, float)
+            if (
+                len(valores) != 3
+                or valores[0] != ordem
+                or isinstance(valores[1], bool)
+                or not isinstance(valores[1], tipo_campo)
+                or isinstance(valores[2], bool)
+                or not isinstance(valores[2], int)
+            ):
+                raise ValueError("Cursor de paginação inválido.")
+            condicoes.append(continuacao)
+            parametros += valores[1:]
+        produtos = cls._buscar(
+            consulta, ordenacao, condicoes, parametros, tamanho_pagina + 1
+        )
+        if produtos is None:
+            return None
+        proximo_cursor = None
+        if len(produtos) > tamanho_pagina:
+            produtos = produtos[:tamanho_pagina]
+            ultimo = produtos[-1]
+            proximo_cursor = codificar_cursor(ordem, getattr(ultimo, campo), ultimo.id)
+        return produtos, proximo_cursor
+
+    @classmethod
+    @em_cache("produto")
+    def obter_quantidade_busca(
+        cls, termo: str, id_categoria: Optional[int] = None
+    ) -> Optional[int]:
+        """Retorna a quantidade de produtos da mesma busca de obter_busca."""
+        consulta = cls._montar_consulta_busca(termo)
+        if termo.strip() and not consulta:
+            return 0
+        if consulta and id_categoria:
+            sql, parametros = SQL_OBTER_QUANTIDADE_BUSCA_POR_CATEGORIA, (consulta, id_categoria)
+        elif consulta:
+            sql, parametros = SQL_OBTER_QUANTIDADE_BUSCA, (consulta,)
+        elif id_categoria:
+            sql, parametros = SQL_OBTER_QUANTIDADE_POR_CATEGORIA, (id_categoria,)
+        else:
+            sql, parametros = SQL_OBTER_QUANTIDADE, ()
         try:
             with obter_conexao() as conexao:
                 cursor = conexao.cursor()
-                tupla = cursor.execute(
-                    SQL_OBTER_QUANTIDADE_BUSCA, (termo, termo)
-                ).fetchone()
+                tupla = cursor.execute(sql, parametros).fetchone()
                 return int(tupla[0])
         except sqlite3.Error as ex:
             print(ex)
@@ -144,7 +325,7 @@ class ProdutoRepo:
             with obter_conexao() as conexao:
                 cursor = conexao.cursor()
                 
-                tuplas = cursor.execute("SELECT * FROM produto").fetchall()  
+                tuplas = cursor.execute(SQL_OBTER_TODOS).fetchall()  
                 produtos = [Produto(*t) for t in tuplas]  
                 return produtos
         except sqlite3.Error as ex:
@@ -153,8 +334,9 @@ class ProdutoRepo:
         
         
     @classmethod
-    def obter_por_categoria(cls, categoria_id: int) -> List[Produto]:
-        """Retorna os produtos de uma categoria específica."""
+    @em_cache("produto")
+    def obter_por_categoria(cls, categoria_id: int) -> Optional[List[Produto]]:
+        """Retorna os produtos de uma categoria específica, ou None em caso de erro."""
         try:
             with obter_conexao() as conexao:
                 cursor = conexao.cursor()
@@ -163,19 +345,112 @@ class ProdutoRepo:
                 return produtos
         except sqlite3.Error as ex:
             print(f"Erro ao obter produtos por categoria: {ex}")
-            return []
+            return None
+
 
 
+    @classmethod
+    def obter_lote_exportacao(
+        cls,
+        ultimo_id: int,
+        tamanho_lote: int,
+        id_categoria: Optional[int] = None,
+        atualizado_desde: Optional[str] = None,
+    ) -> Optional[List[Produto]]:
+        """Retorna os produtos com id maior que ultimo_id, em ordem de id.
+
+        Cada lote usa uma conexão própria e busca pelo id (e não por OFFSET),
+        então exportar o catálogo inteiro custa o mesmo em qualquer lote e
+        não prende uma conexão do pool enquanto a resposta é enviada.
+        """
+        condicoes, parametros = "", [ultimo_id]
+        if id_categoria:
+            condicoes += " AND categoria_id = ?"
+            parametros.append(id_categoria)
+        if atualizado_desde:
+            condicoes += " AND atualizado_em >= ?"
+            parametros.append(atualizado_desde)
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                tuplas = cursor.execute(
+                    SQL_EXPORTAR.replace("#1", condicoes), (*parametros, tamanho_lote)
+                ).fetchall()
+                return [Produto(*t) for t in tuplas]
+        except sqlite3.Error as ex:
+            print(ex)
+            return None
 
     @classmethod
     def inserir_produtos_json(cls, arquivo_json: str):
         if ProdutoRepo.obter_quantidade() == 0:
             with open(arquivo_json, "r", encoding="utf-8") as arquivo:
-                produtos = json.load(arquivo)
-                for produto in produtos:
-                    ProdutoRepo.inserir(Produto(**produto))
+                cls.importar(ler_registros(arquivo, "json"))
             cls.transferir_imagens("static/img/produtos/inserir", "static/img/produtos")
 
+    @classmethod
+    def _converter_importacao(cls, numero: int, registro: dict, proximo_id: int) -> tuple:
+        try:
+            return (
+                int(registro["id"]) if registro.get("id") not in (None, "") else proximo_id,
+                str(registro["nome"]),
+                float(registro["preco"]),
+                str(registro.get("descricao") or ""),
+                int(registro.get("estoque") or 0),
+                int(registro["categoria_id"]) if registro.get("categoria_id") not in (None, "") else None,
+            )
+        except (KeyError, TypeError, ValueError) as ex:
+            raise ValueError(f"Produto {numero} inválido: {ex!r}") from ex
+
+    @classmethod
+    def importar(
+        cls,
+        registros: Iterable[dict],
+        tamanho_lote: Optional[int] = None,
+        progresso: Optional[Callable[[int], None]] = None,
+    ) -> Optional[int]:
+        """Insere ou atualiza (pelo id) produtos em lotes, numa única transação.
+
+        Registros sem id recebem o próximo id livre; um id explícito igual a
+        um já atribuído assim no mesmo arquivo é recusado, em vez de
+        sobrescrever o produto anterior. Qualquer registro inválido desfaz a importação inteira e gera ValueError. progresso é
+        chamado com o total processado ao fim de cada lote.
+        """
+        tamanho_lote = tamanho_lote or obter_tamanho_lote()
+        quantidade = 0
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute(SQL_INICIAR_IMPORTACAO)
+                proximo_id = cursor.execute(SQL_OBTER_PROXIMO_ID).fetchone()[0]
+                ids_atribuidos = set()
+                for lote in em_lotes(registros, tamanho_lote):
+                    linhas = []
+                    for registro in lote:
+                        quantidade += 1
+                        linha = cls._converter_importacao(quantidade, registro, proximo_id)
+                        if registro.get("id") in (None, ""):
+                            ids_atribuidos.add(proximo_id)
+                        elif linha[0] in ids_atribuidos:
+                            raise ValueError(
+                                f"Produto {quantidade} inválido: o id {linha[0]} já foi "
+                                "atribuído a um produto sem id neste arquivo."
+                            )
+                        proximo_id = max(proximo_id, linha[0] + 1)
+                        linhas.append(linha)
+                    cursor.executemany(SQL_IMPORTAR, linhas)
+                    cursor.executemany(
+                        SQL_INDEXAR_BUSCA,
+                        ((l[0], normalizar_texto(l[1]), normalizar_texto(l[3])) for l in linhas),
+                    )
+                    if progresso:
+                        progresso(quantidade)
+            cls.invalidar_caches()
+            return quantidade
+        except sqlite3.Error as ex:
+            print(ex)
+            return None
+
     @classmethod
     def transferir_imagens(cls, pasta_origem, pasta_destino):
         path_origem = Path(pasta_origem)
@@ -190,3 +465,6 @@ class ProdutoRepo:
             if arquivo_imagem.is_file():
                 path_arquivo_destino = path_destino / arquivo_imagem.name
                 shutil.copy2(arquivo_imagem, path_arquivo_destino)
+
+
+ProdutoRepoAsync = RepositorioAssincrono(ProdutoRepo)
@@ -0,0 +1,58 @@
+import sqlite3
+from typing import Optional
+from models.tarefa_imagem_model import EstadoTarefaImagem, TarefaImagem
+from sql.tarefa_imagem_sql import *
+from util.database import RepositorioAssincrono, obter_conexao
+
+
+class TarefaImagemRepo:
+    """Situação do processamento das imagens enviadas pelo admin.
+
+    Fica no banco, e não em memória, para que qualquer worker responda
+    sobre uma tarefa iniciada por outro.
+    """
+
+    @classmethod
+    def criar_tabela(cls):
+        with obter_conexao() as conexao:
+            cursor = conexao.cursor()
+            cursor.execute(SQL_CRIAR_TABELA)
+
+    @classmethod
+    def inserir(cls, id_produto: int) -> Optional[TarefaImagem]:
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                tupla = cursor.execute(
+                    SQL_INSERIR, (id_produto, EstadoTarefaImagem.PENDENTE.value)
+                ).fetchone()
+                return TarefaImagem(*tupla)
+        except sqlite3.Error as ex:
+            print(ex)
+            return None
+
+    @classmethod
+    def concluir(cls, id: int, erro: Optional[str] = None) -> bool:
+        estado = EstadoTarefaImagem.ERRO if erro else EstadoTarefaImagem.CONCLUIDA
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                cursor.execute(SQL_CONCLUIR, (estado.value, erro, id))
+                return cursor.rowcount > 0
+        except sqlite3.Error as ex:
+            print(ex)
+            return False
+
+    @classmethod
+    def obter_um(cls, id: int) -> Optional[TarefaImagem]:
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                tupla = cursor.execute(SQL_OBTER_UM, (id,)).fetchone()
+                return TarefaImagem(*tupla) if tupla else None
+        except sqlite3.Error as ex:
+            print(ex)
+            return None
+
+
+TarefaImagemRepoAsync = RepositorioAssincrono(TarefaImagemRepo)
@@ -1,9 +1,17 @@
 import json
+import os
+import re
 import sqlite3
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
 from models.usuario_model import Usuario
 from sql.usuario_sql import *
-from util.database import obter_conexao
+from util.auth_jwt import obter_hash_senha
+from util.database import RepositorioAssincrono, obter_conexao
+from util.importacao import em_lotes, ler_registros, obter_tamanho_lote
+from util.paginacao import codificar_cursor, decodificar_cursor
+
+HASH_BCRYPT = re.compile(r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$")
 
 
 class UsuarioRepo:
@@ -123,9 +131,77 @@ class UsuarioRepo:
     def inserir_usuarios_json(cls, arquivo_json: str):
         if UsuarioRepo.obter_quantidade_por_perfil() == 0:
             with open(arquivo_json, "r", encoding="utf-8") as arquivo:
-                usuarios = json.load(arquivo)
-                for usuario in usuarios:
-                    UsuarioRepo.inserir(Usuario(**usuario))
+                cls.importar(ler_registros(arquivo, "json"))
+
+    @classmethod
+    def _converter_importacao(cls, numero: int, registro: dict) -> tuple:
+        try:
+            return (
+                str(registro["nome"]),
+                str(registro["cpf"]),
+                str(registro["data_nascimento"]),
+                str(registro.get("endereco") or ""),
+                str(registro["telefone"]),
+                str(registro["email"]),
+                int(registro["perfil"]) if registro.get("perfil") not in (None, "") else 1,
+                str(registro["senha"]),
+            )
+        except (KeyError, TypeError, ValueError) as ex:
+            raise ValueError(f"Usuário {numero} inválido: {ex!r}") from ex
+
+    @classmethod
+    def _converter_senha(cls, numero: int, senha: str) -> str:
+        if HASH_BCRYPT.match(senha):
+            return senha
+        # obter_hash_senha devolve "" quando o bcrypt recusa a senha (mais
+        # de 72 bytes, por exemplo); o usuário ficaria sem senha válida
+        hash_senha = obter_hash_senha(senha)
+        if not hash_senha:
+            raise ValueError(f"Usuário {numero} inválido: senha não aceita pelo bcrypt.")
+        return hash_senha
+
+    @classmethod
+    def importar(
+        cls,
+        registros: Iterable[dict],
+        tamanho_lote: Optional[int] = None,
+        progresso: Optional[Callable[[int], None]] = None,
+    ) -> Optional[int]:
+        """Insere usuários em lotes, numa única transação.
+
+        Senhas que ainda não são hash bcrypt são convertidas em paralelo,
+        lote a lote. Qualquer registro inválido desfaz a importação inteira
+        e gera ValueError.
+        """
+        tamanho_lote = tamanho_lote or obter_tamanho_lote()
+        quantidade = 0
+        try:
+            with obter_conexao() as conexao, ThreadPoolExecutor(os.cpu_count()) as executor:
+                cursor = conexao.cursor()
+                cursor.execute(SQL_INICIAR_IMPORTACAO)
+                for lote in em_lotes(registros, tamanho_lote):
+                    linhas = []
+                    for registro in lote:
+                        quantidade += 1
+                        linhas.append(cls._converter_importacao(quantidade, registro))
+                    # o bcrypt libera o GIL, então as threads calculam em paralelo
+                    senhas = list(
+                        executor.map(
+                            cls._converter_senha,
+                            range(quantidade - len(linhas) + 1, quantidade + 1),
+                            (linha[-1] for linha in linhas),
+                        )
+                    )
+                    cursor.executemany(
+                        SQL_INSERIR,
+                        (linha[:-1] + (senha,) for linha, senha in zip(linhas, senhas)),
+                    )
+                    if progresso:
+                        progresso(quantidade)
+            return quantidade
+        except sqlite3.Error as ex:
+            print(ex)
+            return None
 
     @classmethod
     def obter_busca(cls, termo: str, pagina: int, tamanho_pagina: int) -> List[Usuario]:
@@ -143,6 +219,39 @@ class UsuarioRepo:
             print(ex)
             return None
 
+    @classmethod
+    def obter_busca_cursor(
+        cls, termo: str, tamanho_pagina: int, cursor: Optional[str] = None
+    ) -> Optional[Tuple[List[Usuario], Optional[str]]]:
+        termo = "%" + termo + "%"
+        parametros = [termo, termo]
+        continuacao = ""
+        if cursor:
+            valores = decodificar_cursor(cursor)
+            if (
+                len(valores) != 2
+                or not isinstance(valores[0], str)
+                or isinstance(valores[1], bool)
+                or not isinstance(valores[1], int)
+            ):
+                raise ValueError("Cursor de paginação inválido.")
+            continuacao = "AND (nome, id) > (?, ?)"
+            parametros += valores
+        sql = SQL_OBTER_BUSCA_CURSOR.replace("#1", continuacao)
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                tuplas = cursor.execute(sql, parametros + [tamanho_pagina + 1]).fetchall()
+                usuarios = [Usuario(*t) for t in tuplas]
+        except sqlite3.Error as ex:
+            print(ex)
+            return None
+        proximo_cursor = None
+        if len(usuarios) > tamanho_pagina:
+            usuarios = usuarios[:tamanho_pagina]
+            proximo_cursor = codificar_cursor(usuarios[-1].nome, usuarios[-1].id)
+        return usuarios, proximo_cursor
+
     @classmethod
     def obter_quantidade_busca(cls, termo: str) -> Optional[int]:
         termo = "%" + termo + "%"
@@ -208,3 +317,6 @@ class UsuarioRepo:
         except sqlite3.Error as ex:
             print(ex)
             return False
+
+
+UsuarioRepoAsync = RepositorioAssincrono(UsuarioRepo)
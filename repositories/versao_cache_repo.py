@@ -0,0 +1,35 @@
+import sqlite3
+from typing import Dict, Optional
+from sql.versao_cache_sql import *
+from util.database import obter_conexao
+
+
+class VersaoCacheRepo:
+    @classmethod
+    def criar_tabela(cls):
+        with obter_conexao() as conexao:
+            cursor = conexao.cursor()
+            cursor.execute(SQL_CRIAR_TABELA)
+
+    @classmethod
+    def incrementar(cls, nome: str) -> Optional[int]:
+        """Avisa aos outros processos que o cache informado ficou desatualizado."""
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                tupla = cursor.execute(SQL_INCREMENTAR, (nome,)).fetchone()
+                return int(tupla[0])
+        except sqlite3.Error as ex:
+            print(ex)
+            return None
+
+    @classmethod
+    def obter_todas(cls) -> Optional[Dict[str, int]]:
+        try:
+            with obter_conexao() as conexao:
+                cursor = conexao.cursor()
+                tuplas = cursor.execute(SQL_OBTER_TODAS).fetchall()
+                return dict(tuplas)
+        except sqlite3.Error as ex:
+            print(ex)
+            return None
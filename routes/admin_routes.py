@@ -1,26 +1,43 @@
 import asyncio
-from io import BytesIO
+import time
+from dataclasses import fields
+from datetime import datetime, timezone
 from typing import List, Optional
-from fastapi import APIRouter, File, Form, Path, UploadFile
-from fastapi.responses import JSONResponse
-from PIL import Image
+from fastapi import APIRouter, File, Form, Path, Query, Request, UploadFile
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from dtos.alterar_categoria_dto import AlterarCategoriaDto
 from dtos.alterar_pedido_dto import AlterarPedidoDto
 from dtos.alterar_produto_dto import AlterarProdutoDto
+from dtos.definir_destaques_dto import DefinirDestaquesDto
 from dtos.inserir_produto_dto import InserirProdutoDto
 from dtos.problem_details_dto import ProblemDetailsDto
 from dtos.problem_details_dto import ProblemDetailsDto
 from models.categoria_model import Categoria
-from repositories.categoria_repo import CategoriaRepo
+from repositories.categoria_repo import CategoriaRepoAsync
+from repositories.destaque_repo import DestaqueRepoAsync
 from models.pedido_model import EstadoPedido
 from models.produto_model import Produto
 from models.usuario_model import Usuario
-from repositories.item_pedido_repo import ItemPedidoRepo
-from repositories.pedido_repo import PedidoRepo
-from repositories.produto_repo import ProdutoRepo
-from repositories.usuario_repo import UsuarioRepo
-from util.images import transformar_em_quadrada
+from repositories.item_pedido_repo import ItemPedidoRepoAsync
+from repositories.pedido_repo import PedidoRepoAsync
+from repositories.produto_repo import ProdutoRepo, ProdutoRepoAsync
+from repositories.tarefa_imagem_repo import TarefaImagemRepoAsync
+from repositories.usuario_repo import UsuarioRepoAsync
+from util.cache import obter_estatisticas_cache, obter_versoes
+from util.cache_imagens import obter_cache_imagens
+from util.cache_http import aplicar_validadores, gerar_etag, nao_modificado, responder_nao_modificado
+from util.database import executar_no_banco, obter_estatisticas_pool
+from util.exportacao import TIPOS_MIDIA, exportar, iterar_lotes, obter_tamanho_lote
+from util.importacao import FORMATOS, detectar_formato, ler_registros
+from util.senhas import obter_estatisticas_senhas
+from util.images import eh_imagem_valida
+from util.processamento_imagens import (
+    agendar_imagem_produto,
+    obter_estatisticas_imagens,
+    obter_pool_imagens,
+)
 
 SLEEP_TIME = 0.2
 router = APIRouter(prefix="/admin")
@@ -29,10 +46,69 @@ router = APIRouter(prefix="/admin")
 
 
 @router.get("/obter_produtos")
-async def obter_produtos():
+async def obter_produtos(request: Request):
+    # a versão do cache de produtos muda a cada escrita no catálogo
+    etag = gerar_etag(request, "obter_produtos", *await executar_no_banco(obter_versoes, "produto"))
+    if nao_modificado(request, etag):
+        return responder_nao_modificado(etag)
     await asyncio.sleep(SLEEP_TIME)
-    produtos = ProdutoRepo.obter_todos()
-    return produtos
+    produtos = await ProdutoRepoAsync.obter_todos()
+    return aplicar_validadores(JSONResponse(jsonable_encoder(produtos)), etag)
+
+
+@router.get("/obter_produtos_paginados")
+async def obter_produtos_paginados(
+    q: str = Query(""),
+    o: int = Query(1, title="Ordem (1 nome, 2 menor preço, 3 maior preço)"),
+    id_categoria: Optional[int] = Query(None, ge=1),
+    tamanho: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+):
+    try:
+        resultado = await ProdutoRepoAsync.obter_busca_cursor(q, tamanho, o, id_categoria, cursor)
+    except ValueError as ex:
+        pd = ProblemDetailsDto("str", str(ex), "invalid_cursor", ["query", "cursor"])
+        return JSONResponse(pd.to_dict(), status_code=422)
+    produtos, proximo_cursor = resultado or ([], None)
+    return {"itens": produtos, "proximo_cursor": proximo_cursor}
+
+
+@router.get("/exportar_produtos")
+async def exportar_produtos(
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    compactar: bool = Query(False, title="Enviar em gzip"),
+    id_categoria: Optional[int] = Query(None, ge=1),
+    atualizado_desde: Optional[datetime] = Query(None, title="Alterados a partir de (UTC)"),
+    tamanho_lote: Optional[int] = Query(None, ge=1, le=10_000),
+):
+    """Exporta o catálogo em NDJSON ou CSV, em fluxo e em ordem de id.
+
+    Os produtos são lidos e enviados em lotes, então a memória usada não
+    depende do tamanho do catálogo. O arquivo pode ser reimportado por
+    /admin/importar_produtos.
+    """
+    if atualizado_desde:
+        # atualizado_em é gravado por CURRENT_TIMESTAMP, em UTC e sem fuso
+        if atualizado_desde.tzinfo:
+            atualizado_desde = atualizado_desde.astimezone(timezone.utc)
+        atualizado_desde = atualizado_desde.strftime("%Y-%m-%d %H:%M:%S")
+    lotes = iterar_lotes(
+        ProdutoRepoAsync.obter_lote_exportacao,
+        tamanho_lote or obter_tamanho_lote(),
+        id_categoria=id_categoria,
+        atualizado_desde=atualizado_desde,
+    )
+    nome_arquivo = f"produtos-{datetime.now():%Y%m%d-%H%M%S}.{formato}"
+    tipo_midia = TIPOS_MIDIA[formato]
+    if compactar:
+        nome_arquivo += ".gz"
+        tipo_midia = "application/gzip"
+    campos = [campo.name for campo in fields(Produto)]
+    return StreamingResponse(
+        exportar(lotes, formato, campos, compactar),
+        media_type=tipo_midia,
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'},
+    )
 
 
 @router.post("/inserir_produto", status_code=201)
@@ -51,9 +127,9 @@ async def inserir_produto(
         estoque=estoque,
         categoria_id=categoria_id  
     )
-    conteudo_arquivo = await imagem.read()
-    imagem = Image.open(BytesIO(conteudo_arquivo))
-    if not imagem:
+    # só o cabeçalho é lido aqui; decodificar e redimensionar fica para o
+    # pool de processos, sem parar o event loop
+    if imagem and not eh_imagem_valida(imagem.file):
         pd = ProblemDetailsDto(
             "imagem",
             "O arquivo enviado não é uma imagem válida.",
@@ -61,21 +137,87 @@ async def inserir_produto(
             ["body", "imagem"],
         )
         return JSONResponse(pd.to_dict(), status_code=422)
+    if imagem:
+        obter_pool_imagens().verificar_vaga()
     await asyncio.sleep(SLEEP_TIME)
     novo_produto = Produto(
         None, produto_dto.nome, produto_dto.preco, produto_dto.descricao, produto_dto.estoque, categoria_id
     )
-    novo_produto = ProdutoRepo.inserir(novo_produto)
-    if novo_produto:
-        imagem_quadrada = transformar_em_quadrada(imagem)
-        imagem_quadrada.save(f"static/img/produtos/{novo_produto.id:04d}.jpg", "JPEG")
-    return novo_produto
+    novo_produto = await ProdutoRepoAsync.inserir(novo_produto)
+    if not novo_produto or not imagem:
+        return novo_produto
+    tarefa = await agendar_imagem_produto(novo_produto.id, imagem)
+    return {**jsonable_encoder(novo_produto), "id_tarefa_imagem": tarefa.id if tarefa else None}
+
+
+@router.get("/obter_tarefa_imagem/{id_tarefa}")
+async def obter_tarefa_imagem(id_tarefa: int = Path(..., title="Id da Tarefa", ge=1)):
+    """Retorna a situação (pendente, concluida ou erro) do processamento de uma imagem."""
+    tarefa = await TarefaImagemRepoAsync.obter_um(id_tarefa)
+    if tarefa:
+        return tarefa
+    pd = ProblemDetailsDto(
+        "int",
+        f"A tarefa com id <b>{id_tarefa}</b> não foi encontrada.",
+        "value_not_found",
+        ["path", "id_tarefa"],
+    )
+    return JSONResponse(pd.to_dict(), status_code=404)
+
+
+@router.post("/importar_produtos")
+async def importar_produtos(
+    arquivo: UploadFile = File(...),
+    formato: Optional[str] = Form(None, title=f"Um de {', '.join(FORMATOS)}"),
+    tamanho_lote: Optional[int] = Form(None, ge=1, le=100_000),
+):
+    """Importa produtos de um arquivo JSON, NDJSON ou CSV.
+
+    Registros com id existente são atualizados; os demais são inseridos. O
+    arquivo é lido em fluxo e gravado em lotes numa única transação.
+    """
+    inicio = time.perf_counter()
+    try:
+        formato = formato or detectar_formato(arquivo.filename)
+        quantidade = await executar_no_banco(
+            ProdutoRepo.importar, ler_registros(arquivo.file, formato), tamanho_lote
+        )
+    except ValueError as ex:
+        pd = ProblemDetailsDto("file", str(ex), "invalid_file", ["body", "arquivo"])
+        return JSONResponse(pd.to_dict(), status_code=422)
+    if quantidade is None:
+        pd = ProblemDetailsDto(
+            "file",
+            "Não foi possível importar os produtos.",
+            "import_failed",
+            ["body", "arquivo"],
+        )
+        return JSONResponse(pd.to_dict(), status_code=422)
+    return {"quantidade": quantidade, "segundos": round(time.perf_counter() - inicio, 3)}
+
+
+@router.get("/obter_destaques")
+async def obter_destaques():
+    return await DestaqueRepoAsync.obter_curados()
+
+
+@router.post("/definir_destaques", status_code=204)
+async def definir_destaques(inputDto: DefinirDestaquesDto):
+    if await DestaqueRepoAsync.definir_curados(inputDto.ids_produtos):
+        return None
+    pd = ProblemDetailsDto(
+        "list",
+        "Não foi possível definir os produtos em destaque.",
+        "update_failed",
+        ["body", "ids_produtos"],
+    )
+    return JSONResponse(pd.to_dict(), status_code=422)
 
 
 @router.post("/excluir_produto", status_code=204)
 async def excluir_produto(id_produto: int = Form(..., title="Id do Produto", ge=1)):
     await asyncio.sleep(SLEEP_TIME)
-    if ProdutoRepo.excluir(id_produto):
+    if await ProdutoRepoAsync.excluir(id_produto):
         return None
     pd = ProblemDetailsDto(
         "int",
@@ -89,7 +231,7 @@ async def excluir_produto(id_produto: int = Form(..., title="Id do Produto", ge=
 @router.get("/obter_produto/{id_produto}")
 async def obter_produto(id_produto: int = Path(..., title="Id do Produto", ge=1)):
     await asyncio.sleep(SLEEP_TIME)
-    produto = ProdutoRepo.obter_um(id_produto)
+    produto = await ProdutoRepoAsync.obter_um(id_produto)
     if produto:
         return produto
     pd = ProblemDetailsDto(
@@ -107,7 +249,7 @@ async def alterar_produto(inputDto: AlterarProdutoDto):
     produto = Produto(
         inputDto.id, inputDto.nome, inputDto.preco, inputDto.descricao, inputDto.estoque, inputDto.categoria_id
     )
-    if ProdutoRepo.alterar(produto):
+    if await ProdutoRepoAsync.alterar(produto):
         return None
     pd = ProblemDetailsDto(
         "int",
@@ -121,7 +263,7 @@ async def alterar_produto(inputDto: AlterarProdutoDto):
 @router.post("/alterar_pedido", status_code=204)
 async def alterar_pedido(inputDto: AlterarPedidoDto):
     await asyncio.sleep(SLEEP_TIME)
-    if PedidoRepo.alterar_estado(inputDto.id, inputDto.estado.value):
+    if await PedidoRepoAsync.alterar_estado(inputDto.id, inputDto.estado.value):
         return None
     pd = ProblemDetailsDto(
         "int",
@@ -135,7 +277,7 @@ async def alterar_pedido(inputDto: AlterarPedidoDto):
 @router.post("/cancelar_pedido", status_code=204)
 async def cancelar_pedido(id_pedido: int = Form(..., title="Id do Pedido", ge=1)):
     await asyncio.sleep(SLEEP_TIME)
-    if PedidoRepo.alterar_estado(id_pedido, EstadoPedido.CANCELADO.value):
+    if await PedidoRepoAsync.alterar_estado(id_pedido, EstadoPedido.CANCELADO.value):
         return None
     pd = ProblemDetailsDto(
         "int",
@@ -149,7 +291,7 @@ async def cancelar_pedido(id_pedido: int = Form(..., title="Id do Pedido", ge=1)
 @router.post("/evoluir_pedido", status_code=204)
 async def evoluir_pedido(id_pedido: int = Form(..., title="Id do Pedido", ge=1)):
     await asyncio.sleep(SLEEP_TIME)
-    pedido = PedidoRepo.obter_por_id(id_pedido)
+    pedido = await PedidoRepoAsync.obter_por_id(id_pedido)
     if not pedido:
         pd = ProblemDetailsDto(
             "int",
@@ -164,7 +306,7 @@ async def evoluir_pedido(id_pedido: int = Form(..., title="Id do Pedido", ge=1))
     indice += 1
     if indice < len(estados):
         novo_estado = estados[indice]
-        if PedidoRepo.alterar_estado(id_pedido, novo_estado):
+        if await PedidoRepoAsync.alterar_estado(id_pedido, novo_estado):
             return None
     pd = ProblemDetailsDto(
         "int",
@@ -179,10 +321,10 @@ async def evoluir_pedido(id_pedido: int = Form(..., title="Id do Pedido", ge=1))
 async def obter_pedido(id_pedido: int = Path(..., title="Id do Pedido", ge=1)):
     # TODO: refatorar criando Dto com resultado específico
     await asyncio.sleep(SLEEP_TIME)
-    pedido = PedidoRepo.obter_por_id(id_pedido)
+    pedido = await PedidoRepoAsync.obter_por_id(id_pedido)
     if pedido:
-        itens = ItemPedidoRepo.obter_por_pedido(pedido.id)
-        cliente = UsuarioRepo.obter_por_id(pedido.id_cliente)
+        itens = await ItemPedidoRepoAsync.obter_por_pedido(pedido.id)
+        cliente = await UsuarioRepoAsync.obter_por_id(pedido.id_cliente)
         pedido.itens = itens
         pedido.cliente = cliente
         return pedido
@@ -200,21 +342,36 @@ async def obter_pedidos_por_estado(
     estado: EstadoPedido = Path(..., title="Estado do Pedido")
 ):
     await asyncio.sleep(SLEEP_TIME)
-    pedidos = PedidoRepo.obter_todos_por_estado(estado.value)
+    pedidos = await PedidoRepoAsync.obter_todos_por_estado(estado.value)
     return pedidos
 
 
 @router.get("/obter_usuarios")
 async def obter_usuarios() -> List[Usuario]:
     await asyncio.sleep(SLEEP_TIME)
-    usuarios = UsuarioRepo.obter_todos()
+    usuarios = await UsuarioRepoAsync.obter_todos()
     return usuarios
 
 
+@router.get("/obter_usuarios_paginados")
+async def obter_usuarios_paginados(
+    q: str = Query(""),
+    tamanho: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+):
+    try:
+        resultado = await UsuarioRepoAsync.obter_busca_cursor(q, tamanho, cursor)
+    except ValueError as ex:
+        pd = ProblemDetailsDto("str", str(ex), "invalid_cursor", ["query", "cursor"])
+        return JSONResponse(pd.to_dict(), status_code=422)
+    usuarios, proximo_cursor = resultado or ([], None)
+    return {"itens": usuarios, "proximo_cursor": proximo_cursor}
+
+
 @router.post("/excluir_usuario", status_code=204)
 async def excluir_usuario(id_usuario: int = Form(...)):
     await asyncio.sleep(SLEEP_TIME)
-    if UsuarioRepo.excluir(id_usuario):
+    if await UsuarioRepoAsync.excluir(id_usuario):
         return None
     pd = ProblemDetailsDto(
         "int",
@@ -230,7 +387,7 @@ async def excluir_usuario(id_usuario: int = Form(...)):
 async def obter_categorias():
     """Retorna todas as categorias."""
     await asyncio.sleep(SLEEP_TIME)
-    categorias = CategoriaRepo.obter_todos()
+    categorias = await CategoriaRepoAsync.obter_todos() or []
     return categorias
 
 @router.post("/inserir_categoria", status_code=201)
@@ -240,7 +397,7 @@ async def inserir_categoria(
 ):
     """Cria uma nova categoria."""
     categoria = Categoria(nome=nome, descricao=descricao)
-    nova_categoria = CategoriaRepo.inserir(categoria)
+    nova_categoria = await CategoriaRepoAsync.inserir(categoria)
     
     if nova_categoria:
         return nova_categoria
@@ -258,7 +415,7 @@ async def alterar_categoria(inputDto: AlterarCategoriaDto):
     """Atualiza uma categoria existente."""
     await asyncio.sleep(SLEEP_TIME)
     
-    categoria = CategoriaRepo.obter_um(inputDto.id_categoria)
+    categoria = await CategoriaRepoAsync.obter_um(inputDto.id_categoria)
     
     if not categoria:
         pd = ProblemDetailsDto(
@@ -272,7 +429,7 @@ async def alterar_categoria(inputDto: AlterarCategoriaDto):
     categoria.nome = inputDto.nome
     categoria.descricao = inputDto.descricao
     
-    if CategoriaRepo.alterar(categoria):
+    if await CategoriaRepoAsync.alterar(categoria):
         return None
 
     pd = ProblemDetailsDto(
@@ -288,7 +445,7 @@ async def alterar_categoria(inputDto: AlterarCategoriaDto):
 async def excluir_categoria(id_categoria: int = Form(..., title="Id da Categoria", ge=1)):
     """Exclui uma categoria pelo ID."""
     await asyncio.sleep(SLEEP_TIME)
-    if CategoriaRepo.excluir(id_categoria):
+    if await CategoriaRepoAsync.excluir(id_categoria):
         return None
     pd = ProblemDetailsDto(
         "int",
@@ -302,7 +459,7 @@ async def excluir_categoria(id_categoria: int = Form(..., title="Id da Categoria
 async def obter_categoria(id_categoria: int = Path(..., title="Id da Categoria", ge=1)):
     """Retorna uma única categoria pelo ID."""
     await asyncio.sleep(SLEEP_TIME)
-    categoria = CategoriaRepo.obter_um(id_categoria)
+    categoria = await CategoriaRepoAsync.obter_um(id_categoria)
     if categoria:
         return categoria
     pd = ProblemDetailsDto(
@@ -311,4 +468,34 @@ async def obter_categoria(id_categoria: int = Path(..., title="Id da Categoria",
         "value_not_found",
         ["body", "id_categoria"],
     )
-    return JSONResponse(pd.to_dict(), status_code=404)
\ No newline at end of file
+    return JSONResponse(pd.to_dict(), status_code=404)
+
+
+@router.get("/obter_estatisticas_banco")
+async def obter_estatisticas_banco():
+    """Retorna as estatísticas do pool de conexões do processo atual."""
+    return obter_estatisticas_pool()
+
+
+@router.get("/obter_estatisticas_cache")
+async def obter_estatisticas_cache_catalogo():
+    """Retorna acertos, falhas e ocupação dos caches do processo atual."""
+    return obter_estatisticas_cache()
+
+
+@router.get("/obter_estatisticas_senhas")
+async def obter_estatisticas_pool_senhas():
+    """Retorna execuções, rejeições e tempo de fila do pool de bcrypt."""
+    return obter_estatisticas_senhas()
+
+
+@router.get("/obter_estatisticas_imagens")
+async def obter_estatisticas_pool_imagens():
+    """Retorna execuções, erros, rejeições e ocupação do pool de imagens."""
+    return obter_estatisticas_imagens()
+
+
+@router.get("/obter_estatisticas_cache_imagens")
+async def obter_estatisticas_cache_imagens():
+    """Retorna acertos, falhas, gerações coalescidas e ocupação do cache de variantes."""
+    return obter_cache_imagens().obter_estatisticas()
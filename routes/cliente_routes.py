@@ -7,13 +7,12 @@ import os
 from dtos.alterar_usuario_dto import AlterarUsuarioDTO
 from dtos.alterar_senha_dto import AlterarSenhaDTO
 from models.usuario_model import Usuario
-from models.item_pedido_model import ItemPedido
-from models.pedido_model import EstadoPedido, Pedido
-from repositories.usuario_repo import UsuarioRepo
-from repositories.item_pedido_repo import ItemPedidoRepo
-from repositories.pedido_repo import PedidoRepo
-from repositories.produto_repo import ProdutoRepo
-from util.auth_cookie import conferir_senha, obter_hash_senha
+from models.pedido_model import EstadoPedido
+from repositories.carrinho_repo import CarrinhoRepoAsync
+from repositories.usuario_repo import UsuarioRepoAsync
+from repositories.item_pedido_repo import ItemPedidoRepoAsync
+from repositories.pedido_repo import PedidoRepoAsync
+from util.senhas import conferir_senha, obter_hash_senha
 from util.cookies import (
     adicionar_mensagem_alerta,
     adicionar_mensagem_erro,
@@ -37,7 +36,7 @@ async def get_pedidos(request: Request, periodo: str = Query("todos")):
             data_inicial = data_final - timedelta(days=60)
         case "90":
             data_inicial = data_final - timedelta(days=90)
-    pedidos = PedidoRepo.obter_por_periodo(request.state.usuario.id, data_inicial, data_final)
+    pedidos = await PedidoRepoAsync.obter_por_periodo(request.state.usuario.id, data_inicial, data_final)
     return templates.TemplateResponse(
         "pages/pedidos.html",
         {"request": request, "pedidos": pedidos},
@@ -59,7 +58,7 @@ async def post_cadastro(request: Request, alterar_dto: AlterarUsuarioDTO):
     id = request.state.usuario.id
     cliente_data = alterar_dto.model_dump()
     response = JSONResponse({"redirect": {"url": "/cliente/cadastro"}})
-    if UsuarioRepo.alterar(Usuario(id, **cliente_data)):
+    if await UsuarioRepoAsync.alterar(Usuario(id, **cliente_data)):
         adicionar_mensagem_sucesso(response, "Cadastro alterado com sucesso!")
     else:
         adicionar_mensagem_erro(
@@ -79,13 +78,13 @@ async def get_senha(request: Request):
 @router.post("/post_senha", response_class=JSONResponse)
 async def post_senha(request: Request, alterar_dto: AlterarSenhaDTO):
     email = request.state.usuario.email
-    cliente_bd = UsuarioRepo.obter_por_email(email)
-    nova_senha_hash = obter_hash_senha(alterar_dto.nova_senha)
+    cliente_bd = await UsuarioRepoAsync.obter_por_email(email)
     response = JSONResponse({"redirect": {"url": "/cliente/senha"}})
-    if not conferir_senha(alterar_dto.senha, cliente_bd.senha):
+    if not await conferir_senha(alterar_dto.senha, cliente_bd.senha):
         adicionar_mensagem_erro(response, "Senha atual incorreta!")
         return response
-    if UsuarioRepo.alterar_senha(cliente_bd.id, nova_senha_hash):
+    nova_senha_hash = await obter_hash_senha(alterar_dto.nova_senha)
+    if await UsuarioRepoAsync.alterar_senha(cliente_bd.id, nova_senha_hash):
         adicionar_mensagem_sucesso(response, "Senha alterada com sucesso!")
     else:
         adicionar_mensagem_erro(response, "Não foi possível alterar sua senha!")
@@ -95,7 +94,7 @@ async def post_senha(request: Request, alterar_dto: AlterarSenhaDTO):
 @router.get("/sair", response_class=RedirectResponse)
 async def get_sair(request: Request):
     if request.state.usuario:
-        UsuarioRepo.alterar_token(request.state.usuario.email, "")
+        await UsuarioRepoAsync.alterar_token(request.state.usuario.email, "")
     response = RedirectResponse("/", status.HTTP_303_SEE_OTHER)
     excluir_cookie_auth(response)
     adicionar_mensagem_sucesso(response, "Saída realizada com sucesso!")
@@ -104,12 +103,12 @@ async def get_sair(request: Request):
 
 @router.get("/carrinho")
 async def get_carrinho(request: Request):
-    pedidos = PedidoRepo.obter_por_estado(
+    pedidos = await PedidoRepoAsync.obter_por_estado(
         request.state.usuario.id, EstadoPedido.CARRINHO.value
     )
     pedido_carrinho = pedidos[0] if pedidos else None
     if pedido_carrinho:
-        itens_pedido = ItemPedidoRepo.obter_por_pedido(pedido_carrinho.id)
+        itens_pedido = await ItemPedidoRepoAsync.obter_por_pedido(pedido_carrinho.id)
     if not pedido_carrinho or not itens_pedido:
         response = RedirectResponse("/", status.HTTP_303_SEE_OTHER)
         adicionar_mensagem_alerta(
@@ -117,35 +116,33 @@ async def get_carrinho(request: Request):
             "Seu carrinho está vazio. Adicione produtos para continuar."
         )
         return response
-    total_pedido = sum([item.valor_item for item in itens_pedido])
     return templates.TemplateResponse(
         "pages/carrinho.html",
-        {"request": request, "itens": itens_pedido, "valor_total": total_pedido},
+        {"request": request, "itens": itens_pedido, "valor_total": pedido_carrinho.valor_total},
     )
 
 
 @router.get("/confirmacaopedido")
 async def get_confirmacaopedido(request: Request):
-    pedidos = PedidoRepo.obter_por_estado(
+    pedidos = await PedidoRepoAsync.obter_por_estado(
         request.state.usuario.id, EstadoPedido.CARRINHO.value
     )
     pedido_carrinho = pedidos[0] if pedidos else None
     if not pedido_carrinho:
         return RedirectResponse("/cliente/carrinho", status.HTTP_303_SEE_OTHER)
-    itens_pedido = ItemPedidoRepo.obter_por_pedido(pedido_carrinho.id)
+    itens_pedido = await ItemPedidoRepoAsync.obter_por_pedido(pedido_carrinho.id)
     if not itens_pedido:
         return RedirectResponse("/cliente/carrinho", status.HTTP_303_SEE_OTHER)
-    valor_total = sum([item.valor_produto * item.quantidade for item in itens_pedido])
-    usuario = UsuarioRepo.obter_por_id(request.state.usuario.id)
-    PedidoRepo.atualizar_para_fechar(
-        pedido_carrinho.id, usuario.endereco, valor_total
+    usuario = await UsuarioRepoAsync.obter_por_id(request.state.usuario.id)
+    await PedidoRepoAsync.atualizar_para_fechar(
+        pedido_carrinho.id, usuario.endereco, pedido_carrinho.valor_total
     )
     return RedirectResponse(f"/cliente/detalhespedido/{pedido_carrinho.id}")
 
 
 @router.get("/pagamentopedido/{id_pedido:int}", response_class=HTMLResponse)
 async def get_pagamento(request: Request, id_pedido: int = Path(...)):
-    pedido = PedidoRepo.obter_por_id(id_pedido)
+    pedido = await PedidoRepoAsync.obter_por_id(id_pedido)
     # se o pedido não existe, ou não pertence ao cliente logado
     if not pedido or (pedido and (pedido.id_cliente != request.state.usuario.id)):
         response = RedirectResponse(
@@ -165,12 +162,10 @@ async def get_pagamento(request: Request, id_pedido: int = Path(...)):
         )
         return response
     # muda o estado do pedido para PENDENTE
-    PedidoRepo.alterar_estado(id_pedido, EstadoPedido.PENDENTE.value)
+    await PedidoRepoAsync.alterar_estado(id_pedido, EstadoPedido.PENDENTE.value)
     # captura os itens do pedido
-    itens = ItemPedidoRepo.obter_por_pedido(pedido.id)
-    total_pedido = sum([item.valor_item for item in itens])
+    itens = await ItemPedidoRepoAsync.obter_por_pedido(pedido.id)
     pedido.itens = itens
-    PedidoRepo.atualizar_para_fechar(pedido.id, pedido.endereco_entrega, total_pedido)
     # access_token = os.getenv("ACCESS_TOKEN_MP_PROD")
     access_token = os.getenv("ACCESS_TOKEN_MP_TEST")
     print(f"\n\n\nTOKEN: {access_token}\n\n\n")
@@ -182,7 +177,7 @@ async def get_pagamento(request: Request, id_pedido: int = Path(...)):
                 "title": f"Pedido {'{:06d}'.format(pedido.id)}",
                 "quantity": 1,
                 "currency_id": "BRL",
-                "unit_price": total_pedido,
+                "unit_price": pedido.valor_total,
             }
         ],
         # "payer": {
@@ -216,8 +211,8 @@ async def get_mp_sucesso(
     request: Request,
     id_pedido: int = Path(...),
 ):
-    pedido = PedidoRepo.obter_por_id(id_pedido)
-    PedidoRepo.alterar_estado(id_pedido, EstadoPedido.PAGO.value)
+    pedido = await PedidoRepoAsync.obter_por_id(id_pedido)
+    await PedidoRepoAsync.alterar_estado(id_pedido, EstadoPedido.PAGO.value)
     return RedirectResponse(f"/cliente/pedidoconfirmado/{id_pedido}")
 
 
@@ -239,40 +234,22 @@ async def get_mp_pendente(
     request: Request,
     id_pedido: int = Path(...),
 ):
-    pedido = PedidoRepo.obter_por_id(id_pedido)
-    PedidoRepo.alterar_estado(id_pedido, EstadoPedido.PAGO.value)
+    pedido = await PedidoRepoAsync.obter_por_id(id_pedido)
+    await PedidoRepoAsync.alterar_estado(id_pedido, EstadoPedido.PAGO.value)
     return RedirectResponse(f"/cliente/detalhespedido/{id_pedido}")
 
 
 @router.post("/post_adicionar_carrinho", response_class=RedirectResponse)
 async def post_adicionar_carrinho(request: Request, id_produto: int = Form(...)):
-    produto = ProdutoRepo.obter_um(id_produto)
-    mensagem = f"O produto <b>{produto.nome}</b> foi adicionado ao carrinho."
-    pedidos = PedidoRepo.obter_por_estado(
-        request.state.usuario.id, EstadoPedido.CARRINHO.value
-    )
-    pedido_carrinho = pedidos[0] if pedidos else None
-    usuario = UsuarioRepo.obter_por_id(request.state.usuario.id)
-    if pedido_carrinho == None:
-        pedido_carrinho = Pedido(
-            0,  # id
-            datetime.now(),
-            0,  # valor_total
-            usuario.endereco,
-            EstadoPedido.CARRINHO.value,
-            request.state.usuario.id,
-        )
-        pedido_carrinho = PedidoRepo.inserir(pedido_carrinho)
-    qtde = ItemPedidoRepo.obter_quantidade_por_produto(pedido_carrinho.id, id_produto)
-    if qtde == 0:
-        item_pedido = ItemPedido(
-            pedido_carrinho.id, id_produto, produto.nome, produto.preco, 1, 0
-        )
-        ItemPedidoRepo.inserir(item_pedido)
+    item = await CarrinhoRepoAsync.adicionar_produto(request.state.usuario.id, id_produto)
+    if not item:
+        response = RedirectResponse("/", status.HTTP_303_SEE_OTHER)
+        adicionar_mensagem_erro(response, "Não foi possível adicionar o produto ao carrinho.")
+        return response
+    if item.quantidade == 1:
+        mensagem = f"O produto <b>{item.nome_produto}</b> foi adicionado ao carrinho."
     else:
-        ItemPedidoRepo.aumentar_quantidade_produto(pedido_carrinho.id, id_produto)
-        mensagem = f"O produto <b>{produto.nome}</b> já estava no carrinho e teve sua quantidade aumentada."
-    PedidoRepo.atualizar_valor_total(pedido_carrinho.id)
+        mensagem = f"O produto <b>{item.nome_produto}</b> já estava no carrinho e teve sua quantidade aumentada."
     response = RedirectResponse("/cliente/carrinho", status.HTTP_303_SEE_OTHER)
     adicionar_mensagem_sucesso(response, mensagem)
     return response
@@ -280,97 +257,53 @@ async def post_adicionar_carrinho(request: Request, id_produto: int = Form(...))
 
 @router.post("/post_aumentar_item", response_class=RedirectResponse)
 async def post_aumentar_item(request: Request, id_produto: int = Form(0)):
-    produto = ProdutoRepo.obter_um(id_produto)
-    pedidos = PedidoRepo.obter_por_estado(
-        request.state.usuario.id, EstadoPedido.CARRINHO.value
-    )
-    pedido_carrinho = pedidos[0] if pedidos else None
-    if pedido_carrinho == None:
-        response = RedirectResponse(
-            f"/produto?id={id_produto}", status.HTTP_303_SEE_OTHER
-        )
-        adicionar_mensagem_alerta(
-            f"Seu carrinho não foi encontrado. Adicione este produto ao carrinho novamente."
-        )
-        return response
-    qtde = ItemPedidoRepo.obter_quantidade_por_produto(pedido_carrinho.id, id_produto)
-    if qtde == 0:
-        response = RedirectResponse(
-            f"/produto?id={id_produto}", status.HTTP_303_SEE_OTHER
-        )
+    item = await CarrinhoRepoAsync.aumentar_produto(request.state.usuario.id, id_produto)
+    if not item:
+        response = RedirectResponse(f"/produto/{id_produto}", status.HTTP_303_SEE_OTHER)
         adicionar_mensagem_alerta(
-            f"Este produto não foi encontrado em seu carrinho. Adicione-o novamente."
+            response,
+            "Este produto não foi encontrado em seu carrinho. Adicione-o novamente.",
         )
         return response
-    ItemPedidoRepo.aumentar_quantidade_produto(pedido_carrinho.id, id_produto)
     response = RedirectResponse("/cliente/carrinho", status.HTTP_303_SEE_OTHER)
     adicionar_mensagem_sucesso(
         response,
-        f"O produto <b>{produto.nome}</b> teve sua quantidade aumentada para <b>{qtde+1}</b>.",
+        f"O produto <b>{item.nome_produto}</b> teve sua quantidade aumentada para <b>{item.quantidade}</b>.",
     )
-    PedidoRepo.atualizar_valor_total(pedido_carrinho.id)
     return response
 
 
 @router.post("/post_reduzir_item", response_class=RedirectResponse)
 async def post_reduzir_item(request: Request, id_produto: int = Form(0)):
-    produto = ProdutoRepo.obter_um(id_produto)
-    pedidos = PedidoRepo.obter_por_estado(
-        request.state.usuario.id, EstadoPedido.CARRINHO.value
-    )
-    pedido_carrinho = pedidos[0] if pedidos else None
+    item = await CarrinhoRepoAsync.reduzir_produto(request.state.usuario.id, id_produto)
     response = RedirectResponse("/cliente/carrinho", status.HTTP_303_SEE_OTHER)
-    if pedido_carrinho == None:
-        adicionar_mensagem_alerta(f"Seu carrinho não foi encontrado.")
-        return response
-    qtde = ItemPedidoRepo.obter_quantidade_por_produto(pedido_carrinho.id, id_produto)
-    if qtde == 0:
+    if not item:
         adicionar_mensagem_alerta(
-            f"O produto {id_produto} não foi encontrado em seu carrinho."
+            response, f"O produto {id_produto} não foi encontrado em seu carrinho."
         )
         return response
-    if qtde == 1:
-        ItemPedidoRepo.excluir(pedido_carrinho.id, id_produto)
+    if item.quantidade == 0:
         adicionar_mensagem_sucesso(
-            response, f"O produto <b>{produto.nome}</b> foi excluído do carrinho."
+            response, f"O produto <b>{item.nome_produto}</b> foi excluído do carrinho."
         )
         return response
-    ItemPedidoRepo.diminuir_quantidade_produto(pedido_carrinho.id, id_produto)
     adicionar_mensagem_sucesso(
         response,
-        f"O produto <b>{produto.nome}</b> teve sua quantidade diminuída para <b>{qtde-1}</b>.",
+        f"O produto <b>{item.nome_produto}</b> teve sua quantidade diminuída para <b>{item.quantidade}</b>.",
     )
-    PedidoRepo.atualizar_valor_total(pedido_carrinho.id)
     return response
 
 
 @router.post("/post_remover_item", response_class=RedirectResponse)
 async def post_remover_item(request: Request, id_produto: int = Form(0)):
-    if not id_produto:
-        return RedirectResponse("/cliente/carrinho", status.HTTP_304_NOT_MODIFIED)
-    produto = ProdutoRepo.obter_um(id_produto)
-    if not produto:
-        response = RedirectResponse("/cliente/carrinho", status.HTTP_304_NOT_MODIFIED)
-        adicionar_mensagem_alerta(response, "Produto não encontrado.")
-        return response
-    pedidos = PedidoRepo.obter_por_estado(
-        request.state.usuario.id, EstadoPedido.CARRINHO.value
-    )
-    pedido_carrinho = pedidos[0] if pedidos else None
+    item = await CarrinhoRepoAsync.remover_produto(request.state.usuario.id, id_produto)
     response = RedirectResponse("/cliente/carrinho", status.HTTP_303_SEE_OTHER)
-    if pedido_carrinho == None:
-        adicionar_mensagem_alerta(f"Seu carrinho não foi encontrado.")
-        return response
-    qtde = ItemPedidoRepo.obter_quantidade_por_produto(pedido_carrinho.id, id_produto)
-    if qtde == 0:
+    if not item:
         adicionar_mensagem_alerta(
-            f"O produto {id_produto} não foi encontrado em seu carrinho."
+            response, f"O produto {id_produto} não foi encontrado em seu carrinho."
         )
         return response
-    ItemPedidoRepo.excluir(pedido_carrinho.id, id_produto)
-    response = RedirectResponse("/cliente/carrinho", status.HTTP_303_SEE_OTHER)
     adicionar_mensagem_sucesso(response, "Item excluído com sucesso.")
-    PedidoRepo.atualizar_valor_total(pedido_carrinho.id)
     return response
 
 
@@ -379,10 +312,10 @@ async def get_pedidoconfirmado(
     request: Request,
     id_pedido: int = Path(...),
 ):
-    pedido = PedidoRepo.obter_por_id(id_pedido)
+    pedido = await PedidoRepoAsync.obter_por_id(id_pedido)
     if pedido.id_cliente != request.state.usuario.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    PedidoRepo.alterar_estado(id_pedido, EstadoPedido.PAGO.value)
+    await PedidoRepoAsync.alterar_estado(id_pedido, EstadoPedido.PAGO.value)
     return templates.TemplateResponse(
         "pages/pedidoconfirmado.html",
         {"request": request, "pedido": pedido},
@@ -394,14 +327,14 @@ async def get_detalhespedido(
     request: Request,
     id_pedido: int = Path(...),
 ):
-    pedido = PedidoRepo.obter_por_id(id_pedido)
+    pedido = await PedidoRepoAsync.obter_por_id(id_pedido)
     if pedido.id_cliente != request.state.usuario.id:
         response = RedirectResponse(url="/pedidos", status_code=status.HTTP_302_FOUND)
         return adicionar_mensagem_erro(
             response,
             "Pedido não encontrado. Verifique o número do pedido e tente novamente.",
         )
-    itens = ItemPedidoRepo.obter_por_pedido(pedido.id)
+    itens = await ItemPedidoRepoAsync.obter_por_pedido(pedido.id)
     pedido.itens = itens
     return templates.TemplateResponse(
         "pages/detalhespedido.html",
@@ -411,14 +344,14 @@ async def get_detalhespedido(
 
 @router.post("/post_cancelar_pedido", response_class=RedirectResponse)
 async def post_cancelar_pedido(request: Request, id_pedido: int = Form(0)):
-    pedido = PedidoRepo.obter_por_id(id_pedido)
+    pedido = await PedidoRepoAsync.obter_por_id(id_pedido)
     if not pedido or pedido.id_cliente != request.state.usuario.id:
         response = RedirectResponse(url="/cliente/pedidos", status_code=status.HTTP_302_FOUND)
         return adicionar_mensagem_erro(
             response,
             "Pedido não encontrado. Verifique o número do pedido e tente novamente.",
         )
-    PedidoRepo.alterar_estado(id_pedido, EstadoPedido.CANCELADO.value)
+    await PedidoRepoAsync.alterar_estado(id_pedido, EstadoPedido.CANCELADO.value)
     response = RedirectResponse(url="/cliente/pedidos", status_code=status.HTTP_303_SEE_OTHER)
     adicionar_mensagem_sucesso(response, "Pedido cancelado com sucesso.")
     return response
\ No newline at end of file
@@ -1,25 +1,36 @@
 import math
-from typing import Optional
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime
 from fastapi import APIRouter, HTTPException, Query, Request, status
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response
 
 from dtos.entrar_dto import EntrarDto
 from util.html import ler_html
 from dtos.inserir_usuario_dto import InserirUsuarioDTO
 from models.usuario_model import Usuario
 from models.categoria_model import Categoria
-from repositories.usuario_repo import UsuarioRepo
-from repositories.produto_repo import ProdutoRepo
-from repositories.categoria_repo import CategoriaRepo  
-
-from util.auth_jwt import (
-    conferir_senha,
-    criar_token,
-    obter_hash_senha,
+from repositories.usuario_repo import UsuarioRepoAsync
+from repositories.produto_repo import ProdutoRepoAsync
+from repositories.categoria_repo import CategoriaRepoAsync  
+from repositories.destaque_repo import DestaqueRepoAsync
+
+from util.auth_jwt import criar_token
+
+from util.cache import obter_versoes
+from util.cache_imagens import TAMANHOS_SOB_DEMANDA, obter_cache_imagens
+from util.database import executar_no_banco
+from util.cache_http import (
+    aplicar_validadores,
+    converter_data_banco,
+    gerar_etag,
+    nao_modificado,
+    responder_nao_modificado,
 )
-
 from util.cookies import TEMPO_COOKIE_AUTH, adicionar_cookie_auth, adicionar_mensagem_sucesso
 from util.pydantic import create_validation_errors
+from util.senhas import conferir_senha, obter_hash_senha
+from util.images import FORMATOS_DERIVADAS, versao_imagem_produto
 from util.templates import obter_jinja_templates
 
 
@@ -30,7 +41,7 @@ templates = obter_jinja_templates("templates/main")
 @router.get("/categorias")
 async def obter_categorias(request: Request):
     """Lista todas as categorias."""
-    categorias = CategoriaRepo.obter_todos()
+    categorias = await CategoriaRepoAsync.obter_todos() or []
     return templates.TemplateResponse(
         "pages/categorias.html", 
         {"request": request, "categorias": categorias}
@@ -40,7 +51,7 @@ async def obter_categorias(request: Request):
 @router.get("/categoria/{id_categoria:int}")
 async def obter_categoria(request: Request, id_categoria: int):
     """Retorna os detalhes de uma categoria específica."""
-    categoria = CategoriaRepo.obter_um(id_categoria)
+    categoria = await CategoriaRepoAsync.obter_um(id_categoria)
     if not categoria:
         raise HTTPException(status_code=404, detail="Categoria não encontrada.")
     return templates.TemplateResponse(
@@ -55,7 +66,7 @@ async def post_inserir_categoria(
     descricao: str = Query(...),
 ):
     """Cria uma nova categoria."""
-    nova_categoria = CategoriaRepo.inserir(Categoria(nome=nome, descricao=descricao))
+    nova_categoria = await CategoriaRepoAsync.inserir(Categoria(nome=nome, descricao=descricao))
     if not nova_categoria:
         raise HTTPException(status_code=400, detail="Erro ao criar categoria.")
     return {"redirect": {"url": "/categorias"}}
@@ -68,12 +79,12 @@ async def post_alterar_categoria(
     descricao: str = Query(...),
 ):
     """Altera uma categoria existente."""
-    categoria = CategoriaRepo.obter_um(id_categoria)
+    categoria = await CategoriaRepoAsync.obter_um(id_categoria)
     if not categoria:
         raise HTTPException(status_code=404, detail="Categoria não encontrada.")
     categoria.nome = nome
     categoria.descricao = descricao
-    if not CategoriaRepo.alterar(categoria):
+    if not await CategoriaRepoAsync.alterar(categoria):
         raise HTTPException(status_code=400, detail="Erro ao alterar categoria.")
     return {"redirect": {"url": f"/categoria/{id_categoria}"}}
 
@@ -81,13 +92,54 @@ async def post_alterar_categoria(
 @router.post("/post_excluir_categoria", response_class=JSONResponse)
 async def post_excluir_categoria(id_categoria: int = Query(...)):
     """Exclui uma categoria pelo ID."""
-    categoria = CategoriaRepo.obter_um(id_categoria)
+    categoria = await CategoriaRepoAsync.obter_um(id_categoria)
     if not categoria:
         raise HTTPException(status_code=404, detail="Categoria não encontrada.")
-    if not CategoriaRepo.excluir(id_categoria):
+    if not await CategoriaRepoAsync.excluir(id_categoria):
         raise HTTPException(status_code=400, detail="Erro ao excluir categoria.")
     return {"redirect": {"url": "/categorias"}}
 
+@router.get("/img/produto/{id_produto:int}/{tamanho:int}.{formato}")
+async def get_imagem_produto(request: Request, id_produto: int, tamanho: int, formato: str):
+    """Imagem do produto no tamanho e formato pedidos, gerada na primeira vez."""
+    # 404 sem corpo: a página de erro em HTML não serve para um <img>
+    if tamanho not in TAMANHOS_SOB_DEMANDA or formato not in FORMATOS_DERIVADAS:
+        return Response(status_code=404)
+    cache = obter_cache_imagens()
+    estado = None
+    # a variante pode ser despejada por outro pedido (ou worker) entre a
+    # geração e o stat; nesse caso, é gerada de novo uma vez
+    for _ in range(2):
+        caminho = await cache.obter(id_produto, tamanho, formato)
+        if not caminho:
+            break
+        try:
+            estado = os.stat(caminho)
+            break
+        except FileNotFoundError:
+            pass
+    if not estado:
+        return Response(status_code=404)
+    modificada_em = datetime.fromtimestamp(estado.st_mtime, timezone.utc)
+    # só a URL com a versão atual da imagem principal pode ficar em cache
+    # por muito tempo; sem ela, o navegador revalida pelo ETag
+    versao = request.query_params.get("v")
+    headers = {
+        "Cache-Control": (
+            "public, max-age=2592000"
+            if versao and versao == versao_imagem_produto(id_produto)
+            else "no-cache"
+        ),
+        "ETag": f'"{estado.st_mtime_ns:x}-{estado.st_size:x}"',
+        "Last-Modified": format_datetime(modificada_em, usegmt=True),
+    }
+    if nao_modificado(request, headers["ETag"], modificada_em):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(
+        caminho, media_type=FORMATOS_DERIVADAS[formato][2], headers=headers, stat_result=estado
+    )
+
+
 @router.get("/html/{arquivo}")
 async def get_html(arquivo: str):
     response = HTMLResponse(ler_html(arquivo))
@@ -96,7 +148,7 @@ async def get_html(arquivo: str):
 
 @router.get("/")
 async def get_root(request: Request):
-    produtos = ProdutoRepo.obter_todos()
+    produtos = await DestaqueRepoAsync.obter_destaques()
     return templates.TemplateResponse(
         "pages/index.html",
         {
@@ -125,8 +177,8 @@ async def get_cadastro(request: Request):
 @router.post("/post_cadastro", response_class=JSONResponse)
 async def post_cadastro(cliente_dto: InserirUsuarioDTO):
     cliente_data = cliente_dto.model_dump(exclude={"confirmacao_senha"})
-    cliente_data["senha"] = obter_hash_senha(cliente_data["senha"])
-    novo_cliente = UsuarioRepo.inserir(Usuario(**cliente_data))
+    cliente_data["senha"] = await obter_hash_senha(cliente_data["senha"])
+    novo_cliente = await UsuarioRepoAsync.inserir(Usuario(**cliente_data))
     if not novo_cliente or not novo_cliente.id:
         raise HTTPException(status_code=400, detail="Erro ao cadastrar cliente.")
     return {"redirect": {"url": "/cadastro_realizado"}}
@@ -156,11 +208,11 @@ async def get_entrar(
 
 @router.post("/post_entrar", response_class=JSONResponse)
 async def post_entrar(entrar_dto: EntrarDto):
-    cliente_entrou = UsuarioRepo.obter_por_email(entrar_dto.email)
+    cliente_entrou = await UsuarioRepoAsync.obter_por_email(entrar_dto.email)
     if (
         (not cliente_entrou)
         or (not cliente_entrou.senha)
-        or (not conferir_senha(entrar_dto.senha, cliente_entrou.senha))
+        or (not await conferir_senha(entrar_dto.senha, cliente_entrou.senha))
     ):
         return JSONResponse(
             content=create_validation_errors(
@@ -187,14 +239,19 @@ async def post_entrar(entrar_dto: EntrarDto):
 
 @router.get("/produto/{id:int}")
 async def get_produto(request: Request, id: int):
-    produto = ProdutoRepo.obter_um(id)
-    return templates.TemplateResponse(
+    produto = await ProdutoRepoAsync.obter_um(id)
+    ultima_modificacao = converter_data_banco(produto.atualizado_em) if produto else None
+    etag = gerar_etag(request, "produto", repr(produto))
+    if nao_modificado(request, etag, ultima_modificacao):
+        return responder_nao_modificado(etag, ultima_modificacao)
+    response = templates.TemplateResponse(
         "pages/produto.html",
         {
             "request": request,
             "produto": produto,
         },
     )
+    return aplicar_validadores(response, etag, ultima_modificacao)
 
 
 @router.get("/buscar")
@@ -203,32 +260,31 @@ async def get_buscar(
     q: str = Query(''),  # termo de busca
     p: int = 1,          # página atual
     tp: int = 6,         # tamanho da página (produtos por página)
-    o: int = 1,          # ordem (nome, menor preço, maior preço)
-    id_categoria: Optional[int] = None,  # id da categoria selecionada
+    o: int = 1,          # ordem (nome, menor preço, maior preço, relevância)
+    id_categoria: str = Query(''),  # id da categoria selecionada (vazio = todas)
 ):
-    # Se houver id_categoria, busca os produtos dessa categoria
-    if id_categoria:
-        produtos = ProdutoRepo.obter_por_categoria(id_categoria)
-    else:
-        produtos = ProdutoRepo.obter_busca(q, p, tp, o)
-
-    # Calculando a quantidade de produtos encontrados
-    qtde_produtos = len(produtos)
+    id_categoria = int(id_categoria) if id_categoria.isdigit() else None
+    p = max(p, 1)
+    tp = max(tp, 1)
+
+    # O resultado só muda quando produtos ou categorias são alterados
+    etag = gerar_etag(request, "buscar", q, p, tp, o, id_categoria, *await executar_no_banco(obter_versoes, "produto", "categoria"))
+    if nao_modificado(request, etag):
+        return responder_nao_modificado(etag)
+
+    # A página e a quantidade vêm do banco já filtradas por termo e categoria
+    produtos = await ProdutoRepoAsync.obter_busca(q, p, tp, o, id_categoria) or []
+    qtde_produtos = await ProdutoRepoAsync.obter_quantidade_busca(q, id_categoria) or 0
     qtde_paginas = math.ceil(qtde_produtos / float(tp))
 
-    # Paginação
-    start = (p - 1) * tp
-    end = start + tp
-    produtos_paginados = produtos[start:end]
-
     # Buscando todas as categorias para o filtro dropdown
-    categorias = CategoriaRepo.obter_todos()
+    categorias = await CategoriaRepoAsync.obter_todos() or []
 
-    return templates.TemplateResponse(
+    response = templates.TemplateResponse(
         "pages/buscar.html", 
         {
             "request": request,
-            "produtos": produtos_paginados,
+            "produtos": produtos,
             "quantidade_paginas": qtde_paginas,
             "tamanho_pagina": tp,
             "pagina_atual": p,
@@ -238,4 +294,4 @@ async def get_buscar(
             "id_categoria": id_categoria  # Passando o id da categoria selecionada
         }
     )
-
+    return aplicar_validadores(response, etag)
@@ -0,0 +1,40 @@
+SQL_INICIAR_ESCRITA = """
+    BEGIN IMMEDIATE
+"""
+
+SQL_OBTER_ID_CARRINHO = """
+    SELECT id
+    FROM pedido
+    WHERE id_cliente=? AND estado=?
+    ORDER BY id
+    LIMIT 1
+"""
+
+SQL_CRIAR_CARRINHO = """
+    INSERT INTO pedido(data_hora, valor_total, endereco_entrega, estado, id_cliente)
+    SELECT ?, 0, endereco, ?, id
+    FROM usuario
+    WHERE id=?
+"""
+
+SQL_ADICIONAR_ITEM = """
+    INSERT INTO item_pedido(id_pedido, id_produto, nome_produto, valor_produto, quantidade)
+    SELECT ?, id, nome, preco, 1
+    FROM produto
+    WHERE id=?
+    ON CONFLICT(id_pedido, id_produto) DO UPDATE SET quantidade=quantidade+1
+    RETURNING id_pedido, id_produto, nome_produto, valor_produto, quantidade, valor_item
+"""
+
+SQL_ALTERAR_QUANTIDADE_ITEM = """
+    UPDATE item_pedido
+    SET quantidade=quantidade+?
+    WHERE id_pedido=? AND id_produto=?
+    RETURNING id_pedido, id_produto, nome_produto, valor_produto, quantidade, valor_item
+"""
+
+SQL_EXCLUIR_ITEM = """
+    DELETE FROM item_pedido
+    WHERE id_pedido=? AND id_produto=?
+    RETURNING id_pedido, id_produto, nome_produto, valor_produto, quantidade, valor_item
+"""
@@ -0,0 +1,40 @@
+SQL_CRIAR_TABELA = """
+    CREATE TABLE IF NOT EXISTS produto_destaque (
+        id_produto INTEGER PRIMARY KEY,
+        posicao INTEGER NOT NULL,
+        FOREIGN KEY (id_produto) REFERENCES produto(id)
+    );
+"""
+
+SQL_INSERIR = """
+    INSERT INTO produto_destaque(id_produto, posicao)
+    VALUES (?, ?);
+"""
+
+SQL_EXCLUIR_TODOS = """
+    DELETE FROM produto_destaque;
+"""
+
+SQL_OBTER_CURADOS = """
+    SELECT p.id, p.nome, p.preco, p.descricao, p.estoque, p.categoria_id, p.atualizado_em
+    FROM produto_destaque d
+    INNER JOIN produto p ON p.id = d.id_produto
+    ORDER BY d.posicao
+    LIMIT ?;
+"""
+
+SQL_OBTER_MAIS_VENDIDOS = """
+    SELECT p.id, p.nome, p.preco, p.descricao, p.estoque, p.categoria_id, p.atualizado_em
+    FROM produto p
+    LEFT JOIN (
+        SELECT i.id_produto, SUM(i.quantidade) AS vendidos
+        FROM item_pedido i
+        INNER JOIN pedido pe ON pe.id = i.id_pedido
+        WHERE pe.estado NOT IN ('carrinho', 'cancelado')
+        GROUP BY i.id_produto
+    ) v ON v.id_produto = p.id
+    WHERE p.estoque > 0
+        AND p.id NOT IN (SELECT id_produto FROM produto_destaque)
+    ORDER BY COALESCE(v.vendidos, 0) DESC, p.id DESC
+    LIMIT ?;
+"""
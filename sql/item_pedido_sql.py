@@ -61,3 +61,37 @@ SQL_OBTER_QUANTIDADE_POR_PEDIDO = """
     SELECT COUNT(*) FROM item_pedido
     WHERE id_pedido=?
 """
+
+# mantêm pedido.valor_total a cada alteração de item, somando só a diferença
+SQL_CRIAR_GATILHO_INSERIR = """
+    CREATE TRIGGER IF NOT EXISTS tg_item_pedido_inserir
+    AFTER INSERT ON item_pedido
+    BEGIN
+        UPDATE pedido
+        SET valor_total=ROUND(valor_total + NEW.valor_item, 2)
+        WHERE id=NEW.id_pedido;
+    END
+"""
+
+SQL_CRIAR_GATILHO_ALTERAR = """
+    CREATE TRIGGER IF NOT EXISTS tg_item_pedido_alterar
+    AFTER UPDATE OF id_pedido, valor_produto, quantidade ON item_pedido
+    BEGIN
+        UPDATE pedido
+        SET valor_total=ROUND(valor_total - OLD.valor_item, 2)
+        WHERE id=OLD.id_pedido;
+        UPDATE pedido
+        SET valor_total=ROUND(valor_total + NEW.valor_item, 2)
+        WHERE id=NEW.id_pedido;
+    END
+"""
+
+SQL_CRIAR_GATILHO_EXCLUIR = """
+    CREATE TRIGGER IF NOT EXISTS tg_item_pedido_excluir
+    AFTER DELETE ON item_pedido
+    BEGIN
+        UPDATE pedido
+        SET valor_total=ROUND(valor_total - OLD.valor_item, 2)
+        WHERE id=OLD.id_pedido;
+    END
+"""
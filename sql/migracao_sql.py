@@ -0,0 +1,27 @@
+SQL_CRIAR_TABELA = """
+    CREATE TABLE IF NOT EXISTS migracao (
+        versao INTEGER PRIMARY KEY,
+        descricao TEXT NOT NULL,
+        aplicada_em DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)
+"""
+
+SQL_OBTER_VERSOES = """
+    SELECT versao
+    FROM migracao
+    ORDER BY versao
+"""
+
+SQL_OBTER_VERSAO = """
+    SELECT versao
+    FROM migracao
+    WHERE versao = ?
+"""
+
+SQL_REGISTRAR = """
+    INSERT OR IGNORE INTO migracao(versao, descricao)
+    VALUES (?, ?)
+"""
+
+SQL_INICIAR = """
+    BEGIN IMMEDIATE;
+"""
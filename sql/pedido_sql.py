@@ -38,6 +38,38 @@ SQL_ATUALIZAR_VALOR_TOTAL = """
     WHERE id=?
 """
 
+SQL_RECALCULAR_VALOR_TOTAL = """
+    UPDATE pedido
+    SET valor_total=(
+        SELECT ROUND(COALESCE(SUM(valor_item), 0), 2)
+        FROM item_pedido
+        WHERE id_pedido=pedido.id)
+    WHERE id=?
+"""
+
+SQL_OBTER_TOTAIS_INCONSISTENTES = """
+    SELECT p.id, p.valor_total, ROUND(COALESCE(SUM(i.valor_item), 0), 2) AS soma_itens
+    FROM pedido p
+    LEFT JOIN item_pedido i ON i.id_pedido = p.id
+    GROUP BY p.id
+    HAVING ABS(p.valor_total - soma_itens) >= 0.005
+    ORDER BY p.id
+"""
+
+SQL_CORRIGIR_TOTAIS = """
+    UPDATE pedido
+    SET valor_total=(
+        SELECT ROUND(COALESCE(SUM(valor_item), 0), 2)
+        FROM item_pedido
+        WHERE id_pedido=pedido.id)
+    WHERE id IN (SELECT id FROM (
+        SELECT p.id, p.valor_total, ROUND(COALESCE(SUM(i.valor_item), 0), 2) AS soma_itens
+        FROM pedido p
+        LEFT JOIN item_pedido i ON i.id_pedido = p.id
+        GROUP BY p.id
+        HAVING ABS(p.valor_total - soma_itens) >= 0.005))
+"""
+
 SQL_EXCLUIR = """
     DELETE FROM pedido
     WHERE id=?
@@ -78,4 +110,19 @@ SQL_OBTER_TODOS_POR_ESTADO = """
     SELECT id, data_hora, valor_total, endereco_entrega, estado, id_cliente
     FROM pedido
     WHERE (estado = ?)
-"""
\ No newline at end of file
+"""
+
+SQL_CRIAR_INDICE_CLIENTE_ESTADO = """
+    CREATE INDEX IF NOT EXISTS idx_pedido_cliente_estado
+    ON pedido(id_cliente, estado)
+"""
+
+SQL_CRIAR_INDICE_CLIENTE_DATA_HORA = """
+    CREATE INDEX IF NOT EXISTS idx_pedido_cliente_data_hora
+    ON pedido(id_cliente, data_hora)
+"""
+
+SQL_CRIAR_INDICE_ESTADO_DATA_HORA = """
+    CREATE INDEX IF NOT EXISTS idx_pedido_estado_data_hora
+    ON pedido(estado, data_hora)
+"""
@@ -6,24 +6,111 @@ SQL_CRIAR_TABELA = """
         descricao TEXT NOT NULL,
         estoque INTEGER NOT NULL,
         categoria_id INTEGER,
+        atualizado_em DATETIME,
         FOREIGN KEY (categoria_id) REFERENCES categorias(id)
     );
 """
 
+SQL_OBTER_COLUNAS = """
+    PRAGMA table_info(produto);
+"""
+
+SQL_ADICIONAR_ATUALIZADO_EM = """
+    ALTER TABLE produto ADD COLUMN atualizado_em DATETIME;
+"""
+
+SQL_PREENCHER_ATUALIZADO_EM = """
+    UPDATE produto
+    SET atualizado_em=CURRENT_TIMESTAMP
+    WHERE atualizado_em IS NULL;
+"""
+
+SQL_CRIAR_TABELA_BUSCA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS produto_busca
+    USING fts5(nome, descricao, tokenize='unicode61 remove_diacritics 2');
+"""
+
+SQL_CONFIGURAR_RANK_BUSCA = """
+    INSERT INTO produto_busca(produto_busca, rank)
+    VALUES ('rank', 'bm25(10.0, 1.0)');
+"""
+
+SQL_INDEXAR_BUSCA = """
+    INSERT OR REPLACE INTO produto_busca(rowid, nome, descricao)
+    VALUES (?, ?, ?);
+"""
+
+SQL_EXCLUIR_BUSCA = """
+    DELETE FROM produto_busca
+    WHERE rowid=?;
+"""
+
+SQL_LIMPAR_BUSCA = """
+    DELETE FROM produto_busca;
+"""
+
+SQL_OBTER_TEXTOS_BUSCA = """
+    SELECT id, nome, descricao FROM produto;
+"""
+
+SQL_OBTER_QUANTIDADE_INDEXADA = """
+    SELECT COUNT(*) FROM produto_busca;
+"""
+
+SQL_CRIAR_INDICE_CATEGORIA_NOME = """
+    CREATE INDEX IF NOT EXISTS idx_produto_categoria_nome
+    ON produto(categoria_id, nome);
+"""
+
+SQL_CRIAR_INDICE_CATEGORIA_PRECO = """
+    CREATE INDEX IF NOT EXISTS idx_produto_categoria_preco
+    ON produto(categoria_id, preco);
+"""
+
+SQL_CRIAR_INDICE_NOME = """
+    CREATE INDEX IF NOT EXISTS idx_produto_nome
+    ON produto(nome);
+"""
+
+SQL_CRIAR_INDICE_PRECO = """
+    CREATE INDEX IF NOT EXISTS idx_produto_preco
+    ON produto(preco);
+"""
+
 SQL_INSERIR = """
-    INSERT INTO produto(nome, preco, descricao, estoque, categoria_id)
-    VALUES (?, ?, ?, ?, ?);
+    INSERT INTO produto(nome, preco, descricao, estoque, categoria_id, atualizado_em)
+    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP);
+"""
+
+SQL_INICIAR_IMPORTACAO = """
+    BEGIN IMMEDIATE;
+"""
+
+SQL_OBTER_PROXIMO_ID = """
+    SELECT COALESCE(MAX(id), 0) + 1 FROM produto;
+"""
+
+SQL_IMPORTAR = """
+    INSERT INTO produto(id, nome, preco, descricao, estoque, categoria_id, atualizado_em)
+    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(id) DO UPDATE SET
+        nome=excluded.nome,
+        preco=excluded.preco,
+        descricao=excluded.descricao,
+        estoque=excluded.estoque,
+        categoria_id=excluded.categoria_id,
+        atualizado_em=excluded.atualizado_em;
 """
 
 SQL_OBTER_TODOS = """
-    SELECT id, nome, preco, descricao, estoque, categoria_id
+    SELECT id, nome, preco, descricao, estoque, categoria_id, atualizado_em
     FROM produto
     ORDER BY nome;
 """
 
 SQL_ALTERAR = """
     UPDATE produto
-    SET nome=?, preco=?, descricao=?, estoque=?, categoria_id=?
+    SET nome=?, preco=?, descricao=?, estoque=?, categoria_id=?, atualizado_em=CURRENT_TIMESTAMP
     WHERE id=?;
 """
 
@@ -33,7 +120,7 @@ SQL_EXCLUIR = """
 """
 
 SQL_OBTER_UM = """
-    SELECT id, nome, preco, descricao, estoque, categoria_id
+    SELECT id, nome, preco, descricao, estoque, categoria_id, atualizado_em
     FROM produto
     WHERE id=?;
 """
@@ -43,21 +130,60 @@ SQL_OBTER_QUANTIDADE = """
 """
 
 SQL_OBTER_BUSCA = """
-    SELECT id, nome, preco, descricao, estoque, categoria_id
-    FROM produto
-    WHERE nome LIKE ? OR descricao LIKE ?
+    SELECT p.id, p.nome, p.preco, p.descricao, p.estoque, p.categoria_id, p.atualizado_em
+    FROM produto_busca b
+    INNER JOIN produto p ON p.id = b.rowid
+    #2
     ORDER BY #1
     LIMIT ? OFFSET ?;
 """
 
 SQL_OBTER_QUANTIDADE_BUSCA = """
+    SELECT COUNT(*) FROM produto_busca
+    WHERE produto_busca MATCH ?;
+"""
+
+SQL_OBTER_QUANTIDADE_BUSCA_POR_CATEGORIA = """
+    SELECT COUNT(*)
+    FROM produto_busca b
+    INNER JOIN produto p ON p.id = b.rowid
+    WHERE produto_busca MATCH ? AND p.categoria_id = ?;
+"""
+
+SQL_OBTER_PAGINA = """
+    SELECT id, nome, preco, descricao, estoque, categoria_id, atualizado_em
+    FROM produto p
+    #2
+    ORDER BY #1
+    LIMIT ? OFFSET ?;
+"""
+
+# ordem -> (ORDER BY, condição de continuação para paginação por cursor, campo)
+ORDENACOES_BUSCA = {
+    1: ("p.nome, p.id", "(p.nome, p.id) > (?, ?)", "nome"),
+    2: ("p.preco ASC, p.id ASC", "(p.preco, p.id) > (?, ?)", "preco"),
+    3: ("p.preco DESC, p.id DESC", "(p.preco, p.id) < (?, ?)", "preco"),
+}
+
+ORDENACAO_RELEVANCIA = "b.rank, p.id"
+
+# lote seguinte ao último id exportado; #1 recebe os filtros opcionais
+SQL_EXPORTAR = """
+    SELECT id, nome, preco, descricao, estoque, categoria_id, atualizado_em
+    FROM produto
+    WHERE id > ? #1
+    ORDER BY id
+    LIMIT ?;
+"""
+
+SQL_OBTER_QUANTIDADE_POR_CATEGORIA = """
     SELECT COUNT(*) FROM produto
-    WHERE nome LIKE ? OR descricao LIKE ?;
+    WHERE categoria_id = ?;
 """
 
 
 SQL_OBTER_POR_CATEGORIA = """
-    SELECT id, nome, preco, descricao, estoque, categoria_id
+    SELECT id, nome, preco, descricao, estoque, categoria_id, atualizado_em
     FROM produto
     WHERE categoria_id = ?
     ORDER BY nome;
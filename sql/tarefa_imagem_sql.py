@@ -0,0 +1,28 @@
+SQL_CRIAR_TABELA = """
+    CREATE TABLE IF NOT EXISTS tarefa_imagem (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        id_produto INTEGER NOT NULL,
+        estado TEXT NOT NULL,
+        erro TEXT,
+        criada_em DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        concluida_em DATETIME
+    );
+"""
+
+SQL_INSERIR = """
+    INSERT INTO tarefa_imagem(id_produto, estado)
+    VALUES (?, ?)
+    RETURNING id, id_produto, estado, erro, criada_em, concluida_em;
+"""
+
+SQL_CONCLUIR = """
+    UPDATE tarefa_imagem
+    SET estado=?, erro=?, concluida_em=CURRENT_TIMESTAMP
+    WHERE id=?;
+"""
+
+SQL_OBTER_UM = """
+    SELECT id, id_produto, estado, erro, criada_em, concluida_em
+    FROM tarefa_imagem
+    WHERE id=?;
+"""
@@ -17,6 +17,10 @@ SQL_INSERIR = """
     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
 """
 
+SQL_INICIAR_IMPORTACAO = """
+    BEGIN IMMEDIATE
+"""
+
 SQL_OBTER_TODOS_POR_PERFIL = """
     SELECT id, nome, cpf, data_nascimento, endereco, telefone, email
     FROM usuario
@@ -85,7 +89,20 @@ SQL_OBTER_BUSCA = """
     LIMIT ? OFFSET ?
 """
 
+SQL_OBTER_BUSCA_CURSOR = """
+    SELECT id, nome, cpf, data_nascimento, endereco, telefone, email
+    FROM usuario
+    WHERE (nome LIKE ? OR cpf LIKE ?) #1
+    ORDER BY nome, id
+    LIMIT ?
+"""
+
 SQL_OBTER_QUANTIDADE_BUSCA = """
     SELECT COUNT(*) FROM usuario
     WHERE nome LIKE ? OR cpf LIKE ?
 """
+
+SQL_CRIAR_INDICE_TOKEN = """
+    CREATE INDEX IF NOT EXISTS idx_usuario_token
+    ON usuario(token)
+"""
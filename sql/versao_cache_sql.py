@@ -0,0 +1,18 @@
+SQL_CRIAR_TABELA = """
+    CREATE TABLE IF NOT EXISTS versao_cache (
+        nome TEXT PRIMARY KEY,
+        versao INTEGER NOT NULL
+    );
+"""
+
+SQL_INCREMENTAR = """
+    INSERT INTO versao_cache(nome, versao)
+    VALUES (?, 1)
+    ON CONFLICT(nome) DO UPDATE SET versao = versao + 1
+    RETURNING versao;
+"""
+
+SQL_OBTER_TODAS = """
+    SELECT nome, versao
+    FROM versao_cache;
+"""
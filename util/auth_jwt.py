@@ -88,12 +88,23 @@ def validar_token(token: str) -> dict:
 
 
 def configurar_swagger_auth(app):
-    app.openapi_schema = app.openapi()
-    app.openapi_schema["components"]["securitySchemes"] = {
-        "BearerAuth": {
-            "type": "http",
-            "scheme": "bearer",
-            "bearerFormat": "JWT",
+    # o esquema OpenAPI só é montado no primeiro acesso a /docs ou
+    # /openapi.json, e não a cada vez que um worker sobe
+    gerar_openapi = app.openapi
+
+    def openapi():
+        if app.openapi_schema:
+            return app.openapi_schema
+        schema = gerar_openapi()
+        schema.setdefault("components", {})["securitySchemes"] = {
+            "BearerAuth": {
+                "type": "http",
+                "scheme": "bearer",
+                "bearerFormat": "JWT",
+            }
         }
-    }
-    app.openapi_schema["security"] = [{"BearerAuth": []}]
+        schema["security"] = [{"BearerAuth": []}]
+        app.openapi_schema = schema
+        return schema
+
+    app.openapi = openapi
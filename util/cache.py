@@ -0,0 +1,238 @@
+import copy
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from repositories.versao_cache_repo import VersaoCacheRepo
+
+
+class CacheLRU:
+    def __init__(
+        self,
+        nome: str,
+        tamanho_maximo: int = 1024,
+        ttl: float = 300.0,
+        bytes_maximo: int = 0,
+    ):
+        self.nome = nome
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self.bytes_maximo = bytes_maximo
+        self.habilitado = os.getenv("CACHE_HABILITADO", "1") not in ("0", "false", "False")
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # incrementada a cada invalidação: um valor carregado antes dela
+        # não pode ser guardado depois
+        self.geracao = 0
+        self._estatisticas = {"acertos": 0, "falhas": 0, "expirados": 0, "despejos": 0, "invalidacoes": 0}
+
+    @staticmethod
+    def _copiar(valor):
+        # os modelos são dataclasses mutáveis: quem chama recebe uma cópia
+        # para não alterar o que está guardado no cache
+        if isinstance(valor, list):
+            return [copy.copy(item) for item in valor]
+        if isinstance(valor, tuple):
+            return tuple(CacheLRU._copiar(item) for item in valor)
+        return copy.copy(valor)
+
+    def buscar(self, chave):
+        """Retorna o valor guardado ou None se ausente/expirado.
+
+        Não acessa o banco; quem chama deve rodar sincronizar_versoes antes
+        (fora do event loop, no caso de código assíncrono).
+        """
+        if not self.habilitado:
+            return None
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                expira_em, valor, tamanho = item
+                if agora < expira_em:
+                    self._itens.move_to_end(chave)
+                    self._estatisticas["acertos"] += 1
+                    return self._copiar(valor)
+                del self._itens[chave]
+                self._bytes -= tamanho
+                self._estatisticas["expirados"] += 1
+            self._estatisticas["falhas"] += 1
+        return None
+
+    def guardar(
+        self,
+        chave,
+        valor,
+        ttl: Optional[float] = None,
+        tamanho: int = 0,
+        geracao: Optional[int] = None,
+    ):
+        """Guarda um valor; tamanho (em bytes) só conta se houver bytes_maximo.
+
+        Com geracao (lida antes de carregar o valor), nada é guardado se o
+        cache foi invalidado nesse meio-tempo.
+        """
+        if not self.habilitado or valor is None:
+            return
+        if self.bytes_maximo and tamanho > self.bytes_maximo:
+            return
+        expira_em = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if geracao is not None and geracao != self.geracao:
+                return
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= anterior[2]
+            self._itens[chave] = (expira_em, valor, tamanho)
+            self._bytes += tamanho
+            while len(self._itens) > self.tamanho_maximo or (
+                self.bytes_maximo and self._bytes > self.bytes_maximo
+            ):
+                _, (_, _, tamanho_despejado) = self._itens.popitem(last=False)
+                self._bytes -= tamanho_despejado
+                self._estatisticas["despejos"] += 1
+
+    def obter(self, chave, carregar: Callable):
+        """Retorna o valor em cache ou carrega, guarda e retorna (read-through)."""
+        if not self.habilitado:
+            return carregar()
+        sincronizar_versoes()
+        valor = self.buscar(chave)
+        if valor is not None:
+            return valor
+        geracao = self.geracao
+        valor = carregar()
+        # None indica item inexistente ou erro de banco: não é guardado
+        if valor is not None:
+            self.guardar(chave, valor, geracao=geracao)
+            valor = self._copiar(valor)
+        return valor
+
+    def invalidar(self, chave=None):
+        """Remove uma chave ou, sem argumento, todo o conteúdo do cache."""
+        with self._lock:
+            if chave is None:
+                self._itens.clear()
+                self._bytes = 0
+            else:
+                item = self._itens.pop(chave, None)
+                if item is not None:
+                    self._bytes -= item[2]
+            self.geracao += 1
+            self._estatisticas["invalidacoes"] += 1
+
+    def obter_estatisticas(self) -> dict:
+        estatisticas = dict(self._estatisticas)
+        consultas = estatisticas["acertos"] + estatisticas["falhas"]
+        estatisticas["taxa_acerto"] = estatisticas["acertos"] / consultas if consultas else 0.0
+        estatisticas["itens"] = len(self._itens)
+        estatisticas["tamanho_maximo"] = self.tamanho_maximo
+        estatisticas["bytes"] = self._bytes
+        estatisticas["bytes_maximo"] = self.bytes_maximo
+        estatisticas["ttl"] = self.ttl
+        estatisticas["habilitado"] = self.habilitado
+        return estatisticas
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+_versoes_conhecidas = {}
+_sincronizacao = {"proxima": 0.0, "tabela_criada": False}
+
+
+def _garantir_tabela_versoes():
+    if not _sincronizacao["tabela_criada"]:
+        VersaoCacheRepo.criar_tabela()
+        _sincronizacao["tabela_criada"] = True
+
+
+def sincronizacao_pendente() -> bool:
+    """Indica, sem acessar o banco, se sincronizar_versoes consultaria os contadores."""
+    intervalo = float(os.getenv("CACHE_INTERVALO_SINCRONIZACAO", "1"))
+    return intervalo > 0 and time.monotonic() >= _sincronizacao["proxima"]
+
+
+def sincronizar_versoes(forcar: bool = False):
+    """Descarta os caches que outro processo (worker) invalidou.
+
+    As escritas incrementam um contador por cache na tabela versao_cache do
+    banco; cada processo consulta esses contadores no máximo uma vez a cada
+    CACHE_INTERVALO_SINCRONIZACAO segundos (0 desliga a consulta).
+    """
+    intervalo = float(os.getenv("CACHE_INTERVALO_SINCRONIZACAO", "1"))
+    agora = time.monotonic()
+    if intervalo <= 0 or (not forcar and agora < _sincronizacao["proxima"]):
+        return
+    _sincronizacao["proxima"] = agora + intervalo
+    _garantir_tabela_versoes()
+    versoes = VersaoCacheRepo.obter_todas()
+    if versoes is None:
+        return
+    for nome, versao in versoes.items():
+        if _versoes_conhecidas.get(nome) != versao:
+            _versoes_conhecidas[nome] = versao
+            if nome in _caches:
+                _caches[nome].invalidar()
+
+
+def obter_cache(
+    nome: str, ttl: Optional[float] = None, bytes_maximo: int = 0
+) -> CacheLRU:
+    # criado sob demanda, depois do load_dotenv, com CACHE_TAMANHO e CACHE_TTL
+    if nome not in _caches:
+        with _caches_lock:
+            if nome not in _caches:
+                _caches[nome] = CacheLRU(
+                    nome,
+                    int(os.getenv("CACHE_TAMANHO", "1024")),
+                    ttl if ttl is not None else float(os.getenv("CACHE_TTL", "300")),
+                    bytes_maximo,
+                )
+    return _caches[nome]
+
+
+def invalidar_cache(nome: str):
+    """Limpa o cache neste processo e sinaliza a invalidação aos demais.
+
+    O contador é incrementado mesmo com a sincronização desligada, pois
+    também serve de versão para os validadores HTTP (ETag).
+    """
+    obter_cache(nome).invalidar()
+    _garantir_tabela_versoes()
+    versao = VersaoCacheRepo.incrementar(nome)
+    if versao is not None:
+        _versoes_conhecidas[nome] = versao
+
+
+def obter_versoes(*nomes: str) -> tuple:
+    """Versão atual de cada cache no banco (0 se ainda não foi invalidado)."""
+    _garantir_tabela_versoes()
+    versoes = VersaoCacheRepo.obter_todas() or {}
+    return tuple(versoes.get(nome, 0) for nome in nomes)
+
+
+def obter_estatisticas_cache() -> dict:
+    return {nome: cache.obter_estatisticas() for nome, cache in _caches.items()}
+
+
+def em_cache(nome: str, ttl: Optional[float] = None):
+    """Guarda o retorno de um método de repositório, usando nome e argumentos como chave.
+
+    Deve ficar abaixo do @classmethod.
+    """
+
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(cls, *args, **kwargs):
+            chave = (funcao.__name__, args, tuple(sorted(kwargs.items())))
+            return obter_cache(nome, ttl).obter(
+                chave, lambda: funcao(cls, *args, **kwargs)
+            )
+
+        return envolvida
+
+    return decorador
@@ -0,0 +1,79 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Union
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from util.cookies import NOME_COOKIE_AUTH, NOME_HEADER_AUTH
+
+COOKIES_MENSAGEM = ("message_success", "message_info", "message_warning", "message_danger")
+
+
+def _identidade(request: Request) -> list:
+    # a mesma URL gera HTML diferente para quem está logado ou tem mensagens
+    # pendentes em cookie, então isso também entra no validador
+    return [
+        request.headers.get(NOME_HEADER_AUTH, ""),
+        *(request.cookies.get(nome, "") for nome in (NOME_COOKIE_AUTH, *COOKIES_MENSAGEM)),
+    ]
+
+
+def gerar_etag(request: Request, *partes) -> str:
+    """ETag fraco calculado a partir das partes e da identidade do visitante."""
+    conteudo = "\x1f".join(str(parte) for parte in (*partes, *_identidade(request)))
+    return f'W/"{hashlib.sha1(conteudo.encode()).hexdigest()}"'
+
+
+def converter_data_banco(valor: Union[str, datetime, None]) -> Optional[datetime]:
+    """Converte o CURRENT_TIMESTAMP do SQLite (texto em UTC) para datetime."""
+    if valor is None or isinstance(valor, datetime):
+        return valor
+    try:
+        data = datetime.fromisoformat(str(valor))
+    except ValueError:
+        return None
+    return data.replace(tzinfo=timezone.utc) if data.tzinfo is None else data
+
+
+def _mesmo_etag(cabecalho: str, etag: str) -> bool:
+    # comparação fraca: W/"x" e "x" são equivalentes (RFC 9110, 13.1.2)
+    valores = [v.strip().removeprefix("W/") for v in cabecalho.split(",")]
+    return "*" in valores or etag.removeprefix("W/") in valores
+
+
+def nao_modificado(
+    request: Request, etag: str, ultima_modificacao: Optional[datetime] = None
+) -> bool:
+    """Indica se a cópia do cliente ainda vale; If-None-Match tem precedência."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _mesmo_etag(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and ultima_modificacao is not None:
+        try:
+            data = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # o cabeçalho HTTP tem resolução de segundos
+        return ultima_modificacao.replace(microsecond=0) <= data
+    return False
+
+
+def aplicar_validadores(
+    response: Response, etag: str, ultima_modificacao: Optional[datetime] = None
+) -> Response:
+    """Adiciona ETag/Last-Modified e pede revalidação a cada uso."""
+    response.headers["ETag"] = etag
+    if ultima_modificacao is not None:
+        response.headers["Last-Modified"] = format_datetime(ultima_modificacao, usegmt=True)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["Vary"] = "Cookie, Authorization"
+    return response
+
+
+def responder_nao_modificado(
+    etag: str, ultima_modificacao: Optional[datetime] = None
+) -> Response:
+    return aplicar_validadores(Response(status_code=304), etag, ultima_modificacao)
@@ -0,0 +1,157 @@
+"""Variantes de imagens de produtos geradas sob demanda, com cache em disco.
+
+Cada variante (tamanho e formato) é gerada a partir do JPEG principal do
+produto na primeira vez que é pedida e fica gravada em disco. O cache tem
+tamanho máximo e descarta as variantes usadas há mais tempo (pela data de
+acesso do arquivo). Pedidos simultâneos da mesma variante no mesmo worker
+aguardam uma única geração.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from util.images import caminho_imagem_produto, gerar_variante
+from util.processamento_imagens import obter_pool_imagens
+
+# lista fechada, para que ninguém encha o cache pedindo tamanhos arbitrários
+TAMANHOS_SOB_DEMANDA = (48, 96, 160, 240, 320, 480)
+# intervalo mínimo entre duas atualizações da data de acesso de uma variante
+INTERVALO_TOQUE = 60
+
+
+class CacheImagens:
+    def __init__(self, pasta: str, bytes_maximo: int):
+        self.pasta = pasta
+        self.bytes_maximo = bytes_maximo
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._ocupado: Optional[int] = None
+        self._despejando = False
+        self._em_andamento: Dict[str, asyncio.Future] = {}
+        self._estatisticas = {
+            "acertos": 0,
+            "falhas": 0,
+            "coalescidas": 0,
+            "despejadas": 0,
+        }
+        os.makedirs(pasta, exist_ok=True)
+
+    def caminho(self, id_produto: int, tamanho: int, formato: str) -> str:
+        return os.path.join(self.pasta, f"{id_produto:04d}-{tamanho}.{formato}")
+
+    async def obter(self, id_produto: int, tamanho: int, formato: str) -> Optional[str]:
+        """Retorna o caminho da variante, gerando-a se preciso; None se o produto não tem imagem."""
+        origem = caminho_imagem_produto(id_produto)
+        caminho = self.caminho(id_produto, tamanho, formato)
+        try:
+            modificada_em = os.stat(origem).st_mtime
+        except FileNotFoundError:
+            return None
+        try:
+            estado = os.stat(caminho)
+            # variante mais antiga que a imagem principal é regerada
+            if estado.st_mtime >= modificada_em:
+                self._tocar(caminho, estado)
+                self._contar("acertos")
+                return caminho
+        except FileNotFoundError:
+            pass
+        geracao = self._em_andamento.get(caminho)
+        if geracao:
+            self._contar("coalescidas")
+        else:
+            self._contar("falhas")
+            geracao = asyncio.ensure_future(self._gerar(origem, caminho, tamanho, formato))
+            self._em_andamento[caminho] = geracao
+            geracao.add_done_callback(lambda _: self._em_andamento.pop(caminho, None))
+        # shield: se um cliente desiste, a geração continua para os demais
+        await asyncio.shield(geracao)
+        return caminho
+
+    async def _gerar(self, origem: str, caminho: str, tamanho: int, formato: str):
+        pool = obter_pool_imagens()
+        pool.verificar_vaga()
+        await asyncio.wrap_future(pool.enviar(gerar_variante, origem, caminho, tamanho, formato))
+        try:
+            tamanho_arquivo = os.path.getsize(caminho)
+        except FileNotFoundError:
+            # despejada (por este ou outro worker) logo depois de gravada; o
+            # despejo já recontou a pasta, então não há o que somar
+            tamanho_arquivo = 0
+        with self._lock:
+            if self._ocupado is not None:
+                self._ocupado += tamanho_arquivo
+            precisa_despejar = not self._despejando and (
+                self._ocupado is None or self._ocupado > self.bytes_maximo
+            )
+            self._despejando = self._despejando or precisa_despejar
+        if precisa_despejar:
+            asyncio.get_running_loop().run_in_executor(None, self._despejar)
+
+    def _tocar(self, caminho: str, estado: os.stat_result):
+        agora = time.time()
+        if agora - estado.st_atime > INTERVALO_TOQUE:
+            try:
+                # só a data de acesso; a de modificação é usada para validade
+                os.utime(caminho, (agora, estado.st_mtime))
+            except FileNotFoundError:
+                pass
+
+    def _despejar(self):
+        # percorre a pasta em vez de confiar no total em memória, porque os
+        # outros workers também gravam e apagam variantes
+        try:
+            arquivos = []
+            for entrada in os.scandir(self.pasta):
+                if entrada.is_file() and not entrada.name.endswith(".tmp"):
+                    estado = entrada.stat()
+                    arquivos.append((estado.st_atime, estado.st_size, entrada.path))
+            ocupado = sum(tamanho for _, tamanho, _ in arquivos)
+            despejadas = 0
+            if ocupado > self.bytes_maximo:
+                # libera até 90% do limite, para não despejar a cada variante nova
+                for _, tamanho, caminho in sorted(arquivos):
+                    if ocupado <= self.bytes_maximo * 0.9:
+                        break
+                    try:
+                        os.remove(caminho)
+                        despejadas += 1
+                    except FileNotFoundError:
+                        pass
+                    ocupado -= tamanho
+            with self._lock:
+                self._ocupado = ocupado
+                self._estatisticas["despejadas"] += despejadas
+        finally:
+            with self._lock:
+                self._despejando = False
+
+    def _contar(self, nome: str):
+        with self._lock:
+            self._estatisticas[nome] += 1
+
+    def obter_estatisticas(self) -> dict:
+        with self._lock:
+            estatisticas = dict(self._estatisticas)
+            estatisticas["bytes_ocupados"] = self._ocupado
+        estatisticas["bytes_maximo"] = self.bytes_maximo
+        estatisticas["em_andamento"] = len(self._em_andamento)
+        return estatisticas
+
+
+_cache: CacheImagens = None
+_cache_lock = threading.Lock()
+
+
+def obter_cache_imagens() -> CacheImagens:
+    global _cache
+    if _cache is None or _cache.pid != os.getpid():
+        with _cache_lock:
+            if _cache is None or _cache.pid != os.getpid():
+                _cache = CacheImagens(
+                    os.getenv("IMAGENS_CACHE_PASTA", "static/img/produtos/cache"),
+                    int(os.getenv("IMAGENS_CACHE_MB", "256")) * 1024 * 1024,
+                )
+    return _cache
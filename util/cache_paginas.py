@@ -0,0 +1,93 @@
+import os
+import sqlite3
+from email.utils import parsedate_to_datetime
+from fastapi import Request
+from fastapi.responses import Response
+
+from util.cache import obter_cache, sincronizacao_pendente, sincronizar_versoes
+from util.cache_http import COOKIES_MENSAGEM, nao_modificado
+from util.cookies import NOME_COOKIE_AUTH, NOME_HEADER_AUTH
+from util.database import executar_no_banco
+
+# prefixo da rota -> segundos em cache (o prefixo mais longo vence)
+TTL_PAGINAS = {
+    "/": 60,
+    "/buscar": 60,
+    "/produto/": 300,
+    "/categorias": 300,
+    "/categoria/": 300,
+}
+
+
+def _obter_ttl(caminho: str):
+    for prefixo in sorted(TTL_PAGINAS, key=len, reverse=True):
+        if caminho == prefixo or (prefixo != "/" and caminho.startswith(prefixo)):
+            return TTL_PAGINAS[prefixo]
+    return None
+
+
+def _obter_cache_paginas():
+    return obter_cache(
+        "paginas", bytes_maximo=int(os.getenv("CACHE_PAGINAS_BYTES", str(32 * 1024 * 1024)))
+    )
+
+
+def _requisicao_anonima(request: Request) -> bool:
+    if request.headers.get(NOME_HEADER_AUTH):
+        return False
+    return not any(nome in request.cookies for nome in (NOME_COOKIE_AUTH, *COOKIES_MENSAGEM))
+
+
+async def cachear_paginas_anonimas(request: Request, call_next):
+    """Serve da memória as páginas do catálogo para visitantes não identificados.
+
+    As páginas são invalidadas junto com os caches de produtos e categorias.
+    """
+    ttl = _obter_ttl(request.url.path)
+    if request.method != "GET" or ttl is None or not _requisicao_anonima(request):
+        return await call_next(request)
+    cache = _obter_cache_paginas()
+    if cache.habilitado and sincronizacao_pendente():
+        # a consulta aos contadores de versão vai ao banco: roda no executor,
+        # para não travar o event loop esperando uma conexão do pool
+        try:
+            await executar_no_banco(sincronizar_versoes)
+        except sqlite3.Error as ex:
+            # sem saber se outro worker alterou o catálogo, não usa o cache
+            print(ex)
+            return await call_next(request)
+    chave = f"{request.url.path}?{request.url.query}"
+    guardada = cache.buscar(chave)
+    if guardada is not None:
+        status_code, headers, corpo = guardada
+        headers = dict(headers)
+        etag = headers.get("etag")
+        ultima_modificacao = headers.get("last-modified")
+        if ultima_modificacao:
+            ultima_modificacao = parsedate_to_datetime(ultima_modificacao)
+        if etag and nao_modificado(request, etag, ultima_modificacao):
+            response = Response(status_code=304, headers={
+                nome: valor for nome, valor in headers.items()
+                if nome in ("etag", "last-modified", "cache-control", "vary")
+            })
+            response.headers["X-Cache"] = "HIT"
+            return response
+        response = Response(corpo, status_code, headers)
+        response.headers["X-Cache"] = "HIT"
+        return response
+    # lida antes de renderizar: se o catálogo mudar durante a renderização,
+    # a página pode ter dados antigos e não é guardada
+    geracao = cache.geracao
+    response = await call_next(request)
+    if (
+        response.status_code != 200
+        or "set-cookie" in response.headers
+        or not response.headers.get("content-type", "").startswith("text/html")
+    ):
+        return response
+    corpo = b"".join([parte async for parte in response.body_iterator])
+    headers = list(response.headers.items())
+    cache.guardar(chave, (response.status_code, headers, corpo), ttl, len(corpo), geracao)
+    response = Response(corpo, response.status_code, dict(headers))
+    response.headers["X-Cache"] = "MISS"
+    return response
@@ -0,0 +1,192 @@
+"""Compressão gzip e brotli das respostas dinâmicas.
+
+Páginas HTML e listas JSON saem comprimidas quando o navegador aceita e o
+corpo passa do tamanho mínimo. Respostas em streaming (como a exportação
+do catálogo) são comprimidas parte a parte, sem juntar o corpo em memória.
+Ficam de fora respostas que já têm Content-Encoding (os .br e .gz de
+static/dist), tipos que não ganham nada com compressão (imagens,
+application/gzip) e respostas parciais.
+"""
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # sem o pacote, só gzip
+    brotli = None
+
+TIPOS_COMPRIMIVEIS = (
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/csv",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/problem+json",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def codificacoes_aceitas(scope: Scope) -> set:
+    """Codificações do Accept-Encoding, sem as recusadas com q=0."""
+    aceitas = set()
+    for parte in Headers(scope=scope).get("accept-encoding", "").lower().split(","):
+        nome, _, parametros = parte.partition(";")
+        qualidade = parametros.strip().removeprefix("q=")
+        try:
+            if parametros and float(qualidade) == 0:
+                continue
+        except ValueError:
+            continue
+        if nome.strip():
+            aceitas.add(nome.strip())
+    return aceitas
+
+
+class _Compressor:
+    def __init__(self, codificacao: str, nivel: int):
+        self.brotli = codificacao == "br"
+        if self.brotli:
+            self._objeto = brotli.Compressor(mode=brotli.MODE_TEXT, quality=nivel)
+        else:
+            self._objeto = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+
+    def comprimir(self, dados: bytes, fim: bool) -> bytes:
+        if self.brotli:
+            saida = self._objeto.process(dados)
+            return saida + (self._objeto.finish() if fim else self._objeto.flush())
+        saida = self._objeto.compress(dados)
+        # sem o fim, esvazia o buffer a cada parte, para que um cliente lendo
+        # o streaming (NDJSON, por exemplo) receba as linhas sem esperar
+        return saida + self._objeto.flush(zlib.Z_FINISH if fim else zlib.Z_SYNC_FLUSH)
+
+
+class CompressaoRespostas:
+    """Middleware ASGI que comprime as respostas com brotli ou gzip."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        tamanho_minimo: Optional[int] = None,
+        nivel_gzip: Optional[int] = None,
+        nivel_brotli: Optional[int] = None,
+        tipos: tuple = TIPOS_COMPRIMIVEIS,
+    ):
+        self.app = app
+        self.tamanho_minimo = tamanho_minimo if tamanho_minimo is not None else int(
+            os.getenv("COMPRESSAO_TAMANHO_MINIMO", "1024")
+        )
+        # níveis moderados: a compressão é feita a cada requisição, ao
+        # contrário da dos arquivos estáticos, feita uma vez no build
+        self.nivel_gzip = nivel_gzip if nivel_gzip is not None else int(
+            os.getenv("COMPRESSAO_NIVEL_GZIP", "6")
+        )
+        self.nivel_brotli = nivel_brotli if nivel_brotli is not None else int(
+            os.getenv("COMPRESSAO_NIVEL_BROTLI", "4")
+        )
+        self.tipos = tipos
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        aceitas = codificacoes_aceitas(scope)
+        if brotli and "br" in aceitas:
+            codificacao = "br"
+        elif "gzip" in aceitas:
+            codificacao = "gzip"
+        else:
+            codificacao = None
+        await self.app(scope, receive, _EnvioComprimido(self, codificacao, send))
+
+    def comprimivel(self, status_code: int, headers: Headers) -> bool:
+        tipo = headers.get("content-type", "").split(";")[0].strip().lower()
+        return (
+            200 <= status_code < 300
+            and status_code != 204
+            and tipo in self.tipos
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+            and "no-transform" not in headers.get("cache-control", "")
+        )
+
+
+class _EnvioComprimido:
+    """Intercepta o send de uma requisição e comprime o corpo, se couber."""
+
+    def __init__(self, middleware: CompressaoRespostas, codificacao: Optional[str], send: Send):
+        self.middleware = middleware
+        self.codificacao = codificacao
+        self.send = send
+        self.inicio: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.decidido = False
+
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            # os cabeçalhos só são enviados quando a primeira parte do corpo
+            # chega, porque a decisão depende do tamanho dela
+            self.inicio = message
+            return
+        if message["type"] != "http.response.body":
+            # outros tipos de mensagem (como o http.response.pathsend do
+            # FileResponse ou o http.response.debug, que vem antes do start)
+            # seguem sem compressão
+            if self.inicio is not None and not self.decidido:
+                self.decidido = True
+                await self.send(self.inicio)
+            await self.send(message)
+            return
+        if not self.decidido:
+            self.decidido = True
+            await self._decidir(message)
+            return
+        if self.compressor is None:
+            await self.send(message)
+            return
+        mais = message.get("more_body", False)
+        corpo = self.compressor.comprimir(message.get("body", b""), fim=not mais)
+        if corpo or not mais:
+            await self.send({"type": "http.response.body", "body": corpo, "more_body": mais})
+
+    async def _decidir(self, message: Message):
+        inicio = self.inicio
+        headers = MutableHeaders(scope=inicio)
+        corpo = message.get("body", b"")
+        mais = message.get("more_body", False)
+        if not self.middleware.comprimivel(inicio["status"], headers):
+            await self.send(inicio)
+            await self.send(message)
+            return
+        # a resposta varia conforme o Accept-Encoding mesmo quando esta
+        # requisição não recebe a versão comprimida
+        if "accept-encoding" not in headers.get("vary", "").lower():
+            headers.add_vary_header("Accept-Encoding")
+        minimo = self.middleware.tamanho_minimo
+        # em streaming, só o Content-Length (se houver) diz o tamanho total
+        pequeno = int(headers.get("content-length", minimo)) < minimo if mais else len(corpo) < minimo
+        if self.codificacao is None or pequeno:
+            await self.send(inicio)
+            await self.send(message)
+            return
+        nivel = self.middleware.nivel_brotli if self.codificacao == "br" else self.middleware.nivel_gzip
+        self.compressor = _Compressor(self.codificacao, nivel)
+        headers["Content-Encoding"] = self.codificacao
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # o corpo enviado não é mais byte a byte o que o ETag forte descreve
+            headers["ETag"] = f"W/{etag}"
+        corpo = self.compressor.comprimir(corpo, fim=not mais)
+        if mais:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(corpo))
+        await self.send(inicio)
+        await self.send({"type": "http.response.body", "body": corpo, "more_body": mais})
@@ -1,4 +1,289 @@
+import asyncio
+import functools
+import logging
+import os
+import queue
+import re
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
+logger = logging.getLogger(__name__)
+
+# pragma -> (variável de ambiente, valor padrão)
+PERFIL_BANCO = {
+    "journal_mode": ("BANCO_JOURNAL_MODE", "WAL"),
+    "synchronous": ("BANCO_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": ("BANCO_BUSY_TIMEOUT", "5000"),
+    "mmap_size": ("BANCO_MMAP_SIZE", "268435456"),
+    "cache_size": ("BANCO_CACHE_SIZE", "-20000"),
+    "temp_store": ("BANCO_TEMP_STORE", "MEMORY"),
+}
+
+
+def obter_perfil_banco() -> dict:
+    perfil = {}
+    for pragma, (variavel, padrao) in PERFIL_BANCO.items():
+        valor = os.getenv(variavel, padrao).strip()
+        # PRAGMA não aceita parâmetros, então só valores simples são aceitos
+        if not re.fullmatch(r"-?[A-Za-z0-9_]+", valor):
+            raise ValueError(f"Valor inválido para {variavel}: {valor!r}")
+        perfil[pragma] = valor
+    return perfil
+
+
+class PoolEsgotadoError(sqlite3.OperationalError):
+    """Nenhuma conexão ficou livre dentro do tempo de espera do pool."""
+
+
+class PoolConexoes:
+    def __init__(
+        self,
+        arquivo: str,
+        tamanho: int = 5,
+        timeout: float = 5.0,
+        verificar_apos: float = 30.0,
+        perfil: dict = None,
+    ):
+        self.arquivo = arquivo
+        self.perfil = perfil or {}
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self.verificar_apos = verificar_apos
+        self.pid = os.getpid()
+        self._ociosas = queue.LifoQueue(maxsize=tamanho)
+        self._lock = threading.Lock()
+        self._abertas = 0
+        self._ultimo_uso = {}
+        self._estatisticas = {
+            "criadas": 0,
+            "emprestimos": 0,
+            "descartadas": 0,
+            "esperas": 0,
+            "tempo_espera_total": 0.0,
+            "timeouts": 0,
+        }
+
+    def _criar(self) -> sqlite3.Connection:
+        conexao = sqlite3.connect(
+            self.arquivo, timeout=self.timeout, check_same_thread=False
+        )
+        for pragma, valor in self.perfil.items():
+            conexao.execute(f"PRAGMA {pragma}={valor}")
+        self._ultimo_uso[id(conexao)] = time.monotonic()
+        self._contar("criadas")
+        return conexao
+
+    def _contar(self, nome: str, valor: float = 1):
+        # emprestar e devolver rodam nas threads do executor do banco
+        with self._lock:
+            self._estatisticas[nome] += valor
+
+    def _saudavel(self, conexao: sqlite3.Connection) -> bool:
+        ociosa_ha = time.monotonic() - self._ultimo_uso.get(id(conexao), 0)
+        if ociosa_ha < self.verificar_apos:
+            return True
+        try:
+            conexao.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _descartar(self, conexao: sqlite3.Connection):
+        self._ultimo_uso.pop(id(conexao), None)
+        try:
+            conexao.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._abertas -= 1
+            self._estatisticas["descartadas"] += 1
+
+    def emprestar(self) -> sqlite3.Connection:
+        inicio = time.monotonic()
+        while True:
+            try:
+                conexao = self._ociosas.get_nowait()
+            except queue.Empty:
+                conexao = self._criar_ou_aguardar(inicio)
+            if not self._saudavel(conexao):
+                self._descartar(conexao)
+                continue
+            self._contar("emprestimos")
+            return conexao
+
+    def _criar_ou_aguardar(self, inicio: float) -> sqlite3.Connection:
+        with self._lock:
+            pode_criar = self._abertas < self.tamanho
+            if pode_criar:
+                self._abertas += 1
+        if pode_criar:
+            try:
+                return self._criar()
+            except sqlite3.Error:
+                with self._lock:
+                    self._abertas -= 1
+                raise
+        restante = self.timeout - (time.monotonic() - inicio)
+        self._contar("esperas")
+        try:
+            return self._ociosas.get(timeout=max(restante, 0.001))
+        except queue.Empty:
+            self._contar("timeouts")
+            raise PoolEsgotadoError(
+                f"Nenhuma conexão livre em {self.timeout}s "
+                f"(pool com {self.tamanho} conexões)."
+            )
+        finally:
+            self._contar("tempo_espera_total", time.monotonic() - inicio)
+
+    def devolver(self, conexao: sqlite3.Connection):
+        if conexao.in_transaction:
+            try:
+                conexao.rollback()
+            except sqlite3.Error:
+                self._descartar(conexao)
+                return
+        self._ultimo_uso[id(conexao)] = time.monotonic()
+        try:
+            self._ociosas.put_nowait(conexao)
+        except queue.Full:
+            self._descartar(conexao)
+
+    def fechar(self):
+        while True:
+            try:
+                conexao = self._ociosas.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(conexao)
+
+    def obter_estatisticas(self) -> dict:
+        with self._lock:
+            estatisticas = dict(self._estatisticas)
+        estatisticas["reutilizadas"] = max(
+            estatisticas["emprestimos"] - estatisticas["criadas"], 0
+        )
+        estatisticas["tamanho"] = self.tamanho
+        estatisticas["abertas"] = self._abertas
+        estatisticas["ociosas"] = self._ociosas.qsize()
+        estatisticas["em_uso"] = self._abertas - self._ociosas.qsize()
+        return estatisticas
+
+
+_pool: PoolConexoes = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool() -> PoolConexoes:
+    global _pool
+    # o pool é criado sob demanda (depois do load_dotenv) e recriado
+    # quando o processo é um worker derivado via fork
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = PoolConexoes(
+                    os.getenv("BANCO_ARQUIVO", "dados.db"),
+                    int(os.getenv("BANCO_POOL_TAMANHO", "5")),
+                    float(os.getenv("BANCO_POOL_TIMEOUT", "5")),
+                    float(os.getenv("BANCO_POOL_VERIFICAR_APOS", "30")),
+                    obter_perfil_banco(),
+                )
+    return _pool
+
+
+def fechar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.fechar()
+        _pool = None
+
+
+def obter_estatisticas_pool() -> dict:
+    return obter_pool().obter_estatisticas()
+
+
+def verificar_perfil_banco() -> dict:
+    """Lê os PRAGMAs efetivos de uma conexão do pool e registra no log."""
+    pool = obter_pool()
+    with obter_conexao() as conexao:
+        ativos = {
+            pragma: conexao.execute(f"PRAGMA {pragma}").fetchone()[0]
+            for pragma in pool.perfil
+        }
+    logger.info("Banco %s: %s", pool.arquivo, ativos)
+    solicitado = pool.perfil.get("journal_mode", "").lower()
+    if solicitado and str(ativos["journal_mode"]).lower() != solicitado:
+        logger.warning(
+            "journal_mode=%s solicitado, mas o banco está em %s.",
+            solicitado,
+            ativos["journal_mode"],
+        )
+    return ativos
+
+
+@contextmanager
 def obter_conexao():
-    return sqlite3.connect("dados.db")
\ No newline at end of file
+    pool = obter_pool()
+    conexao = pool.emprestar()
+    try:
+        # mesmo comportamento do "with sqlite3.connect(...)": commit ao
+        # final do bloco ou rollback em caso de exceção
+        with conexao:
+            yield conexao
+    finally:
+        pool.devolver(conexao)
+
+
+_executor: ThreadPoolExecutor = None
+_executor_pid: int = None
+
+
+def obter_executor_banco() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+    # uma thread por conexão do pool: quem está na thread nunca espera
+    # por conexão, e a espera por vaga acontece no event loop sem bloqueá-lo
+    if _executor is None or _executor_pid != os.getpid():
+        with _pool_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(
+                    int(os.getenv("BANCO_POOL_TAMANHO", "5")),
+                    thread_name_prefix="banco",
+                )
+                _executor_pid = os.getpid()
+    return _executor
+
+
+async def executar_no_banco(funcao, *args, **kwargs):
+    """Executa uma função síncrona de acesso ao banco fora do event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        obter_executor_banco(), functools.partial(funcao, *args, **kwargs)
+    )
+
+
+class RepositorioAssincrono:
+    """Expõe os métodos de um repositório como corrotinas.
+
+    Ex.: ProdutoRepoAsync = RepositorioAssincrono(ProdutoRepo), e nas rotas
+    await ProdutoRepoAsync.obter_um(id). Cada chamada roda no executor do
+    banco, então as consultas não travam o event loop.
+    """
+
+    def __init__(self, repositorio):
+        self._repositorio = repositorio
+
+    def __getattr__(self, nome: str):
+        metodo = getattr(self._repositorio, nome)
+        if not callable(metodo):
+            return metodo
+
+        @functools.wraps(metodo)
+        async def envolvido(*args, **kwargs):
+            return await executar_no_banco(metodo, *args, **kwargs)
+
+        setattr(self, nome, envolvido)
+        return envolvido
@@ -0,0 +1,161 @@
+"""Arquivos estáticos com hash no nome e versões pré-comprimidas.
+
+"python gerenciar.py construir_estaticos" copia os arquivos de static/ para
+static/dist/ com o hash do conteúdo no nome (estilos.css vira
+estilos.1a2b3c4d5e.css) e grava ao lado as versões .gz e .br dos arquivos
+de texto. Como o nome muda sempre que o conteúdo muda, eles podem ser
+guardados pelo navegador para sempre. Os templates chegam ao nome com hash
+pela função estatico(); sem o build, ela devolve o caminho original.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+from typing import Dict
+
+from fastapi.responses import FileResponse
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from util.compressao import codificacoes_aceitas
+
+try:
+    import brotli
+except ImportError:  # o .br é opcional; sem o pacote, só o .gz é gerado
+    brotli = None
+
+PASTA_ESTATICOS = "static"
+PASTA_DIST = "static/dist"
+ARQUIVO_MANIFESTO = "static/dist/manifesto.json"
+# pastas geradas ou alimentadas em tempo de execução ficam de fora
+PASTAS_IGNORADAS = ("dist", "img/produtos")
+EXTENSOES_TEXTO = (".css", ".js", ".svg", ".json", ".map", ".txt")
+# arquivos de texto menores que isso não compensam a compressão
+TAMANHO_MINIMO_COMPRESSAO = 512
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+# url(...) relativo em CSS, como o das fontes do bootstrap-icons
+URL_CSS = re.compile(r"""url\(\s*(["']?)(?!data:|https?:|/)([^"')?#]+)([^"')]*)\1\s*\)""")
+
+_manifesto: Dict[str, str] = None
+
+
+def _listar_arquivos() -> list:
+    arquivos = []
+    for pasta, subpastas, nomes in os.walk(PASTA_ESTATICOS):
+        relativa = os.path.relpath(pasta, PASTA_ESTATICOS).replace(os.sep, "/")
+        subpastas[:] = [
+            s for s in subpastas
+            if os.path.normpath(f"{relativa}/{s}").replace(os.sep, "/") not in PASTAS_IGNORADAS
+        ]
+        for nome in nomes:
+            arquivos.append(os.path.normpath(f"{relativa}/{nome}").replace(os.sep, "/"))
+    # CSS por último: as referências a fontes e imagens já têm hash quando
+    # o CSS é reescrito
+    return sorted(arquivos, key=lambda caminho: (caminho.endswith(".css"), caminho))
+
+
+def _nome_com_hash(caminho: str, conteudo: bytes) -> str:
+    raiz, extensao = os.path.splitext(caminho)
+    return f"{raiz}.{hashlib.sha256(conteudo).hexdigest()[:10]}{extensao}"
+
+
+def _reescrever_css(caminho: str, conteudo: bytes, manifesto: Dict[str, str]) -> bytes:
+    pasta = os.path.dirname(caminho)
+
+    def substituir(correspondencia):
+        aspas, alvo, sufixo = correspondencia.groups()
+        destino = os.path.normpath(f"{pasta}/{alvo}").replace(os.sep, "/")
+        if destino not in manifesto:
+            return correspondencia.group(0)
+        novo = os.path.relpath(manifesto[destino], pasta or ".").replace(os.sep, "/")
+        # o hash no nome substitui o ?v=... usado para invalidar o cache
+        sufixo = "" if sufixo.startswith("?") else sufixo
+        return f"url({aspas}{novo}{sufixo}{aspas})"
+
+    return URL_CSS.sub(substituir, conteudo.decode("utf-8")).encode("utf-8")
+
+
+def _gravar(caminho: str, conteudo: bytes):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(conteudo)
+
+
+def construir_estaticos() -> Dict[str, str]:
+    """Gera static/dist e o manifesto {caminho original: caminho com hash}."""
+    shutil.rmtree(PASTA_DIST, ignore_errors=True)
+    manifesto = {}
+    for caminho in _listar_arquivos():
+        with open(f"{PASTA_ESTATICOS}/{caminho}", "rb") as arquivo:
+            conteudo = arquivo.read()
+        if caminho.endswith(".css"):
+            conteudo = _reescrever_css(caminho, conteudo, manifesto)
+        destino = _nome_com_hash(caminho, conteudo)
+        manifesto[caminho] = destino
+        _gravar(f"{PASTA_DIST}/{destino}", conteudo)
+        if caminho.endswith(EXTENSOES_TEXTO) and len(conteudo) >= TAMANHO_MINIMO_COMPRESSAO:
+            # compressão máxima: é feita uma vez, no build, e não por requisição
+            _gravar(f"{PASTA_DIST}/{destino}.gz", gzip.compress(conteudo, 9, mtime=0))
+            if brotli:
+                _gravar(f"{PASTA_DIST}/{destino}.br", brotli.compress(conteudo, quality=11))
+    _gravar(ARQUIVO_MANIFESTO, json.dumps(manifesto, indent=2, sort_keys=True).encode())
+    global _manifesto
+    _manifesto = None
+    return manifesto
+
+
+def carregar_manifesto() -> Dict[str, str]:
+    global _manifesto
+    # lido uma vez por processo; um build novo exige reiniciar os workers
+    if _manifesto is None:
+        try:
+            with open(ARQUIVO_MANIFESTO, encoding="utf-8") as arquivo:
+                _manifesto = json.load(arquivo)
+        except FileNotFoundError:
+            _manifesto = {}
+    return _manifesto
+
+
+def estatico(caminho: str) -> str:
+    """URL de um arquivo de static/, com hash se o build tiver sido feito."""
+    caminho = caminho.lstrip("/")
+    com_hash = carregar_manifesto().get(caminho)
+    return f"/{PASTA_DIST}/{com_hash}" if com_hash else f"/{PASTA_ESTATICOS}/{caminho}"
+
+
+class EstaticosPreComprimidos(StaticFiles):
+    """Serve static/dist com cache imutável e a versão .br ou .gz, se aceita."""
+
+    async def get_response(self, path: str, scope: Scope):
+        response = await super().get_response(path, scope)
+        if response.status_code not in (200, 304):
+            return response
+        response.headers["Cache-Control"] = CACHE_IMUTAVEL
+        if not path.endswith(EXTENSOES_TEXTO):
+            return response
+        response.headers["Vary"] = "Accept-Encoding"
+        if not isinstance(response, FileResponse):
+            return response
+        aceitas = codificacoes_aceitas(scope)
+        for codificacao, extensao in (("br", ".br"), ("gzip", ".gz")):
+            comprimido = f"{response.path}{extensao}"
+            if codificacao in aceitas and os.path.exists(comprimido):
+                # cada codificação tem o próprio ETag, derivado do original;
+                # o que o FileResponse calcularia viria do .br/.gz e não seria
+                # o comparado pelo StaticFiles na revalidação
+                headers = {
+                    "Cache-Control": CACHE_IMUTAVEL,
+                    "ETag": f'{response.headers["etag"][:-1]}-{codificacao}"',
+                    "Vary": "Accept-Encoding",
+                }
+                if self.is_not_modified(Headers(headers), Headers(scope=scope)):
+                    return NotModifiedResponse(Headers(headers))
+                return FileResponse(
+                    comprimido,
+                    media_type=response.media_type,
+                    headers={**headers, "Content-Encoding": codificacao},
+                )
+        return response
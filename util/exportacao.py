@@ -0,0 +1,94 @@
+"""Exportação em fluxo (NDJSON e CSV, opcionalmente em gzip).
+
+Os registros são lidos do banco em lotes e cada lote é convertido e
+enviado antes de o próximo ser lido, então a memória usada não depende
+do tamanho da tabela.
+"""
+import csv
+import io
+import json
+import os
+import zlib
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Sequence
+
+FORMATOS = ("ndjson", "csv")
+
+TIPOS_MIDIA = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def obter_tamanho_lote() -> int:
+    return int(os.getenv("EXPORTACAO_TAMANHO_LOTE", "1000"))
+
+
+async def iterar_lotes(
+    obter_lote: Callable[..., Awaitable[Optional[List]]],
+    tamanho_lote: int,
+    **filtros,
+) -> AsyncIterator[List]:
+    """Percorre uma tabela em lotes ordenados por id.
+
+    obter_lote(ultimo_id, tamanho_lote, **filtros) deve retornar os itens
+    com id maior que ultimo_id, ou None em caso de erro no banco.
+    """
+    ultimo_id = 0
+    while True:
+        lote = await obter_lote(ultimo_id, tamanho_lote, **filtros)
+        if lote is None:
+            # o status 200 já foi enviado; interromper a resposta é a única
+            # forma de o cliente não tomar um arquivo truncado por completo
+            raise RuntimeError("Falha ao ler o banco durante a exportação.")
+        if lote:
+            yield lote
+        if len(lote) < tamanho_lote:
+            return
+        ultimo_id = lote[-1].id
+
+
+def _formatar_ndjson(lote: List, campos: Sequence[str]) -> str:
+    return "".join(
+        json.dumps({campo: getattr(item, campo) for campo in campos}, ensure_ascii=False, default=str)
+        + "\n"
+        for item in lote
+    )
+
+
+def _formatar_csv(linhas) -> str:
+    saida = io.StringIO()
+    csv.writer(saida).writerows(linhas)
+    return saida.getvalue()
+
+
+async def exportar(
+    lotes: AsyncIterator[List], formato: str, campos: Sequence[str], compactar: bool = False
+) -> AsyncIterator[bytes]:
+    """Converte os lotes no formato pedido, bloco a bloco.
+
+    campos são os atributos exportados de cada item (e o cabeçalho do CSV).
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação não suportado: {formato!r}.")
+    # wbits=31 gera o cabeçalho gzip, lido por gunzip e pelos navegadores
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compactar else None
+
+    def codificar(texto: str) -> bytes:
+        bloco = texto.encode("utf-8")
+        return compressor.compress(bloco) if compressor else bloco
+
+    if formato == "csv":
+        yield codificar(_formatar_csv([campos]))
+    async for lote in lotes:
+        if formato == "csv":
+            texto = _formatar_csv(
+                ["" if valor is None else valor for valor in (getattr(item, c) for c in campos)]
+                for item in lote
+            )
+        else:
+            texto = _formatar_ndjson(lote, campos)
+        bloco = codificar(texto)
+        if bloco:
+            yield bloco
+    if compressor:
+        yield compressor.flush()
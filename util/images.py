@@ -1,4 +1,20 @@
-from PIL import Image
+import os
+from typing import IO
+
+from PIL import Image, UnidentifiedImageError
+
+PASTA_PRODUTOS = "static/img/produtos"
+PASTA_DERIVADAS = "static/img/produtos/derivadas"
+# larguras usadas nas grades (cards de 1/6 da tela), na página do produto e
+# nas miniaturas do carrinho; a imagem principal tem no máximo 480px
+LARGURAS_DERIVADAS = (160, 320, 480)
+# formato -> (formato do PIL, opções de gravação, tipo MIME), do mais leve ao
+# mais compatível; o navegador usa o primeiro que suportar
+FORMATOS_DERIVADAS = {
+    "avif": ("AVIF", {"quality": 50}, "image/avif"),
+    "webp": ("WEBP", {"quality": 75, "method": 4}, "image/webp"),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}, "image/jpeg"),
+}
 
 
 def transformar_em_quadrada(imagem_original, tamanho_maximo=480):
@@ -25,4 +41,109 @@ def transformar_em_quadrada(imagem_original, tamanho_maximo=480):
             (tamanho_maximo, tamanho_maximo), Image.Resampling.LANCZOS
         )
     # retorna a imagem quadrada e redimensionada (quando necessário)
-    return imagem_quadrada
\ No newline at end of file
+    return imagem_quadrada
+
+
+def eh_imagem_valida(arquivo: IO[bytes]) -> bool:
+    # Image.open lê só o cabeçalho; a decodificação fica para o pool de processos
+    try:
+        with Image.open(arquivo):
+            return True
+    except (UnidentifiedImageError, OSError):
+        return False
+    finally:
+        arquivo.seek(0)
+
+
+def caminho_imagem_produto(id_produto: int) -> str:
+    return f"{PASTA_PRODUTOS}/{id_produto:04d}.jpg"
+
+
+def caminho_derivada(id_produto: int, largura: int, formato: str) -> str:
+    return f"{PASTA_DERIVADAS}/{id_produto:04d}-{largura}.{formato}"
+
+
+def _gravar(imagem, caminho: str, formato: str, **opcoes):
+    # grava ao lado e renomeia, para nunca servir um arquivo pela metade; o
+    # pid evita que dois workers gerando o mesmo arquivo se atropelem
+    caminho_temporario = f"{caminho}.{os.getpid()}.tmp"
+    imagem.save(caminho_temporario, formato, **opcoes)
+    os.replace(caminho_temporario, caminho)
+
+
+def gerar_derivadas(imagem_quadrada, id_produto: int):
+    """Grava a imagem em cada largura de LARGURAS_DERIVADAS e formato de FORMATOS_DERIVADAS."""
+    os.makedirs(PASTA_DERIVADAS, exist_ok=True)
+    for largura in LARGURAS_DERIVADAS:
+        # imagens menores que a largura não são ampliadas
+        lado = min(largura, imagem_quadrada.size[0])
+        redimensionada = imagem_quadrada.resize((lado, lado), Image.Resampling.LANCZOS)
+        for formato, (formato_pil, opcoes, _) in FORMATOS_DERIVADAS.items():
+            _gravar(redimensionada, caminho_derivada(id_produto, largura, formato), formato_pil, **opcoes)
+
+
+def gerar_derivadas_existentes(id_produto: int):
+    """Gera as derivadas a partir da imagem principal já gravada do produto."""
+    with Image.open(caminho_imagem_produto(id_produto)) as imagem:
+        gerar_derivadas(imagem.convert("RGB"), id_produto)
+
+
+def gerar_variante(caminho_origem: str, caminho_destino: str, tamanho: int, formato: str):
+    """Grava a imagem quadrada com lado tamanho no formato pedido (chave de FORMATOS_DERIVADAS)."""
+    formato_pil, opcoes, _ = FORMATOS_DERIVADAS[formato]
+    with Image.open(caminho_origem) as imagem:
+        variante = transformar_em_quadrada(imagem.convert("RGB"), tamanho)
+    _gravar(variante, caminho_destino, formato_pil, **opcoes)
+
+
+def tem_derivadas(id_produto: int) -> bool:
+    # a última derivada gravada por gerar_derivadas indica o conjunto completo
+    ultima = caminho_derivada(id_produto, LARGURAS_DERIVADAS[-1], list(FORMATOS_DERIVADAS)[-1])
+    return os.path.exists(ultima)
+
+
+def versao_imagem_produto(id_produto: int):
+    """Versão da imagem principal (data de modificação), ou None se não existe."""
+    try:
+        return f"{os.stat(caminho_imagem_produto(id_produto)).st_mtime_ns:x}"
+    except FileNotFoundError:
+        return None
+
+
+def obter_derivadas(id_produto: int) -> dict:
+    """Retorna {formato: (tipo MIME, srcset)} das derivadas do produto.
+
+    Usa as derivadas gravadas em PASTA_DERIVADAS quando existem; senão,
+    aponta para /img/produto/..., que gera cada variante na primeira vez.
+    Essas URLs levam a versão da imagem principal (?v=), para que o
+    navegador não guarde a variante antiga quando a imagem mudar.
+    """
+    if tem_derivadas(id_produto):
+        url = lambda largura, formato: f"/{caminho_derivada(id_produto, largura, formato)}"
+    else:
+        versao = versao_imagem_produto(id_produto)
+        sufixo = f"?v={versao}" if versao else ""
+        url = lambda largura, formato: f"/img/produto/{id_produto}/{largura}.{formato}{sufixo}"
+    return {
+        formato: (
+            tipo,
+            ", ".join(f"{url(largura, formato)} {largura}w" for largura in LARGURAS_DERIVADAS),
+        )
+        for formato, (_, _, tipo) in FORMATOS_DERIVADAS.items()
+    }
+
+
+def gerar_imagem_produto(caminho_origem: str, id_produto: int, tamanho_maximo=480):
+    """Decodifica o arquivo enviado, deixa a imagem quadrada e grava o JPEG
+    principal e as derivadas.
+
+    Roda em um processo do pool de imagens; o arquivo de origem é
+    temporário e é removido ao final, com ou sem erro.
+    """
+    try:
+        with Image.open(caminho_origem) as imagem_original:
+            imagem_quadrada = transformar_em_quadrada(imagem_original, tamanho_maximo)
+        gerar_derivadas(imagem_quadrada, id_produto)
+        _gravar(imagem_quadrada, caminho_imagem_produto(id_produto), "JPEG")
+    finally:
+        os.remove(caminho_origem)
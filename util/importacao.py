@@ -0,0 +1,98 @@
+"""Leitura em fluxo de arquivos de importação (JSON, NDJSON e CSV).
+
+Os registros são lidos aos poucos, sem carregar o arquivo inteiro na
+memória, e entregues em lotes para o executemany dos repositórios.
+"""
+import csv
+import io
+import json
+import os
+from itertools import islice
+from typing import IO, Iterable, Iterator, List
+
+FORMATOS = ("json", "ndjson", "csv")
+
+
+def obter_tamanho_lote() -> int:
+    return int(os.getenv("IMPORTACAO_TAMANHO_LOTE", "5000"))
+
+
+def detectar_formato(nome_arquivo: str) -> str:
+    extensao = os.path.splitext(nome_arquivo or "")[1].lower().lstrip(".")
+    if extensao == "jsonl":
+        return "ndjson"
+    if extensao not in FORMATOS:
+        raise ValueError(f"Formato de importação não suportado: {nome_arquivo!r}.")
+    return extensao
+
+
+def _ler_json(arquivo: IO[str], tamanho_bloco: int = 64 * 1024) -> Iterator[dict]:
+    # lê um array JSON de objetos bloco a bloco, decodificando um objeto
+    # por vez com raw_decode, em vez de json.load no arquivo inteiro
+    decodificador = json.JSONDecoder()
+    buffer = ""
+    iniciado = False
+    fim = False
+    while True:
+        bloco = arquivo.read(tamanho_bloco)
+        buffer += bloco
+        posicao = 0
+        while True:
+            while posicao < len(buffer) and buffer[posicao] in " \t\r\n,":
+                posicao += 1
+            if posicao == len(buffer):
+                break
+            if not iniciado:
+                if buffer[posicao] != "[":
+                    raise ValueError("O arquivo JSON deve conter uma lista de objetos.")
+                iniciado = True
+                posicao += 1
+                continue
+            if buffer[posicao] == "]":
+                fim = True
+                break
+            try:
+                registro, posicao = decodificador.raw_decode(buffer, posicao)
+            except json.JSONDecodeError:
+                if not bloco:
+                    raise
+                break  # objeto incompleto: espera o próximo bloco
+            yield registro
+        buffer = buffer[posicao:]
+        if fim:
+            return
+        if not bloco:
+            if iniciado or buffer.strip():
+                raise ValueError("Arquivo JSON incompleto.")
+            return
+
+
+def _ler_ndjson(arquivo: IO[str]) -> Iterator[dict]:
+    for numero, linha in enumerate(arquivo, start=1):
+        if linha.strip():
+            try:
+                yield json.loads(linha)
+            except json.JSONDecodeError as ex:
+                raise ValueError(f"Linha {numero} inválida: {ex}") from ex
+
+
+def _ler_csv(arquivo: IO[str]) -> Iterator[dict]:
+    for registro in csv.DictReader(arquivo):
+        # células vazias do CSV equivalem a campos ausentes
+        yield {chave: valor for chave, valor in registro.items() if valor != ""}
+
+
+def ler_registros(arquivo: IO, formato: str) -> Iterator[dict]:
+    """Itera os registros de um arquivo aberto em modo texto ou binário."""
+    if isinstance(arquivo, io.BufferedIOBase) or "b" in getattr(arquivo, "mode", ""):
+        arquivo = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    leitores = {"json": _ler_json, "ndjson": _ler_ndjson, "csv": _ler_csv}
+    if formato not in leitores:
+        raise ValueError(f"Formato de importação não suportado: {formato!r}.")
+    return leitores[formato](arquivo)
+
+
+def em_lotes(registros: Iterable, tamanho: int) -> Iterator[List]:
+    iterador = iter(registros)
+    while lote := list(islice(iterador, tamanho)):
+        yield lote
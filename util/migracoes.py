@@ -0,0 +1,120 @@
+"""Migrações versionadas do banco de dados.
+
+Cada migração tem um número de versão e é aplicada uma única vez; as
+versões aplicadas ficam na tabela migracao. Como vários workers podem
+subir ao mesmo tempo, toda migração deve poder ser repetida sem efeito
+(CREATE ... IF NOT EXISTS e afins). Para alterar o esquema, acrescente
+uma nova entrada ao final de MIGRACOES, nunca edite uma já publicada.
+"""
+import logging
+import sqlite3
+
+from repositories.produto_repo import ProdutoRepo
+from sql import (
+    carrinho_sql,
+    categoria_sql,
+    destaque_sql,
+    item_pedido_sql,
+    migracao_sql,
+    pedido_sql,
+    produto_sql,
+    tarefa_imagem_sql,
+    usuario_sql,
+    versao_cache_sql,
+)
+from util.database import obter_conexao
+
+logger = logging.getLogger(__name__)
+
+
+def _criar_tabelas(cursor: sqlite3.Cursor):
+    # esquema que antes era criado em main.py; tudo com IF NOT EXISTS, então
+    # bancos antigos passam sem mudança
+    cursor.execute(versao_cache_sql.SQL_CRIAR_TABELA)
+    cursor.execute(categoria_sql.SQL_CRIAR_TABELA)
+    ProdutoRepo.criar_esquema(cursor)
+    cursor.execute(destaque_sql.SQL_CRIAR_TABELA)
+    cursor.execute(usuario_sql.SQL_CRIAR_TABELA)
+    cursor.execute(pedido_sql.SQL_CRIAR_TABELA)
+    cursor.execute(item_pedido_sql.SQL_CRIAR_TABELA)
+    cursor.execute(item_pedido_sql.SQL_CRIAR_GATILHO_INSERIR)
+    cursor.execute(item_pedido_sql.SQL_CRIAR_GATILHO_ALTERAR)
+    cursor.execute(item_pedido_sql.SQL_CRIAR_GATILHO_EXCLUIR)
+
+
+def _criar_indices_consultas(cursor: sqlite3.Cursor):
+    cursor.execute(pedido_sql.SQL_CRIAR_INDICE_CLIENTE_ESTADO)
+    cursor.execute(pedido_sql.SQL_CRIAR_INDICE_CLIENTE_DATA_HORA)
+    cursor.execute(pedido_sql.SQL_CRIAR_INDICE_ESTADO_DATA_HORA)
+    cursor.execute(usuario_sql.SQL_CRIAR_INDICE_TOKEN)
+
+
+def _criar_tabela_tarefas_imagem(cursor: sqlite3.Cursor):
+    cursor.execute(tarefa_imagem_sql.SQL_CRIAR_TABELA)
+
+
+# (versão, descrição, função que recebe o cursor da transação)
+MIGRACOES = [
+    (1, "tabelas iniciais", _criar_tabelas),
+    (2, "índices de pedido por cliente, estado e data e de usuário por token", _criar_indices_consultas),
+    (3, "tabela de tarefas de processamento de imagens", _criar_tabela_tarefas_imagem),
+]
+
+# consultas frequentes que não podem percorrer a tabela inteira
+CONSULTAS_INDEXADAS = {
+    "pedido por cliente e período": pedido_sql.SQL_OBTER_POR_PERIODO,
+    "pedido por cliente e estado": pedido_sql.SQL_OBTER_POR_ESTADO,
+    "pedido por estado": pedido_sql.SQL_OBTER_TODOS_POR_ESTADO,
+    "carrinho do cliente": carrinho_sql.SQL_OBTER_ID_CARRINHO,
+    "produto por categoria": produto_sql.SQL_OBTER_POR_CATEGORIA,
+    "quantidade de produtos por categoria": produto_sql.SQL_OBTER_QUANTIDADE_POR_CATEGORIA,
+    "usuário por token": usuario_sql.SQL_OBTER_POR_TOKEN,
+}
+
+
+def obter_versoes_aplicadas() -> set:
+    with obter_conexao() as conexao:
+        cursor = conexao.cursor()
+        cursor.execute(migracao_sql.SQL_CRIAR_TABELA)
+        return {t[0] for t in cursor.execute(migracao_sql.SQL_OBTER_VERSOES).fetchall()}
+
+
+def aplicar_migracoes() -> list:
+    """Aplica as migrações pendentes, em ordem; retorna as versões aplicadas."""
+    aplicadas = obter_versoes_aplicadas()
+    novas = []
+    for versao, descricao, migrar in MIGRACOES:
+        if versao in aplicadas:
+            continue
+        logger.info("Aplicando migração %d: %s", versao, descricao)
+        with obter_conexao() as conexao:
+            cursor = conexao.cursor()
+            # DDL e registro na mesma transação: ou a migração inteira fica
+            # gravada com a versão, ou nada muda
+            cursor.execute(migracao_sql.SQL_INICIAR)
+            if cursor.execute(migracao_sql.SQL_OBTER_VERSAO, (versao,)).fetchone():
+                # outro worker aplicou enquanto este esperava o lock
+                continue
+            migrar(cursor)
+            cursor.execute(migracao_sql.SQL_REGISTRAR, (versao, descricao))
+        novas.append(versao)
+    return novas
+
+
+def verificar_planos() -> list:
+    """Roda EXPLAIN QUERY PLAN em CONSULTAS_INDEXADAS.
+
+    Retorna (nome, passos do plano, ok), em que ok é False se algum passo
+    percorre uma tabela inteira (SCAN) em vez de buscar por índice (SEARCH).
+    """
+    resultados = []
+    with obter_conexao() as conexao:
+        cursor = conexao.cursor()
+        for nome, sql in CONSULTAS_INDEXADAS.items():
+            parametros = (None,) * sql.count("?")
+            passos = [
+                t[3] for t in cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parametros).fetchall()
+            ]
+            ok = not any(passo.startswith("SCAN ") for passo in passos)
+            resultados.append((nome, passos, ok))
+    return resultados
@@ -0,0 +1,19 @@
+import base64
+import json
+
+
+def codificar_cursor(*valores) -> str:
+    """Gera um cursor opaco com a chave de ordenação do último item da página."""
+    dados = json.dumps(valores, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(dados).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> list:
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor de paginação inválido.")
+    if not isinstance(valores, list):
+        raise ValueError("Cursor de paginação inválido.")
+    return valores
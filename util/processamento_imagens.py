@@ -0,0 +1,154 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import IO, Optional
+
+from fastapi import HTTPException, UploadFile, status
+
+from models.tarefa_imagem_model import TarefaImagem
+from repositories.tarefa_imagem_repo import TarefaImagemRepoAsync
+from util.images import gerar_imagem_produto
+
+
+class PoolImagens:
+    """Decodifica, transforma e grava imagens em processos separados.
+
+    O PIL segura o GIL enquanto redimensiona, então threads não bastariam:
+    o event loop continuaria parado. No máximo `processos` imagens são
+    processadas ao mesmo tempo e no máximo `fila_maxima` aguardam; quem
+    chega com a fila cheia recebe 503 antes de qualquer gravação.
+    """
+
+    def __init__(self, processos: int = 1, fila_maxima: int = 32):
+        self.processos = processos
+        self.fila_maxima = fila_maxima
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._executor = self._criar_executor()
+        self._estatisticas = {
+            "execucoes": 0,
+            "erros": 0,
+            "rejeitadas": 0,
+            "tempo_total": 0.0,
+        }
+
+    def _criar_executor(self) -> ProcessPoolExecutor:
+        # forkserver evita copiar para o filho o estado do worker (threads,
+        # conexões abertas); cada processo é trocado depois de 100 imagens
+        # para devolver ao sistema a memória que o PIL acumula
+        contexto = multiprocessing.get_context("forkserver")
+        contexto.set_forkserver_preload(["util.images"])
+        return ProcessPoolExecutor(self.processos, mp_context=contexto, max_tasks_per_child=100)
+
+    def verificar_vaga(self):
+        with self._lock:
+            if self._pendentes >= self.processos + self.fila_maxima:
+                self._estatisticas["rejeitadas"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Muitas imagens em processamento. Tente novamente.",
+                    headers={"Retry-After": "5"},
+                )
+
+    def _finalizar(self, enviado_em: float, futuro: Future):
+        with self._lock:
+            self._pendentes -= 1
+            self._estatisticas["execucoes"] += 1
+            self._estatisticas["erros"] += futuro.cancelled() or futuro.exception() is not None
+            self._estatisticas["tempo_total"] += time.monotonic() - enviado_em
+
+    def enviar(self, funcao, *args) -> Future:
+        with self._lock:
+            try:
+                futuro = self._executor.submit(funcao, *args)
+            except BrokenProcessPool:
+                # um processo morreu (falta de memória, por exemplo): o
+                # executor não aceita mais tarefas e precisa ser recriado
+                self._executor = self._criar_executor()
+                futuro = self._executor.submit(funcao, *args)
+            self._pendentes += 1
+        futuro.add_done_callback(lambda f, enviado_em=time.monotonic(): self._finalizar(enviado_em, f))
+        return futuro
+
+    def fechar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def obter_estatisticas(self) -> dict:
+        with self._lock:
+            estatisticas = dict(self._estatisticas)
+            pendentes = self._pendentes
+        execucoes = estatisticas["execucoes"]
+        estatisticas["tempo_medio"] = estatisticas["tempo_total"] / execucoes if execucoes else 0.0
+        estatisticas["processos"] = self.processos
+        estatisticas["fila_maxima"] = self.fila_maxima
+        estatisticas["em_execucao"] = min(pendentes, self.processos)
+        estatisticas["aguardando"] = max(pendentes - self.processos, 0)
+        return estatisticas
+
+
+_pool: PoolImagens = None
+_pool_lock = threading.Lock()
+# referências às tarefas de acompanhamento, para não serem coletadas antes do fim
+_acompanhamentos = set()
+
+
+def obter_pool_imagens() -> PoolImagens:
+    global _pool
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = PoolImagens(
+                    int(os.getenv("IMAGENS_PROCESSOS", str(min(os.cpu_count() or 1, 2)))),
+                    int(os.getenv("IMAGENS_FILA_MAXIMA", "32")),
+                )
+    return _pool
+
+
+def obter_estatisticas_imagens() -> dict:
+    return obter_pool_imagens().obter_estatisticas()
+
+
+def _salvar_temporario(arquivo: IO[bytes]) -> str:
+    descritor, caminho = tempfile.mkstemp(prefix="imagem-", suffix=".upload")
+    with os.fdopen(descritor, "wb") as destino:
+        shutil.copyfileobj(arquivo, destino)
+    return caminho
+
+
+async def _acompanhar(id_tarefa: int, futuro: Future, caminho_temporario: str):
+    erro = None
+    try:
+        await asyncio.wrap_future(futuro)
+    except Exception as ex:
+        erro = str(ex) or type(ex).__name__
+        # se o processo morreu antes de começar, o temporário ficou para trás
+        if os.path.exists(caminho_temporario):
+            os.remove(caminho_temporario)
+    await TarefaImagemRepoAsync.concluir(id_tarefa, erro)
+
+
+async def agendar_imagem_produto(id_produto: int, arquivo: UploadFile) -> Optional[TarefaImagem]:
+    """Envia a imagem do produto para o pool e retorna a tarefa criada.
+
+    O upload é copiado para um arquivo temporário (o processo filho não
+    enxerga o UploadFile) e a requisição não espera o processamento; a
+    situação fica em TarefaImagemRepo.
+    """
+    loop = asyncio.get_running_loop()
+    caminho = await loop.run_in_executor(None, _salvar_temporario, arquivo.file)
+    tarefa = await TarefaImagemRepoAsync.inserir(id_produto)
+    if not tarefa:
+        os.remove(caminho)
+        return None
+    futuro = obter_pool_imagens().enviar(gerar_imagem_produto, caminho, id_produto)
+    acompanhamento = asyncio.create_task(_acompanhar(tarefa.id, futuro, caminho))
+    _acompanhamentos.add(acompanhamento)
+    acompanhamento.add_done_callback(_acompanhamentos.discard)
+    return tarefa
@@ -0,0 +1,117 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+
+from util import auth_jwt
+
+
+class PoolSenhas:
+    """Executa o bcrypt em threads para não bloquear o event loop.
+
+    O bcrypt libera o GIL, então as threads rodam em paralelo de verdade.
+    No máximo `concorrencia` cálculos rodam ao mesmo tempo e no máximo
+    `fila_maxima` ficam aguardando; além disso a requisição recebe 503.
+    """
+
+    def __init__(self, concorrencia: int = 2, fila_maxima: int = 64):
+        self.concorrencia = concorrencia
+        self.fila_maxima = fila_maxima
+        self.pid = os.getpid()
+        self._executor = ThreadPoolExecutor(concorrencia, thread_name_prefix="senhas")
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._estatisticas = {
+            "execucoes": 0,
+            "rejeitadas": 0,
+            "tempo_fila_total": 0.0,
+            "tempo_fila_maximo": 0.0,
+            "tempo_execucao_total": 0.0,
+        }
+
+    def _executar(self, funcao, enviado_em: float, *args):
+        inicio = time.monotonic()
+        try:
+            return funcao(*args)
+        finally:
+            fim = time.monotonic()
+            with self._lock:
+                espera = inicio - enviado_em
+                self._estatisticas["execucoes"] += 1
+                self._estatisticas["tempo_fila_total"] += espera
+                self._estatisticas["tempo_fila_maximo"] = max(
+                    self._estatisticas["tempo_fila_maximo"], espera
+                )
+                self._estatisticas["tempo_execucao_total"] += fim - inicio
+
+    async def executar(self, funcao, *args):
+        with self._lock:
+            if self._pendentes >= self.concorrencia + self.fila_maxima:
+                self._estatisticas["rejeitadas"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Muitas autenticações simultâneas. Tente novamente.",
+                    headers={"Retry-After": "1"},
+                )
+            self._pendentes += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, self._executar, funcao, time.monotonic(), *args
+            )
+        finally:
+            with self._lock:
+                self._pendentes -= 1
+
+    def fechar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def obter_estatisticas(self) -> dict:
+        with self._lock:
+            estatisticas = dict(self._estatisticas)
+            pendentes = self._pendentes
+        execucoes = estatisticas["execucoes"]
+        estatisticas["tempo_fila_medio"] = (
+            estatisticas["tempo_fila_total"] / execucoes if execucoes else 0.0
+        )
+        estatisticas["tempo_execucao_medio"] = (
+            estatisticas["tempo_execucao_total"] / execucoes if execucoes else 0.0
+        )
+        estatisticas["concorrencia"] = self.concorrencia
+        estatisticas["fila_maxima"] = self.fila_maxima
+        estatisticas["em_execucao"] = min(pendentes, self.concorrencia)
+        estatisticas["aguardando"] = max(pendentes - self.concorrencia, 0)
+        return estatisticas
+
+
+_pool: PoolSenhas = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool_senhas() -> PoolSenhas:
+    global _pool
+    # mesmo esquema do pool de conexões: criado depois do load_dotenv e
+    # recriado nos workers derivados via fork
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = PoolSenhas(
+                    int(os.getenv("SENHAS_CONCORRENCIA", str(min(os.cpu_count() or 1, 4)))),
+                    int(os.getenv("SENHAS_FILA_MAXIMA", "64")),
+                )
+    return _pool
+
+
+def obter_estatisticas_senhas() -> dict:
+    return obter_pool_senhas().obter_estatisticas()
+
+
+async def obter_hash_senha(senha: str) -> str:
+    return await obter_pool_senhas().executar(auth_jwt.obter_hash_senha, senha)
+
+
+async def conferir_senha(senha: str, hash_senha: str) -> bool:
+    return await obter_pool_senhas().executar(auth_jwt.conferir_senha, senha, hash_senha)
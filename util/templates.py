@@ -1,10 +1,94 @@
+"""Ambiente Jinja único para todas as áreas do site.
+
+Cada área (main, cliente) procura um template primeiro na sua pasta e depois
+em templates/shared. Antes, cada área tinha o próprio ambiente e compilava
+de novo base.html, cabeçalho, rodapé e mensagens. Agora há um ambiente só,
+com os nomes qualificados pela pasta ("main/pages/index.html",
+"shared/pages/base.html"), e cada template é compilado uma vez por processo.
+O código compilado fica gravado em TEMPLATES_CACHE_PASTA e é reaproveitado
+ao reiniciar.
+"""
+import os
+from functools import lru_cache
+
 from fastapi.templating import Jinja2Templates
-from jinja2 import ChoiceLoader, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+from util.estaticos import estatico
+from util.images import obter_derivadas
+
+PASTA_TEMPLATES = "templates"
+AREA_COMPARTILHADA = "shared"
+
+_ambiente: Environment = None
+
+
+def _resolver(nome: str, area: str = None) -> str:
+    if area and area != AREA_COMPARTILHADA and os.path.exists(
+        os.path.join(PASTA_TEMPLATES, area, nome)
+    ):
+        return f"{area}/{nome}"
+    return f"{AREA_COMPARTILHADA}/{nome}"
+
+
+_resolver_em_cache = lru_cache(maxsize=None)(_resolver)
+
+
+def resolver_template(nome: str, area: str = None) -> str:
+    """Nome qualificado de um template: o da área, se existir, senão o compartilhado."""
+    # com recarga, um template criado ou removido na área vale na hora,
+    # como a edição de um já existente; sem ela, a resposta não muda
+    if obter_ambiente_templates().auto_reload:
+        return _resolver(nome, area)
+    return _resolver_em_cache(nome, area)
+
+
+class AmbienteTemplates(Environment):
+    def join_path(self, template: str, parent: str) -> str:
+        # {% extends %}, {% include %} e {% from %} usam nomes relativos à
+        # área ("pages/base.html"); a área vem do template que os contém
+        return resolver_template(template, parent.split("/", 1)[0])
+
+
+def obter_ambiente_templates() -> Environment:
+    global _ambiente
+    if _ambiente is None:
+        pasta_cache = os.getenv("TEMPLATES_CACHE_PASTA", ".cache/templates")
+        if pasta_cache:
+            os.makedirs(pasta_cache, exist_ok=True)
+        _ambiente = AmbienteTemplates(
+            loader=FileSystemLoader(PASTA_TEMPLATES),
+            autoescape=True,
+            bytecode_cache=FileSystemBytecodeCache(pasta_cache) if pasta_cache else None,
+            # sem recarga, o template em memória não é comparado com o
+            # arquivo a cada uso; em produção os templates não mudam
+            auto_reload=os.getenv("TEMPLATES_AUTO_RELOAD", "1") not in ("0", "false", "False"),
+        )
+        _ambiente.globals["obter_derivadas"] = obter_derivadas
+        _ambiente.globals["estatico"] = estatico
+    return _ambiente
+
+
+def compilar_templates() -> int:
+    """Carrega todos os templates no ambiente (e no cache de bytecode)."""
+    ambiente = obter_ambiente_templates()
+    nomes = ambiente.list_templates(extensions=["html"])
+    for nome in nomes:
+        ambiente.get_template(nome)
+    return len(nomes)
+
+
+class TemplatesArea(Jinja2Templates):
+    """Jinja2Templates de uma área, sobre o ambiente compartilhado."""
+
+    def __init__(self, area: str = None):
+        super().__init__(env=obter_ambiente_templates())
+        self.area = area
+
+    def get_template(self, name: str) -> Template:
+        return self.env.get_template(resolver_template(name, self.area))
 
 
 def obter_jinja_templates(diretorio: str) -> Jinja2Templates:
-    loader1 = FileSystemLoader(diretorio)
-    loader2 = FileSystemLoader("templates/shared")
-    loader = ChoiceLoader([loader1, loader2])
-    templates = Jinja2Templates(directory="templates", loader=loader)
-    return templates
+    area = os.path.relpath(diretorio, PASTA_TEMPLATES).replace(os.sep, "/")
+    return TemplatesArea(None if area == "." else area)
@@ -0,0 +1,42 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+# plurais comuns do português (já sem acentos), do mais específico ao mais geral
+SUFIXOS_PLURAL = (
+    ("oes", "ao"),
+    ("aes", "ao"),
+    ("ais", "al"),
+    ("eis", "el"),
+    ("ois", "ol"),
+    ("ns", "m"),
+    ("res", "r"),
+    ("zes", "z"),
+)
+
+
+def remover_acentos(texto: str) -> str:
+    if texto.isascii():
+        return texto
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+# o vocabulário do catálogo se repete muito; numa importação em massa
+# a mesma palavra é reduzida milhares de vezes
+@lru_cache(maxsize=65536)
+def reduzir_palavra(palavra: str) -> str:
+    if len(palavra) < 4:
+        return palavra
+    for sufixo, substituto in SUFIXOS_PLURAL:
+        if palavra.endswith(sufixo):
+            return palavra[: -len(sufixo)] + substituto
+    if palavra.endswith("s") and not palavra.endswith(("ss", "us", "is")):
+        return palavra[:-1]
+    return palavra
+
+
+def normalizar_texto(texto: str) -> str:
+    """Remove acentos, ignora maiúsculas e reduz plurais ("Fônes" -> "fone")."""
+    texto = remover_acentos(texto or "").casefold()
+    return " ".join(reduzir_palavra(p) for p in re.findall(r"\w+", texto))